@@ -18,6 +18,18 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def init_cors(app):
+    """Configure CORS to allow the origins in ALLOWED_ORIGINS"""
+    allowed_origins = os.environ.get('ALLOWED_ORIGINS', '*').split(',')
+    CORS(app, resources={
+        r"/*": {
+            "origins": allowed_origins,  # Use environment variable or default to all
+            "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+            "allow_headers": ["Content-Type", "Authorization", "X-Requested-With"],
+            "supports_credentials": True
+        }
+    })
+
 def create_app():
     """Create and configure the Flask application"""
     # Create static folder path for uploads if it doesn't exist
@@ -46,18 +58,18 @@ def create_app():
     # Initialize MongoDB
     from .db import mongo, init_db
     mongo.init_app(app)
-    init_db(app)
+    db = init_db(app)
+    
+    # Backfill data written before the current schema (runs once per database)
+    from .migrations import start_migrations
+    start_migrations(db)
+    
+    # Pick up posts whose sentiment analysis was interrupted by a restart
+    from .enrichment import sentiment_enricher
+    sentiment_enricher.start(db)
     
     # Configure CORS to allow specific origins
-    allowed_origins = os.environ.get('ALLOWED_ORIGINS', '*').split(',')
-    CORS(app, resources={
-        r"/*": {
-            "origins": allowed_origins,  # Use environment variable or default to all
-            "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-            "allow_headers": ["Content-Type", "Authorization", "X-Requested-With"],
-            "supports_credentials": True
-        }
-    })
+    init_cors(app)
     
     # Request logging middleware
     @app.before_request
@@ -90,6 +102,9 @@ def create_app():
     from .routes.campus_events import campus_events_bp
     from .routes.summarize import summarize_bp
     from .routes.files import files_bp  # New files blueprint for serving media from DB
+    from .routes.search import search_bp
+    from .routes.notifications import notifications_bp
+    from .routes.stream import stream_bp
     
     app.register_blueprint(users_bp)
     app.register_blueprint(doubts_bp)
@@ -108,6 +123,9 @@ def create_app():
     app.register_blueprint(campus_events_bp)
     app.register_blueprint(summarize_bp)
     app.register_blueprint(files_bp)  # Register the files blueprint
+    app.register_blueprint(search_bp)
+    app.register_blueprint(notifications_bp)
+    app.register_blueprint(stream_bp)
     
     # Root endpoint
     @app.route('/')
@@ -218,4 +236,36 @@ def create_app():
     def index():
         return send_from_directory(static_folder, 'test.html')
     
-    return app
\ No newline at end of file
+    return app
+
+def create_stream_app():
+    """Create the Flask application for the stream service
+
+    Serves only /api/stream (see app/stream.py and start_stream.sh). It is
+    run on gevent workers, where each open stream is a greenlet, so it skips
+    the API's background work (migrations, sentiment enrichment) and its
+    blocking model inference.
+    """
+    app = Flask(__name__)
+    
+    from .config import get_config
+    app.config.from_object(get_config())
+    
+    from .db import mongo, init_db
+    mongo.init_app(app)
+    init_db(app)
+    
+    init_cors(app)
+    
+    from .routes.stream import stream_bp
+    app.register_blueprint(stream_bp)
+    
+    @app.route('/api/v1/health', methods=['GET'])
+    def health_check():
+        return jsonify({
+            'status': 'healthy',
+            'message': 'CampusSync stream service is running',
+            'timestamp': time.time()
+        })
+    
+    return app
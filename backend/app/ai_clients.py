@@ -0,0 +1,197 @@
+"""
+Outbound AI provider clients for the CampusConnect API
+
+Every call to an external AI service goes through this module:
+
+* Hugging Face Inference API calls share one ``requests.Session`` so TCP/TLS
+  connections are kept alive and pooled, and each call has a connect/read
+  timeout.
+* The Gemini model is configured once per process and reused, with calls
+  bounded by a timeout.
+* Each provider has a ``CircuitBreaker``: after repeated failures the
+  provider is skipped for a cooldown window and callers fall back at once
+  instead of waiting on a service that is down.
+"""
+
+import logging
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+HUGGINGFACE_API_URL = "https://api-inference.huggingface.co/models/{model}"
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit is open"""
+
+class CircuitBreaker:
+    """Skip a provider for ``cooldown`` seconds after ``threshold`` consecutive failures
+
+    Once the cooldown has passed a single trial call is let through; success
+    closes the circuit and failure opens it for another cooldown.
+    """
+
+    def __init__(self, name, threshold=3, cooldown=60):
+        self.name = name
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Return True if a call may be made now"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.cooldown or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info(f"{self.name} circuit closed")
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.threshold:
+                self._opened_at = time.monotonic()
+                logger.warning(f"{self.name} circuit open for {self.cooldown}s after {self._failures} failures")
+
+    def call(self, func, *args, **kwargs):
+        """Run ``func`` under the breaker
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+        """
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} temporarily disabled after repeated failures")
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+huggingface_breaker = CircuitBreaker(
+    'huggingface', threshold=Config.AI_BREAKER_THRESHOLD, cooldown=Config.AI_BREAKER_COOLDOWN
+)
+gemini_breaker = CircuitBreaker(
+    'gemini', threshold=Config.AI_BREAKER_THRESHOLD, cooldown=Config.AI_BREAKER_COOLDOWN
+)
+
+def _build_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=Config.AI_HTTP_POOL_SIZE,
+        pool_maxsize=Config.AI_HTTP_POOL_SIZE
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+# Shared keep-alive session for all outbound AI HTTP calls
+http_session = _build_session()
+
+def _post_inference(model, payload, timeout):
+    response = http_session.post(
+        HUGGINGFACE_API_URL.format(model=model),
+        headers={"Authorization": f"Bearer {Config.AI_API_KEY}"},
+        json=payload,
+        timeout=timeout
+    )
+    if response.status_code != 200:
+        logger.warning(f"API call failed with status {response.status_code}: {response.text[:200]}")
+        raise ValueError(f"API call failed with status {response.status_code}")
+    return response.json()
+
+def huggingface_inference(model, payload, timeout=None):
+    """Call the Hugging Face Inference API for ``model``
+
+    Args:
+        model: Model id, e.g. "cardiffnlp/twitter-roberta-base-sentiment"
+        payload: JSON request body
+        timeout: (connect, read) timeout in seconds; defaults to the configured one
+
+    Returns:
+        The decoded JSON response
+
+    Raises:
+        ValueError: If no API key is configured or the call fails
+        CircuitOpenError: If the API is being skipped after repeated failures
+        requests.RequestException: On connection errors and timeouts
+    """
+    if not Config.AI_API_KEY:
+        raise ValueError("No API key configured")
+    if timeout is None:
+        timeout = (Config.AI_CONNECT_TIMEOUT, Config.AI_READ_TIMEOUT)
+    return huggingface_breaker.call(_post_inference, model, payload, timeout)
+
+_gemini_model = None
+_gemini_lock = threading.Lock()
+
+def get_gemini_model():
+    """Return the process-wide Gemini model, configuring it on first use
+
+    Returns:
+        The GenerativeModel instance, or None if Gemini is not configured
+    """
+    global _gemini_model
+    if _gemini_model is not None:
+        return _gemini_model
+
+    with _gemini_lock:
+        if _gemini_model is None:
+            if not Config.GEMINI_API_KEY:
+                logger.error("GEMINI_API_KEY not found in environment variables")
+                return None
+            try:
+                import google.generativeai as genai
+                genai.configure(api_key=Config.GEMINI_API_KEY)
+                _gemini_model = genai.GenerativeModel(Config.GEMINI_MODEL)
+            except Exception as e:
+                logger.error(f"Failed to create Gemini model instance: {str(e)}")
+                return None
+    return _gemini_model
+
+def _generate_with_timeout(model, contents, generation_config, timeout):
+    # The deadline is enforced by the client itself, so a slow call frees
+    # its thread instead of running on after the caller has given up
+    from google.api_core.exceptions import DeadlineExceeded
+    try:
+        return model.generate_content(
+            contents,
+            generation_config=generation_config,
+            request_options={'timeout': timeout}
+        )
+    except DeadlineExceeded:
+        raise TimeoutError(f"Gemini did not respond within {timeout}s")
+
+def gemini_generate(contents, generation_config=None, timeout=None):
+    """Generate content with the shared Gemini model
+
+    Raises:
+        ValueError: If Gemini is not configured
+        CircuitOpenError: If Gemini is being skipped after repeated failures
+        TimeoutError: If the call takes longer than ``timeout`` seconds
+    """
+    model = get_gemini_model()
+    if model is None:
+        raise ValueError("Gemini API is not configured")
+    if timeout is None:
+        timeout = Config.GEMINI_TIMEOUT
+    return gemini_breaker.call(_generate_with_timeout, model, contents, generation_config, timeout)
@@ -50,6 +50,64 @@ class Config:
     MAX_DOCUMENT_SIZE = 25 * 1024 * 1024  # 25MB for documents
     MAX_RESOURCE_SIZE = 50 * 1024 * 1024  # 50MB for resources
     
+    # Authenticated-user cache (per worker process)
+    USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", 60))  # seconds
+    USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 1024))  # max cached users
+    
+    # Local sentiment model micro-batching
+    SENTIMENT_BATCH_SIZE = int(os.getenv("SENTIMENT_BATCH_SIZE", 16))  # texts per forward pass
+    SENTIMENT_BATCH_WAIT_MS = int(os.getenv("SENTIMENT_BATCH_WAIT_MS", 10))  # max wait to fill a batch
+    
+    # Sentiment results memoized by content hash
+    SENTIMENT_CACHE_SIZE = int(os.getenv("SENTIMENT_CACHE_SIZE", 4096))  # in-memory entries per process
+    SENTIMENT_CACHE_TTL = int(os.getenv("SENTIMENT_CACHE_TTL", 86400))  # seconds in memory
+    SENTIMENT_CACHE_PERSIST = os.getenv("SENTIMENT_CACHE_PERSIST", "True").lower() == "true"  # share via Mongo
+    
+    # Background sentiment enrichment of posts
+    SENTIMENT_WORKERS = int(os.getenv("SENTIMENT_WORKERS", 2))  # worker threads per process
+    SENTIMENT_QUEUE_SIZE = int(os.getenv("SENTIMENT_QUEUE_SIZE", 1000))  # queued jobs before posts are left for the sweep
+    SENTIMENT_MAX_RETRIES = int(os.getenv("SENTIMENT_MAX_RETRIES", 3))  # retries per job
+    
+    # Outbound AI providers (see app/ai_clients.py)
+    AI_API_KEY = os.getenv("AI_API_KEY")  # Hugging Face Inference API
+    GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+    GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+    AI_CONNECT_TIMEOUT = float(os.getenv("AI_CONNECT_TIMEOUT", 3.05))  # seconds
+    AI_READ_TIMEOUT = float(os.getenv("AI_READ_TIMEOUT", 10))  # seconds
+    GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", 30))  # seconds per generation
+    AI_HTTP_POOL_SIZE = int(os.getenv("AI_HTTP_POOL_SIZE", 10))  # kept-alive connections per host
+    AI_BREAKER_THRESHOLD = int(os.getenv("AI_BREAKER_THRESHOLD", 3))  # consecutive failures before skipping a provider
+    AI_BREAKER_COOLDOWN = int(os.getenv("AI_BREAKER_COOLDOWN", 60))  # seconds a failing provider is skipped
+    
+    # Campus news/events read models (see app/read_models.py)
+    CAMPUS_READ_MODEL_TTL = int(os.getenv("CAMPUS_READ_MODEL_TTL", 60))  # max seconds before a snapshot is rebuilt
+    CAMPUS_LIST_MAX_LIMIT = 100  # largest accepted ?limit= on news/events lists
+    
+    # Typeahead prefix indexes (see app/typeahead.py)
+    TYPEAHEAD_REFRESH_INTERVAL = int(os.getenv("TYPEAHEAD_REFRESH_INTERVAL", 600))  # seconds between full rebuilds
+    
+    # Materialized home feed: off, all, college or department (see app/timeline.py)
+    FEED_TIMELINE_MODE = os.getenv("FEED_TIMELINE_MODE", "off").lower()
+    FEED_HOT_DECAY_SECONDS = int(os.getenv("FEED_HOT_DECAY_SECONDS", 45000))  # age worth 10x engagement in sort=hot
+    
+    # Live updates over /api/stream: auto, change_stream or local (see app/stream.py)
+    STREAM_SOURCE = os.getenv("STREAM_SOURCE", "auto").lower()
+    STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", 100))  # events buffered per client before it must resync
+    STREAM_HEARTBEAT = int(os.getenv("STREAM_HEARTBEAT", 15))  # seconds between keepalive comments
+    STREAM_MAX_SECONDS = int(os.getenv("STREAM_MAX_SECONDS", 300))  # connection lifetime before the client reconnects
+    STREAM_MAX_CONNECTIONS = int(os.getenv("STREAM_MAX_CONNECTIONS", 4))  # open streams per worker (a thread each; raise for gevent)
+    STREAM_TICKET_TTL = int(os.getenv("STREAM_TICKET_TTL", 60))  # seconds a stream ticket can be used to connect
+    STREAM_BASE_URL = os.getenv("STREAM_BASE_URL", "").rstrip("/")  # origin of the stream service; empty for this one
+    
+    # Grouped like notifications (see notify_grouped in app/notifications.py)
+    NOTIFICATION_COALESCE_WINDOW = int(os.getenv("NOTIFICATION_COALESCE_WINDOW", 3600))  # seconds of likes folded into one notification
+    NOTIFICATION_LATEST_ACTORS = 3  # most recent actors kept on a grouped notification
+    
+    # Write-behind buffer for view/download counters (see app/write_buffer.py)
+    WRITE_BUFFER_ENABLED = os.getenv("WRITE_BUFFER_ENABLED", "True").lower() == "true"
+    WRITE_BUFFER_MAX_BATCH = int(os.getenv("WRITE_BUFFER_MAX_BATCH", 100))  # documents with pending increments that trigger a flush
+    WRITE_BUFFER_FLUSH_INTERVAL = float(os.getenv("WRITE_BUFFER_FLUSH_INTERVAL", 1.0))  # max seconds a write waits
+    
     # Ensure upload directory exists
     os.makedirs(UPLOAD_FOLDER, exist_ok=True)
     
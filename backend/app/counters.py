@@ -0,0 +1,189 @@
+"""
+Denormalized counter maintenance for the CampusConnect API
+
+Posts carry ``like_count`` and ``comment_count`` and comments carry
+``like_count``. Request handlers keep them current with ``$inc`` on every
+like/unlike/comment/delete, so read paths never count; per-user unread
+notification counters are kept the same way by app/notifications.py. The
+reconciliation functions here recompute the counters from the source
+collections and repair any drift (e.g. from data written before counters
+were maintained).
+"""
+
+import logging
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from app.ranking import recompute_hot_scores
+
+logger = logging.getLogger(__name__)
+
+def _grouped_counts(collection, field):
+    """Count documents in ``collection`` grouped by ``field``"""
+    pipeline = [{'$group': {'_id': f'${field}', 'count': {'$sum': 1}}}]
+    return {row['_id']: row['count'] for row in collection.aggregate(pipeline)}
+
+def _repair(collection, expected, fields, batch_size=500):
+    """Rewrite counters on documents whose stored values differ from ``expected``
+
+    Args:
+        collection: The collection holding the counters
+        expected: dict mapping counter field to {document id string: count}
+        fields: Counter field names to check
+        batch_size: Number of updates per bulk_write
+
+    Returns:
+        Number of documents repaired
+    """
+    projection = {field: 1 for field in fields}
+    repaired = 0
+    operations = []
+
+    for doc in collection.find({}, projection):
+        doc_id = str(doc['_id'])
+        updates = {}
+        for field in fields:
+            actual = expected[field].get(doc_id, 0)
+            if doc.get(field) != actual:
+                updates[field] = actual
+        if updates:
+            operations.append(UpdateOne({'_id': ObjectId(doc_id)}, {'$set': updates}))
+
+        if len(operations) >= batch_size:
+            repaired += collection.bulk_write(operations, ordered=False).modified_count
+            operations = []
+
+    if operations:
+        repaired += collection.bulk_write(operations, ordered=False).modified_count
+    return repaired
+
+def reconcile_post_counters(db):
+    """Recompute like_count and comment_count on every post
+
+    Args:
+        db: The database instance
+
+    Returns:
+        Number of posts repaired
+    """
+    expected = {
+        'like_count': _grouped_counts(db.post_likes, 'post_id'),
+        'comment_count': _grouped_counts(db.comments, 'post_id')
+    }
+    repaired = _repair(db.posts, expected, ['like_count', 'comment_count'])
+    logger.info(f"Reconciled post counters: {repaired} posts repaired")
+    return repaired
+
+def reconcile_comment_counters(db):
+    """Recompute like_count on every comment
+
+    Args:
+        db: The database instance
+
+    Returns:
+        Number of comments repaired
+    """
+    expected = {'like_count': _grouped_counts(db.comment_likes, 'comment_id')}
+    repaired = _repair(db.comments, expected, ['like_count'])
+    logger.info(f"Reconciled comment counters: {repaired} comments repaired")
+    return repaired
+
+def reconcile_notification_counters(db):
+    """Recompute every user's unread notification counter
+
+    Args:
+        db: The database instance
+
+    Returns:
+        Number of counters repaired
+    """
+    pipeline = [
+        {'$match': {'is_read': False}},
+        {'$group': {'_id': '$user_id', 'count': {'$sum': 1}}}
+    ]
+    expected = {row['_id']: row['count'] for row in db.notifications.aggregate(pipeline)}
+
+    repaired = 0
+    for counter in db.notification_counters.find():
+        actual = expected.pop(counter['_id'], 0)
+        if counter.get('unread') != actual:
+            db.notification_counters.update_one({'_id': counter['_id']}, {'$set': {'unread': actual}})
+            repaired += 1
+    # Users with unread notifications but no counter document
+    for user_id, count in expected.items():
+        db.notification_counters.update_one({'_id': user_id}, {'$set': {'unread': count}}, upsert=True)
+        repaired += 1
+
+    logger.info(f"Reconciled notification counters: {repaired} counters repaired")
+    return repaired
+
+def _count_by(collection, match, field, session=None):
+    """Count documents matching ``match`` grouped by ``field``"""
+    pipeline = [
+        {'$match': match},
+        {'$group': {'_id': f'${field}', 'count': {'$sum': 1}}}
+    ]
+    return {row['_id']: row['count'] for row in collection.aggregate(pipeline, session=session)}
+
+def _decrement(collection, counts, field, session=None):
+    """Subtract per-document ``counts`` from ``field`` in one bulk write"""
+    operations = [
+        UpdateOne({'_id': ObjectId(doc_id)}, {'$inc': {field: -count}})
+        for doc_id, count in counts.items() if ObjectId.is_valid(doc_id)
+    ]
+    if operations:
+        collection.bulk_write(operations, ordered=False, session=session)
+
+def remove_user_engagement(db, user_id, session=None):
+    """Delete a user's comments and likes and take them off the counters they fed
+
+    Decrements ``comment_count``/``like_count`` on the posts and comments the
+    user engaged with, and removes the likes on the user's own comments along
+    with the comments.
+
+    Args:
+        db: The database instance
+        user_id: ID of the user being removed
+        session: Optional session, so this can run inside a transaction
+
+    Returns:
+        List of ID strings of the posts whose counters changed
+    """
+    user_id = str(user_id)
+    comment_ids = [
+        str(comment['_id'])
+        for comment in db.comments.find({'author_id': user_id}, {'_id': 1}, session=session)
+    ]
+
+    comments_per_post = _count_by(db.comments, {'author_id': user_id}, 'post_id', session)
+    likes_per_post = _count_by(db.post_likes, {'user_id': user_id}, 'post_id', session)
+    likes_per_comment = _count_by(db.comment_likes, {'user_id': user_id}, 'comment_id', session)
+    # The user's own comments are deleted outright, counters and all
+    for comment_id in comment_ids:
+        likes_per_comment.pop(comment_id, None)
+
+    _decrement(db.posts, comments_per_post, 'comment_count', session)
+    _decrement(db.posts, likes_per_post, 'like_count', session)
+    _decrement(db.comments, likes_per_comment, 'like_count', session)
+
+    db.comment_likes.delete_many(
+        {'$or': [{'user_id': user_id}, {'comment_id': {'$in': comment_ids}}]},
+        session=session
+    )
+    db.comments.delete_many({'author_id': user_id}, session=session)
+    db.post_likes.delete_many({'user_id': user_id}, session=session)
+    return list(set(comments_per_post) | set(likes_per_post))
+
+def reconcile_all(db):
+    """Run every counter reconciliation, then refresh hot scores from the repaired counters
+
+    Returns:
+        dict with the number of repaired documents per collection
+    """
+    result = {
+        'posts': reconcile_post_counters(db),
+        'comments': reconcile_comment_counters(db),
+        'notification_counters': reconcile_notification_counters(db)
+    }
+    result['hot_scores'] = recompute_hot_scores(db)
+    return result
@@ -1,9 +1,13 @@
 from flask_pymongo import PyMongo
-from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
+from pymongo import ASCENDING, DESCENDING, TEXT, ReturnDocument
+from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError, OperationFailure
 from bson import ObjectId
 from gridfs import GridFS
+import hashlib
 import logging
 import os
+import tempfile
+from io import BytesIO
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -14,6 +18,107 @@ mongo = PyMongo()
 # Initialize GridFS instance (will be set in init_db)
 fs = None
 
+# Bump INDEX_VERSION whenever REQUIRED_INDEXES changes so deployments record
+# which index set they were provisioned with
+INDEX_VERSION = 12
+
+# Indexes ensured at startup, per collection: (keys, options)
+REQUIRED_INDEXES = {
+    'users': [
+        ([('email', ASCENDING)], {'unique': True}),
+        ([('username', ASCENDING)], {'unique': True}),
+        ([('name', TEXT), ('username', TEXT), ('department', TEXT), ('college', TEXT), ('skills', TEXT)],
+         {'weights': {'name': 10, 'username': 10, 'skills': 3, 'department': 2, 'college': 2}, 'name': 'search_text'}),
+    ],
+    'posts': [
+        ([('created_at', DESCENDING), ('_id', DESCENDING)], {}),
+        ([('author_id', ASCENDING), ('created_at', DESCENDING)], {}),
+        ([('moderation_status', ASCENDING), ('created_at', DESCENDING)], {}),
+        ([('sentiment', ASCENDING), ('created_at', ASCENDING)], {}),
+        ([('hot_score', DESCENDING), ('_id', DESCENDING)], {}),
+        ([('title', TEXT), ('content', TEXT), ('tags', TEXT)],
+         {'weights': {'title': 10, 'tags': 5, 'content': 1}, 'name': 'search_text'}),
+    ],
+    'comments': [
+        ([('post_id', ASCENDING), ('created_at', ASCENDING)], {}),
+        ([('author_id', ASCENDING)], {}),
+    ],
+    'post_likes': [
+        # Unique so a like can never be recorded twice (see app/likes.py)
+        ([('post_id', ASCENDING), ('user_id', ASCENDING)], {'unique': True}),
+        ([('user_id', ASCENDING)], {}),
+    ],
+    'comment_likes': [
+        ([('comment_id', ASCENDING), ('user_id', ASCENDING)], {'unique': True}),
+    ],
+    'notifications': [
+        ([('user_id', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)], {}),
+        ([('user_id', ASCENDING), ('is_read', ASCENDING)], {}),
+        # At most one open grouped notification per target and window
+        ([('user_id', ASCENDING), ('group_key', ASCENDING), ('group_window', ASCENDING)],
+         {'unique': True, 'partialFilterExpression': {'is_read': False, 'group_key': {'$exists': True}}}),
+    ],
+    'resources': [
+        ([('created_at', DESCENDING), ('_id', DESCENDING)], {}),
+        ([('uploader_id', ASCENDING)], {}),
+        ([('title', TEXT), ('description', TEXT), ('tags', TEXT)],
+         {'weights': {'title': 10, 'tags': 5, 'description': 1}, 'name': 'search_text'}),
+    ],
+    'resource_votes': [
+        ([('resource_id', ASCENDING), ('user_id', ASCENDING)], {}),
+    ],
+    'resource_likes': [
+        ([('resource_id', ASCENDING), ('user_id', ASCENDING)], {}),
+    ],
+    'opportunities': [
+        ([('is_active', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)], {}),
+        ([('poster_id', ASCENDING)], {}),
+        ([('title', TEXT), ('description', TEXT), ('company', TEXT), ('location', TEXT), ('skills_required', TEXT)],
+         {'weights': {'title': 10, 'skills_required': 5, 'company': 5, 'location': 2, 'description': 1}, 'name': 'search_text'}),
+    ],
+    'applications': [
+        ([('opportunity_id', ASCENDING), ('applicant_id', ASCENDING)], {'unique': True}),
+    ],
+    'verification_requests': [
+        ([('opportunity_id', ASCENDING)], {}),
+    ],
+    'study_groups': [
+        ([('created_at', DESCENDING), ('_id', DESCENDING)], {}),
+        ([('creator_id', ASCENDING)], {}),
+        ([('name', TEXT), ('description', TEXT), ('subject', TEXT)],
+         {'weights': {'name': 10, 'subject': 5, 'description': 1}, 'name': 'search_text'}),
+    ],
+    'group_members': [
+        ([('group_id', ASCENDING), ('user_id', ASCENDING)], {}),
+    ],
+    'group_discussions': [
+        ([('group_id', ASCENDING), ('created_at', DESCENDING)], {}),
+    ],
+    'campus_news': [
+        ([('date', DESCENDING)], {}),
+    ],
+    'campus_events': [
+        ([('date', DESCENDING)], {}),
+    ],
+    'notes': [
+        ([('title', TEXT), ('content', TEXT)], {}),
+    ],
+    'fs.files': [
+        ([('metadata.sha256', ASCENDING)], {}),
+    ],
+    'image_renditions': [
+        ([('image_id', ASCENDING)], {}),
+    ],
+    'timeline': [
+        ([('bucket', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)], {}),
+        ([('author_id', ASCENDING)], {}),
+    ],
+    'sentiment_cache': [
+        # Persisted sentiment results expire after 30 days
+        ([('created_at', ASCENDING)], {'expireAfterSeconds': 30 * 24 * 3600}),
+    ],
+}
+
 def init_db(app):
     """Initialize the database connection
     
@@ -62,6 +167,9 @@ def init_db(app):
                 db.create_collection(collection)
                 logger.info(f"Created collection: {collection}")
         
+        # Make sure every hot query path is backed by an index
+        ensure_indexes(db)
+        
         return db
     except ConnectionFailure as e:
         logger.error(f"MongoDB connection failed: {e}")
@@ -73,6 +181,94 @@ def init_db(app):
         logger.error(f"Unexpected error connecting to MongoDB: {e}")
         raise
 
+def _index_signature(keys, unique=False):
+    """Normalize an index key spec so equivalent indexes compare equal
+
+    Uniqueness is part of the signature, so a plain index where a unique one
+    is required is reported rather than silently accepted.
+    """
+    keys = list(keys)
+    # Text indexes are reported as _fts/_ftsx, so compare them by field set
+    if any(direction == TEXT for _, direction in keys):
+        return ('text',) + tuple(sorted(field for field, _ in keys))
+    signature = tuple((field, int(direction)) for field, direction in keys)
+    return signature + (('unique',) if unique else ())
+
+def _existing_signature(info):
+    """Signature for an entry returned by index_information()"""
+    if 'weights' in info:
+        return ('text',) + tuple(sorted(info['weights']))
+    return _index_signature(info['key'], info.get('unique', False))
+
+def ensure_indexes(db):
+    """Ensure REQUIRED_INDEXES exist on every collection
+
+    Idempotent: indexes that already exist are left alone. Indexes present in
+    the database but not declared here are reported, never dropped.
+
+    Args:
+        db: The database instance
+
+    Returns:
+        dict with 'version', 'created', 'missing' (failed to create) and
+        'extra' lists of "collection.index" descriptions
+    """
+    report = {'version': INDEX_VERSION, 'created': [], 'missing': [], 'extra': []}
+    
+    for collection_name, indexes in REQUIRED_INDEXES.items():
+        collection = db[collection_name]
+        try:
+            existing = collection.index_information()
+        except OperationFailure:
+            existing = {}
+        
+        existing_signatures = {
+            _existing_signature(info): name
+            for name, info in existing.items() if name != '_id_'
+        }
+        required_signatures = set()
+        
+        for keys, options in indexes:
+            signature = _index_signature(keys, options.get('unique', False))
+            required_signatures.add(signature)
+            if signature in existing_signatures:
+                continue
+            
+            try:
+                name = collection.create_index(keys, **options)
+                report['created'].append(f"{collection_name}.{name}")
+                logger.info(f"Created index {name} on {collection_name}")
+            except Exception as e:
+                report['missing'].append(f"{collection_name}.{keys}")
+                logger.error(f"Failed to create index {keys} on {collection_name}: {str(e)}")
+        
+        for signature, name in existing_signatures.items():
+            if signature not in required_signatures:
+                report['extra'].append(f"{collection_name}.{name}")
+    
+    try:
+        previous = db.schema_meta.find_one({'_id': 'indexes'}) or {}
+        if previous.get('version') != INDEX_VERSION:
+            logger.info(f"Index set upgraded from version {previous.get('version')} to {INDEX_VERSION}")
+        db.schema_meta.update_one(
+            {'_id': 'indexes'},
+            {'$set': {'version': INDEX_VERSION}},
+            upsert=True
+        )
+    except Exception as e:
+        logger.warning(f"Could not record index version: {str(e)}")
+    
+    logger.info(
+        f"Index check (v{INDEX_VERSION}): {len(report['created'])} created, "
+        f"{len(report['missing'])} missing, {len(report['extra'])} extra"
+    )
+    if report['missing']:
+        logger.warning(f"Missing indexes: {', '.join(report['missing'])}")
+    if report['extra']:
+        logger.info(f"Undeclared indexes: {', '.join(report['extra'])}")
+    
+    return report
+
 def get_db():
     """Get the database instance
     
@@ -123,9 +319,30 @@ def get_gridfs():
         fs = GridFS(get_db())
     return fs
 
+def content_sha256(data):
+    """SHA-256 hex digest used to deduplicate stored media"""
+    return hashlib.sha256(data).hexdigest()
+
+def _add_gridfs_reference(sha256):
+    """Take another reference on the live GridFS file holding this content
+
+    Returns:
+        The existing file ID, or None if no live copy is stored
+    """
+    existing = get_db().fs.files.find_one_and_update(
+        {'metadata.sha256': sha256, 'metadata.refcount': {'$gt': 0}},
+        {'$inc': {'metadata.refcount': 1}},
+        projection={'_id': 1}
+    )
+    return existing['_id'] if existing else None
+
 def save_file_to_gridfs(file_data, filename, content_type):
     """Save a file to GridFS
     
+    Files are content-addressed: if identical bytes are already stored, the
+    existing file gains a reference and its ID is returned instead of
+    writing a second copy.
+    
     Args:
         file_data: The binary data of the file
         filename: The name of the file
@@ -135,14 +352,97 @@ def save_file_to_gridfs(file_data, filename, content_type):
         The GridFS file ID
     """
     try:
+        sha256 = content_sha256(file_data)
+        existing_id = _add_gridfs_reference(sha256)
+        if existing_id:
+            logger.info(f"Reusing identical GridFS file {existing_id} for {filename}")
+            return existing_id
+        
         fs = get_gridfs()
-        file_id = fs.put(file_data, filename=filename, content_type=content_type)
+        file_id = fs.put(
+            file_data,
+            filename=filename,
+            content_type=content_type,
+            metadata={'sha256': sha256, 'refcount': 1}
+        )
         logger.info(f"File saved to GridFS with ID: {file_id}")
         return file_id
     except Exception as e:
         logger.error(f"Error saving file to GridFS: {str(e)}")
         raise
 
+class FileTooLargeError(ValueError):
+    """Raised when an upload stream exceeds its size limit"""
+
+# Bytes read from an upload per write; matches the default GridFS chunk size
+UPLOAD_CHUNK_SIZE = 255 * 1024
+# Uploads up to this size are spooled in memory before hashing, larger ones on disk
+UPLOAD_SPOOL_SIZE = 1024 * 1024
+
+def save_stream_to_gridfs(stream, filename, content_type, max_size=None):
+    """Stream a file-like object into GridFS without buffering it in memory
+    
+    The upload is first copied chunk by chunk into a spool file (in memory
+    up to UPLOAD_SPOOL_SIZE, on disk beyond) while its size is counted and
+    its SHA-256 computed. Exceeding ``max_size`` aborts before anything is
+    written to GridFS. If identical content is already stored, the existing
+    file gains a reference (see save_file_to_gridfs) and nothing is written;
+    otherwise the spool is copied into a new GridFS file.
+    
+    Args:
+        stream: Readable binary file-like object (e.g. FileStorage.stream)
+        filename: The name of the file
+        content_type: The MIME type of the file
+        max_size: Maximum size in bytes, or None for no limit
+        
+    Returns:
+        Tuple of (GridFS file ID, size in bytes)
+        
+    Raises:
+        FileTooLargeError: If the stream is larger than ``max_size``
+    """
+    sha256 = hashlib.sha256()
+    size = 0
+    
+    with tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_SIZE) as spool:
+        while True:
+            chunk = stream.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if max_size is not None and size > max_size:
+                raise FileTooLargeError(f"{filename} is larger than {max_size} bytes")
+            sha256.update(chunk)
+            spool.write(chunk)
+        
+        digest = sha256.hexdigest()
+        existing_id = _add_gridfs_reference(digest)
+        if existing_id:
+            logger.info(f"Reusing identical GridFS file {existing_id} for {filename}")
+            return existing_id, size
+        
+        fs = get_gridfs()
+        grid_in = fs.new_file(
+            filename=filename,
+            content_type=content_type,
+            metadata={'sha256': digest, 'refcount': 1}
+        )
+        spool.seek(0)
+        try:
+            while True:
+                chunk = spool.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                grid_in.write(chunk)
+            grid_in.close()
+        except Exception:
+            if not grid_in.closed:
+                grid_in.abort()
+            raise
+    
+    logger.info(f"File streamed to GridFS with ID: {grid_in._id} ({size} bytes)")
+    return grid_in._id, size
+
 def get_file_from_gridfs(file_id):
     """Get a file from GridFS by ID
     
@@ -179,7 +479,12 @@ def get_file_from_gridfs(file_id):
         return None
 
 def save_binary_image(image_data, filename, content_type):
-    """Save an image as binary data directly in MongoDB
+    """Save an image to the media store
+    
+    Images live in GridFS like every other upload (deduplicated, chunked,
+    streamable) but are still served from /api/files/image/<id>. The
+    binary_images collection only holds documents written before this change;
+    migrate them with migrate_binary_images.py.
     
     Args:
         image_data: The binary data of the image
@@ -187,24 +492,18 @@ def save_binary_image(image_data, filename, content_type):
         content_type: The MIME type of the image
         
     Returns:
-        The image document ID
+        The image ID
     """
     try:
-        db = get_db()
-        image_doc = {
-            'data': image_data,
-            'filename': filename,
-            'content_type': content_type
-        }
-        result = db.binary_images.insert_one(image_doc)
-        logger.info(f"Image saved to binary_images with ID: {result.inserted_id}")
-        return result.inserted_id
+        image_id = save_file_to_gridfs(image_data, filename, content_type)
+        logger.info(f"Image saved to media store with ID: {image_id}")
+        return image_id
     except Exception as e:
         logger.error(f"Error saving binary image: {str(e)}")
         raise
 
 def get_binary_image(image_id):
-    """Get a binary image from MongoDB by ID
+    """Get a legacy binary image document from MongoDB by ID
     
     Args:
         image_id: The image document ID
@@ -219,9 +518,106 @@ def get_binary_image(image_id):
         logger.error(f"Error retrieving binary image: {str(e)}")
         raise
 
+class LegacyMediaFile(BytesIO):
+    """Read-only file over a not yet migrated binary_images document
+    
+    Mirrors the GridOut attributes the file routes use, so callers of
+    open_media need not care where the media is stored.
+    """
+    
+    def __init__(self, image_doc):
+        super().__init__(image_doc['data'])
+        self._id = image_doc['_id']
+        self.filename = image_doc.get('filename')
+        self.content_type = image_doc.get('content_type')
+        self.length = len(image_doc['data'])
+        self.upload_date = None
+
+def open_media(media_id):
+    """Open stored media by ID, wherever it is stored
+    
+    Looks in GridFS first and falls back to legacy binary_images documents.
+    
+    Args:
+        media_id: The media ID (string or ObjectId)
+        
+    Returns:
+        A GridOut (or GridOut-like LegacyMediaFile), or None if not found
+    """
+    media = get_file_from_gridfs(media_id)
+    if media:
+        return media
+    
+    if isinstance(media_id, str):
+        try:
+            media_id = ObjectId(media_id)
+        except Exception:
+            return None
+    image_doc = get_binary_image(media_id)
+    return LegacyMediaFile(image_doc) if image_doc else None
+
+def migrate_binary_images(db, limit=None):
+    """Move legacy binary_images documents into GridFS
+    
+    Each image is written to GridFS under its existing _id, so
+    /api/files/image/<id> URLs keep working, and the document is removed
+    once the copy is stored. Safe to re-run: images already in GridFS are
+    only removed from binary_images.
+    
+    Args:
+        db: The database instance
+        limit: Maximum number of images to migrate in this run
+        
+    Returns:
+        Number of images migrated
+    """
+    fs = GridFS(db)
+    migrated = 0
+    
+    # Fetch one document at a time; each can hold up to 16 MB of image data
+    for image_id in db.binary_images.distinct('_id'):
+        if limit is not None and migrated >= limit:
+            break
+        
+        image_doc = db.binary_images.find_one({'_id': image_id})
+        if not image_doc:
+            continue
+        
+        if not fs.exists(image_id):
+            data = image_doc['data']
+            fs.put(
+                data,
+                _id=image_id,
+                filename=image_doc.get('filename'),
+                content_type=image_doc.get('content_type'),
+                metadata={
+                    'sha256': image_doc.get('sha256') or content_sha256(data),
+                    'refcount': image_doc.get('refcount', 1)
+                }
+            )
+        
+        db.binary_images.delete_one({'_id': image_id})
+        migrated += 1
+        logger.info(f"Migrated binary image {image_id} to GridFS")
+    
+    return migrated
+
+def _delete_renditions(image_id):
+    """Remove the cached renditions of an image (see app/images.py)"""
+    fs = get_gridfs()
+    renditions = get_db().image_renditions
+    for rendition in renditions.find({'image_id': image_id}, {'file_id': 1}):
+        if rendition.get('file_id'):
+            fs.delete(rendition['file_id'])
+    renditions.delete_many({'image_id': image_id})
+
 def delete_file_from_gridfs(file_id):
     """Delete a file from GridFS by ID
     
+    Drops one reference to the file; the stored data, and any image
+    renditions generated from it, are only removed once no references
+    remain.
+    
     Args:
         file_id: The GridFS file ID (string or ObjectId)
         
@@ -244,13 +640,25 @@ def delete_file_from_gridfs(file_id):
                 logger.error(f"Invalid ObjectId format for file_id: {file_id}, Error: {str(e)}")
                 return False
                 
-        # Check if file exists in GridFS
-        if not fs.exists(file_id):
+        # Drop one reference (files stored before deduplication count as one)
+        file_doc = get_db().fs.files.find_one_and_update(
+            {'_id': file_id},
+            {'$inc': {'metadata.refcount': -1}},
+            projection={'metadata.refcount': 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if not file_doc:
             logger.warning(f"File with ID {file_id} does not exist in GridFS")
             return False
+        
+        remaining = file_doc['metadata']['refcount']
+        if remaining > 0:
+            logger.info(f"Released GridFS file {file_id}, {remaining} references remain")
+            return True
             
-        # Delete the file
+        # Last reference gone; refcount 0 keeps uploads from reusing it meanwhile
         fs.delete(file_id)
+        _delete_renditions(file_id)
         logger.info(f"File deleted from GridFS with ID: {file_id}")
         return True
         
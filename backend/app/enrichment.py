@@ -0,0 +1,213 @@
+"""
+Background sentiment enrichment for posts
+
+Post writes store ``sentiment: 'pending'`` and hand the content to
+``sentiment_enricher``, a small pool of worker threads that runs the
+(potentially slow) sentiment analysis and fills in ``sentiment``,
+``sentiment_score``, ``emotional_intensity`` and ``detected_emotions``.
+
+The job queue is bounded. When it is full ``submit`` returns False instead of
+blocking the request and the post stays pending; idle workers periodically
+sweep the posts collection for pending posts nobody is working on, so
+overflowed jobs and jobs lost to a restart are picked up eventually. The
+workers are started, and a first sweep run, when the app is created. A post
+whose analysis keeps failing is marked Neutral once its retries are spent,
+so sweeps do not pick it up again forever.
+"""
+
+import logging
+import queue
+import threading
+import time
+from bson import ObjectId
+
+from app.config import Config
+from app.sentiment import analyze_post_sentiment
+from app.ranking import refresh_hot_score
+
+logger = logging.getLogger(__name__)
+
+# Value stored in ``sentiment`` until a worker has analyzed the content
+PENDING_SENTIMENT = 'pending'
+
+# Stored when analysis gives up on a post; the null score marks it as a fallback
+FALLBACK_SENTIMENT_FIELDS = {
+    'sentiment': 'Neutral',
+    'sentiment_score': None,
+    'emotional_intensity': None,
+    'detected_emotions': []
+}
+
+def sentiment_fields(sentiment_result):
+    """Map an ``analyze_post_sentiment`` result to the stored post fields"""
+    return {
+        'sentiment': sentiment_result['sentiment'],
+        'sentiment_score': sentiment_result['score'],
+        'emotional_intensity': sentiment_result['emotionalIntensity'],
+        'detected_emotions': sentiment_result['detectedEmotions']
+    }
+
+class SentimentEnricher:
+    """Bounded worker pool that analyzes post sentiment off the request path
+
+    Args:
+        workers: Number of worker threads
+        max_queue: Maximum number of queued jobs before ``submit`` refuses work
+        max_retries: Attempts per job after the first one fails
+        retry_delay: Base delay in seconds, doubled on every retry
+        sweep_interval: Idle seconds between sweeps for orphaned pending posts
+    """
+
+    def __init__(self, workers=2, max_queue=1000, max_retries=3, retry_delay=2.0, sweep_interval=60):
+        self.workers = workers
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.sweep_interval = sweep_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._threads = []
+        self._lock = threading.Lock()
+        # post_id -> number of queued or running jobs, so sweeps skip them
+        self._tracked = {}
+        self._db = None
+        self._last_sweep = time.monotonic()
+
+    def submit(self, db, post_id, content):
+        """Queue sentiment analysis for a post without blocking
+
+        Args:
+            db: The database instance
+            post_id: ID string of the post
+            content: The post content the sentiment should describe
+
+        Returns:
+            True if the job was queued, False if the queue is full
+        """
+        self._ensure_workers(db)
+        if not self._enqueue((post_id, content, 0)):
+            logger.warning(f"Sentiment queue full, post {post_id} left pending")
+            return False
+        return True
+
+    def start(self, db):
+        """Start the workers and queue posts left pending by a previous run"""
+        self._ensure_workers(db)
+        self._sweep()
+
+    def _ensure_workers(self, db):
+        with self._lock:
+            self._db = db
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(
+                    target=self._run,
+                    name=f'sentiment-enricher-{len(self._threads)}',
+                    daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def _enqueue(self, job):
+        post_id = job[0]
+        with self._lock:
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                return False
+            self._tracked[post_id] = self._tracked.get(post_id, 0) + 1
+        return True
+
+    def _release(self, post_id):
+        with self._lock:
+            remaining = self._tracked.get(post_id, 0) - 1
+            if remaining > 0:
+                self._tracked[post_id] = remaining
+            else:
+                self._tracked.pop(post_id, None)
+
+    def _run(self):
+        while True:
+            try:
+                job = self._queue.get(timeout=self.sweep_interval)
+            except queue.Empty:
+                self._sweep()
+                continue
+
+            post_id, content, attempt = job
+            try:
+                self._process(post_id, content)
+            except Exception as e:
+                self._retry(job, e)
+            finally:
+                self._release(post_id)
+                self._queue.task_done()
+
+            if time.monotonic() - self._last_sweep > self.sweep_interval and self._queue.empty():
+                self._sweep()
+
+    def _process(self, post_id, content):
+        fields = sentiment_fields(analyze_post_sentiment(content))
+        # Only write if the post still holds the content we analyzed; a newer
+        # edit will have queued its own job
+        result = self._db.posts.update_one(
+            {'_id': ObjectId(post_id), 'content': content, 'sentiment': PENDING_SENTIMENT},
+            {'$set': fields}
+        )
+        if result.modified_count:
+            refresh_hot_score(self._db, post_id)
+        logger.info(f"Sentiment enriched for post {post_id}: {fields['sentiment']}")
+
+    def _retry(self, job, error):
+        post_id, content, attempt = job
+        if attempt >= self.max_retries:
+            logger.error(f"Giving up on sentiment for post {post_id} after {attempt + 1} attempts: {str(error)}")
+            self._give_up(post_id, content)
+            return
+
+        delay = self.retry_delay * (2 ** attempt)
+        logger.warning(f"Sentiment for post {post_id} failed, retrying in {delay}s: {str(error)}")
+        timer = threading.Timer(delay, self._requeue, args=((post_id, content, attempt + 1),))
+        timer.daemon = True
+        timer.start()
+
+    def _give_up(self, post_id, content):
+        """Leave the pending state so sweeps stop retrying the post"""
+        try:
+            self._db.posts.update_one(
+                {'_id': ObjectId(post_id), 'content': content, 'sentiment': PENDING_SENTIMENT},
+                {'$set': FALLBACK_SENTIMENT_FIELDS}
+            )
+        except Exception as e:
+            logger.error(f"Error storing fallback sentiment for post {post_id}: {str(e)}")
+
+    def _requeue(self, job):
+        if not self._enqueue(job):
+            logger.warning(f"Sentiment queue full, retry for post {job[0]} deferred to sweep")
+
+    def _sweep(self, limit=100):
+        """Queue pending posts that have no job, e.g. after overflow or a restart"""
+        self._last_sweep = time.monotonic()
+        if self._db is None:
+            return
+
+        try:
+            pending = self._db.posts.find(
+                {'sentiment': PENDING_SENTIMENT},
+                {'content': 1}
+            ).sort('created_at', 1).limit(limit)
+
+            for post in pending:
+                post_id = str(post['_id'])
+                with self._lock:
+                    if post_id in self._tracked:
+                        continue
+                if not self._enqueue((post_id, post.get('content', ''), 0)):
+                    break
+        except Exception as e:
+            logger.error(f"Error sweeping pending sentiment: {str(e)}")
+
+# Shared worker pool for the whole process
+sentiment_enricher = SentimentEnricher(
+    workers=Config.SENTIMENT_WORKERS,
+    max_queue=Config.SENTIMENT_QUEUE_SIZE,
+    max_retries=Config.SENTIMENT_MAX_RETRIES
+)
@@ -0,0 +1,157 @@
+"""
+Feed hydration helpers for the CampusConnect API
+
+Resolves authors and the viewer's like flags for a whole page of posts or
+comments in a constant number of queries instead of one round trip per item.
+"""
+
+import logging
+from bson import ObjectId
+
+logger = logging.getLogger(__name__)
+
+# Fields never returned when looking up authors
+AUTHOR_PROJECTION = {'password_hash': 0, 'verification': 0, 'notifications': 0}
+
+def unknown_author(author_id):
+    """Placeholder author used when the user document cannot be found"""
+    return {
+        'id': author_id,
+        'username': 'Unknown',
+        'name': 'Unknown User',
+        'profile_picture': None
+    }
+
+def anonymous_author():
+    """Author shown for comments posted anonymously"""
+    return {
+        'id': None,
+        'username': 'Anonymous',
+        'name': 'Anonymous User',
+        'profile_picture': None
+    }
+
+def load_authors(db, user_ids):
+    """Fetch author summaries for a set of user IDs in a single query
+
+    Args:
+        db: The database instance
+        user_ids: Iterable of user ID strings
+
+    Returns:
+        dict mapping user ID string to an author summary
+    """
+    object_ids = []
+    for user_id in set(user_ids):
+        try:
+            object_ids.append(ObjectId(user_id))
+        except Exception:
+            logger.warning(f"Skipping invalid author id: {user_id}")
+
+    if not object_ids:
+        return {}
+
+    authors = {}
+    for user in db.users.find({'_id': {'$in': object_ids}}, AUTHOR_PROJECTION):
+        authors[str(user['_id'])] = {
+            'id': str(user['_id']),
+            'username': user.get('username'),
+            'name': user.get('name', user.get('username')),
+            'profile_picture': user.get('profile_picture')
+        }
+    return authors
+
+def liked_by(collection, field, values, user_id):
+    """Return the subset of ``values`` the user has liked, in one query"""
+    cursor = collection.find(
+        {field: {'$in': list(values)}, 'user_id': user_id},
+        {field: 1, '_id': 0}
+    )
+    return {doc[field] for doc in cursor}
+
+def hydrate_posts(db, posts, viewer_id):
+    """Attach author, comment_count, like_count and is_liked to a page of posts
+
+    Issues two queries regardless of page size: one ``$in`` lookup on users
+    and one lookup of the viewer's likes. Like and comment counts come from
+    the counters maintained on each post (see app/counters.py).
+
+    Args:
+        db: The database instance
+        posts: List of post documents with string ``_id`` values
+        viewer_id: ID string of the requesting user
+
+    Returns:
+        The same list, hydrated in place
+    """
+    if not posts:
+        return posts
+
+    post_ids = [post['_id'] for post in posts]
+
+    try:
+        authors = load_authors(db, [post['author_id'] for post in posts])
+    except Exception as author_error:
+        logger.error(f"Error getting author details: {str(author_error)}")
+        authors = {}
+
+    try:
+        liked = liked_by(db.post_likes, 'post_id', post_ids, viewer_id)
+    except Exception as like_error:
+        logger.warning(f"Error checking if posts are liked: {str(like_error)}")
+        liked = set()
+
+    for post in posts:
+        author = authors.get(post['author_id'])
+        if not author:
+            logger.warning(f"Author not found for post {post['_id']}")
+            author = unknown_author(post['author_id'])
+        post['author'] = author
+        post['comment_count'] = post.get('comment_count', 0)
+        post['like_count'] = post.get('like_count', 0)
+        post['is_liked'] = post['_id'] in liked
+
+    return posts
+
+def hydrate_comments(db, comments, viewer_id):
+    """Attach author, like_count and is_liked to a list of comments
+
+    Issues two queries regardless of the number of comments, like
+    ``hydrate_posts``. Anonymous comments get a placeholder author.
+
+    Args:
+        db: The database instance
+        comments: List of comment documents with string ``_id`` values
+        viewer_id: ID string of the requesting user
+
+    Returns:
+        The same list, hydrated in place
+    """
+    if not comments:
+        return comments
+
+    comment_ids = [comment['_id'] for comment in comments]
+
+    try:
+        authors = load_authors(db, [
+            comment['author_id'] for comment in comments if not comment.get('is_anonymous', False)
+        ])
+    except Exception as author_error:
+        logger.error(f"Error getting comment author details: {str(author_error)}")
+        authors = {}
+
+    try:
+        liked = liked_by(db.comment_likes, 'comment_id', comment_ids, viewer_id)
+    except Exception as like_error:
+        logger.warning(f"Error checking if comments are liked: {str(like_error)}")
+        liked = set()
+
+    for comment in comments:
+        if comment.get('is_anonymous', False):
+            comment['author'] = anonymous_author()
+        else:
+            comment['author'] = authors.get(comment['author_id']) or unknown_author(comment['author_id'])
+        comment['like_count'] = comment.get('like_count', 0)
+        comment['is_liked'] = comment['_id'] in liked
+
+    return comments
@@ -0,0 +1,173 @@
+"""
+Image renditions for the CampusConnect API
+
+Uploaded images are stored at full size. Smaller renditions (avatar,
+feed-card, full) are generated lazily the first time a size is requested
+from ``/api/files/image/<id>?w=...`` and cached: the encoded bytes are
+stored in GridFS and an ``image_renditions`` document maps
+``<image id>:<width>:<format>`` to that file, so later requests are one small
+lookup and the bytes are streamed like any other upload. Renditions are
+removed with their original (see delete_file_from_gridfs).
+
+Pillow is optional: without it ``render`` raises ImportError and callers
+serve the original image.
+"""
+
+import logging
+from datetime import datetime
+from io import BytesIO
+from pymongo.errors import DuplicateKeyError
+
+from app.db import get_gridfs
+
+logger = logging.getLogger(__name__)
+
+# Named rendition widths in pixels; requested widths snap to the nearest one
+RENDITION_WIDTHS = {
+    'avatar': 96,
+    'feed': 640,
+    'full': 1600,
+}
+
+RENDITION_FORMATS = {
+    'webp': 'image/webp',
+    'jpeg': 'image/jpeg',
+}
+
+# Content types that are not re-encoded (animation would be lost)
+PASSTHROUGH_TYPES = {'image/gif', 'image/svg+xml'}
+
+def pick_width(requested):
+    """Snap a requested width (pixels or rendition name) to a rendition width
+
+    Returns:
+        The rendition width, or None if ``requested`` is not valid
+    """
+    if requested in RENDITION_WIDTHS:
+        return RENDITION_WIDTHS[requested]
+    try:
+        width = int(requested)
+    except (TypeError, ValueError):
+        return None
+    if width <= 0:
+        return None
+    # Smallest rendition at least as wide as requested, else the largest
+    for rendition_width in sorted(RENDITION_WIDTHS.values()):
+        if rendition_width >= width:
+            return rendition_width
+    return max(RENDITION_WIDTHS.values())
+
+def pick_format(requested, accept_header=None):
+    """Choose the output format from ``?format=`` or the Accept header"""
+    if requested in RENDITION_FORMATS:
+        return requested
+    if accept_header and 'image/webp' in accept_header:
+        return 'webp'
+    return 'jpeg'
+
+def render(data, width, fmt):
+    """Resize image bytes to at most ``width`` pixels wide and encode as ``fmt``
+
+    Raises:
+        ImportError: If Pillow is not installed
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(BytesIO(data)) as image:
+        # Apply EXIF orientation before resizing so phone photos stay upright
+        image = ImageOps.exif_transpose(image)
+        if image.width > width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.LANCZOS)
+
+        if fmt == 'jpeg' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        elif fmt == 'webp' and image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+
+        output = BytesIO()
+        image.save(output, format=fmt.upper(), quality=80, optimize=True)
+        return output.getvalue()
+
+def _open_rendition(fs, file_id):
+    try:
+        return fs.get(file_id)
+    except Exception:
+        return None
+
+def get_rendition(db, image_id, content_type, read_original, width, fmt):
+    """Return the cached rendition of an image, generating it on first use
+
+    Args:
+        db: The database instance
+        image_id: ObjectId of the original image
+        content_type: Content type of the original image
+        read_original: Callable returning the original image bytes; only
+            called when the rendition is not cached yet
+        width: A value returned by pick_width
+        fmt: A key of RENDITION_FORMATS
+
+    Returns:
+        A GridOut for the rendition, or None if the original should be
+        served instead (Pillow missing, unsupported or broken image)
+    """
+    if content_type in PASSTHROUGH_TYPES:
+        return None
+
+    fs = get_gridfs()
+    rendition_id = f"{image_id}:{width}:{fmt}"
+    cached = db.image_renditions.find_one({'_id': rendition_id}, {'file_id': 1})
+    cached_file_id = cached.get('file_id') if cached else None
+    if cached_file_id:
+        rendition = _open_rendition(fs, cached_file_id)
+        if rendition:
+            return rendition
+
+    try:
+        data = render(read_original(), width, fmt)
+    except ImportError:
+        logger.warning("Pillow is not installed, serving original images")
+        return None
+    except Exception as e:
+        logger.error(f"Error rendering image {image_id} at {width}px: {str(e)}")
+        return None
+
+    file_id = fs.put(
+        data,
+        filename=f"{rendition_id}.{fmt}",
+        content_type=RENDITION_FORMATS[fmt],
+        metadata={'rendition_of': image_id}
+    )
+    try:
+        # Only replaces what was read above (nothing, a legacy inline-data
+        # document or a dangling file id); a concurrent render that stored
+        # its copy first wins
+        db.image_renditions.update_one(
+            {'_id': rendition_id, 'file_id': cached_file_id},
+            {
+                '$set': {
+                    'image_id': image_id,
+                    'width': width,
+                    'format': fmt,
+                    'file_id': file_id,
+                    'content_type': RENDITION_FORMATS[fmt],
+                    'created_at': datetime.utcnow()
+                },
+                '$unset': {'data': ''}
+            },
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # Another request cached this rendition first; use its copy
+        fs.delete(file_id)
+        winner = db.image_renditions.find_one({'_id': rendition_id}, {'file_id': 1})
+        return _open_rendition(fs, winner['file_id']) if winner and winner.get('file_id') else None
+    except Exception as e:
+        # An unreferenced file would never be deleted; serve the original
+        logger.warning(f"Could not cache rendition {rendition_id}: {str(e)}")
+        fs.delete(file_id)
+        return None
+    if cached_file_id:
+        # Drop whatever is left of the copy that could not be opened
+        fs.delete(cached_file_id)
+    return fs.get(file_id)
@@ -0,0 +1,106 @@
+"""
+Atomic like toggles for posts and comments
+
+A like is a row in ``post_likes`` / ``comment_likes`` keyed by a unique
+``(target, user_id)`` index, with a denormalized ``like_count`` on the
+target (see app/counters.py). ``set_like`` changes the row with a single
+``find_one_and_delete`` or upsert, so repeated or concurrent taps can never
+create a duplicate, and ``apply_like_delta`` moves the counter and returns
+the updated target in the same round trip.
+"""
+
+import logging
+from datetime import datetime, timezone
+from pymongo import ReturnDocument, DeleteMany
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+def set_like(likes, target_field, target_id, user_id, liked=None):
+    """Add or remove one user's like row
+
+    Args:
+        likes: The like collection (e.g. ``db.post_likes``)
+        target_field: Field holding the target ID ('post_id' or 'comment_id')
+        target_id: ID string of the liked document
+        user_id: ID string of the user
+        liked: True to like, False to unlike, None to toggle
+
+    Returns:
+        (liked, delta): the resulting state, and +1/-1/0 for the change to
+        apply to the target's like_count
+    """
+    key = {target_field: target_id, 'user_id': user_id}
+
+    if liked is not True:
+        if likes.find_one_and_delete(key, projection={'_id': 1}):
+            return False, -1
+        if liked is False:
+            return False, 0
+
+    try:
+        result = likes.update_one(
+            key,
+            {'$setOnInsert': {'created_at': datetime.now(timezone.utc)}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # A concurrent request inserted the same like
+        return True, 0
+    return True, 1 if result.upserted_id is not None else 0
+
+def apply_like_delta(collection, target_id, delta, projection=None):
+    """Move a document's like_count by ``delta`` and return the document
+
+    Returns:
+        The updated document (or the current one when ``delta`` is 0), or
+        None if it does not exist
+    """
+    if delta > 0:
+        return collection.find_one_and_update(
+            {'_id': target_id},
+            {'$inc': {'like_count': 1}},
+            projection=projection,
+            return_document=ReturnDocument.AFTER
+        )
+    if delta < 0:
+        document = collection.find_one_and_update(
+            {'_id': target_id, 'like_count': {'$gt': 0}},
+            {'$inc': {'like_count': -1}},
+            projection=projection,
+            return_document=ReturnDocument.AFTER
+        )
+        if document:
+            return document
+    return collection.find_one({'_id': target_id}, projection)
+
+def dedupe_likes(db):
+    """Remove duplicate like rows, keeping each user's earliest like
+
+    Needed once before the unique (target, user_id) indexes can be built on
+    data written by the old check-then-insert handlers. Run
+    ``reconcile_all`` afterwards to correct the like counters.
+
+    Returns:
+        dict with the number of rows removed per collection
+    """
+    removed = {}
+    for collection_name, target_field in (('post_likes', 'post_id'), ('comment_likes', 'comment_id')):
+        pipeline = [
+            {'$sort': {'created_at': 1, '_id': 1}},
+            {'$group': {
+                '_id': {'target': f'${target_field}', 'user_id': '$user_id'},
+                'ids': {'$push': '$_id'},
+                'count': {'$sum': 1}
+            }},
+            {'$match': {'count': {'$gt': 1}}}
+        ]
+        operations = [
+            DeleteMany({'_id': {'$in': group['ids'][1:]}})
+            for group in db[collection_name].aggregate(pipeline, allowDiskUse=True)
+        ]
+        removed[collection_name] = 0
+        if operations:
+            removed[collection_name] = db[collection_name].bulk_write(operations, ordered=False).deleted_count
+        logger.info(f"Removed {removed[collection_name]} duplicate rows from {collection_name}")
+    return removed
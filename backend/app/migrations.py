@@ -0,0 +1,97 @@
+"""
+One-time data migrations for the CampusConnect API
+
+Backfills that existing data needs after a deploy (e.g. denormalized
+counters on posts written before the counters existed) are listed in
+``MIGRATIONS`` and run once per database by ``start_migrations`` when the
+app starts, in a background thread so startup is not delayed.
+
+Every worker process calls it, so each migration is claimed first with a
+``schema_meta`` document (``{_id: 'migration:<name>', status}``): only the
+worker whose insert succeeds runs it. A migration that failed, or whose
+worker died while running it, is claimed again on a later startup.
+"""
+
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from pymongo.errors import DuplicateKeyError
+
+from app.counters import reconcile_post_counters, reconcile_comment_counters, reconcile_notification_counters
+from app.ranking import recompute_hot_scores
+
+logger = logging.getLogger(__name__)
+
+# A 'running' claim older than this is assumed to belong to a dead worker
+STALE_CLAIM = timedelta(hours=1)
+
+# (name, function taking the db), run in order; never rename or reorder
+MIGRATIONS = [
+    ('backfill_counters', lambda db: {
+        'posts': reconcile_post_counters(db),
+        'comments': reconcile_comment_counters(db)
+    }),
+    # Posts created before sort=hot have no hot_score and would sort last;
+    # runs after the counter backfill so scores see the real counts
+    ('backfill_hot_scores', recompute_hot_scores),
+    # Unread notifications written before the per-user counters existed
+    ('backfill_notification_counters', reconcile_notification_counters),
+    # Renditions used to keep their bytes inline; they are re-rendered into
+    # GridFS on the next request
+    ('drop_inline_renditions', lambda db: db.image_renditions.delete_many(
+        {'file_id': {'$exists': False}}
+    ).deleted_count),
+]
+
+def _claim(db, name):
+    """Return True if this process should run migration ``name``"""
+    now = datetime.now(timezone.utc)
+    try:
+        db.schema_meta.insert_one({'_id': f'migration:{name}', 'status': 'running', 'started_at': now})
+        return True
+    except DuplicateKeyError:
+        result = db.schema_meta.update_one(
+            {
+                '_id': f'migration:{name}',
+                '$or': [
+                    {'status': 'failed'},
+                    {'status': 'running', 'started_at': {'$lt': now - STALE_CLAIM}}
+                ]
+            },
+            {'$set': {'status': 'running', 'started_at': now}}
+        )
+        return result.modified_count == 1
+
+def run_migrations(db):
+    """Run every migration this database has not completed
+
+    Returns:
+        dict mapping the name of each migration run here to its result
+    """
+    results = {}
+    for name, migrate in MIGRATIONS:
+        if not _claim(db, name):
+            continue
+        try:
+            results[name] = migrate(db)
+        except Exception as e:
+            logger.error(f"Migration {name} failed: {str(e)}")
+            db.schema_meta.update_one({'_id': f'migration:{name}'}, {'$set': {'status': 'failed'}})
+            # Later migrations may depend on this one
+            break
+        db.schema_meta.update_one(
+            {'_id': f'migration:{name}'},
+            {'$set': {'status': 'done', 'finished_at': datetime.now(timezone.utc)}}
+        )
+        logger.info(f"Migration {name} done: {results[name]}")
+    return results
+
+def start_migrations(db):
+    """Run pending migrations in a background thread"""
+    def run():
+        try:
+            run_migrations(db)
+        except Exception as e:
+            logger.error(f"Error running migrations: {str(e)}")
+
+    threading.Thread(target=run, name='migrations', daemon=True).start()
@@ -0,0 +1,190 @@
+"""
+Notification inbox for the CampusConnect API
+
+Handlers create notifications with ``notify`` instead of inserting into
+``db.notifications`` directly, so each user's unread count is kept in a
+``notification_counters`` document (``{_id: user_id, unread: n}``). The
+unread badge is then a single point read however many notifications a
+user has. ``reconcile_notification_counters`` in app/counters.py repairs
+any drift. New notifications and badge changes are also pushed to
+connected ``/api/stream`` clients.
+
+Bursty events on one target (likes on a post or comment) go through
+``notify_grouped`` instead, which folds them into a single notification
+with a running ``actor_count`` rather than writing one row per event.
+"""
+
+import logging
+from datetime import datetime, timezone
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+def format_notification(notification):
+    """Format a notification document for the API"""
+    notification['id'] = str(notification.pop('_id'))
+    for field in ('created_at', 'updated_at', 'read_at'):
+        value = notification.get(field)
+        if value is not None:
+            if value.tzinfo is None:
+                value = value.replace(tzinfo=timezone.utc)
+            notification[field] = value.isoformat()
+    # Grouped notifications describe how many people acted, not just the first
+    if notification.get('actor_count', 1) > 1 and notification.get('summary'):
+        notification['content'] = f"{notification['actor_count']} people {notification['summary']}"
+    return notification
+
+def _publish(event_type, payload, user_id):
+    # Imported here: app.stream imports this module
+    from app.stream import publish
+    publish(event_type, payload, user_id=user_id)
+
+def _publish_unread_count(user_id, counter):
+    if counter:
+        _publish('unread_count', {'unread_count': max(counter.get('unread', 0), 0)}, user_id)
+
+def notify(db, notification):
+    """Store a notification and bump its recipient's unread counter
+
+    Args:
+        db: The database instance
+        notification: The notification document; ``user_id`` is required,
+            ``is_read`` and ``created_at`` are defaulted
+
+    Returns:
+        The inserted notification ID
+    """
+    notification.setdefault('is_read', False)
+    notification.setdefault('created_at', datetime.now(timezone.utc))
+    result = db.notifications.insert_one(notification)
+    _publish('notification', format_notification(dict(notification)), notification['user_id'])
+    if not notification['is_read']:
+        counter = db.notification_counters.find_one_and_update(
+            {'_id': notification['user_id']},
+            {'$inc': {'unread': 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        _publish_unread_count(notification['user_id'], counter)
+    return result.inserted_id
+
+def notify_grouped(db, notification, group_key, actor):
+    """Fold a notification into the recipient's open notification for a target
+
+    Events sharing ``group_key`` within the same NOTIFICATION_COALESCE_WINDOW
+    update one unread notification, recording the latest event in
+    ``updated_at``. ``created_at`` stays fixed: the inbox is keyset-paginated
+    on it, so moving it would make a notification repeat or vanish across
+    pages. ``actor_ids`` holds everyone who
+    acted and ``actor_count`` its size, so a user who likes, unlikes and
+    likes again is counted once; ``actors`` keeps the latest
+    NOTIFICATION_LATEST_ACTORS of them. Once it is read, or the window rolls
+    over, the next event starts a new notification.
+
+    Args:
+        db: The database instance
+        notification: As for ``notify``, plus an optional ``summary`` used to
+            render the content once several people have acted
+            (e.g. "liked your post: 'Title'")
+        group_key: Identifies the target, e.g. 'like:post:<post_id>'
+        actor: dict describing who acted (``user_id``, ``name``)
+
+    Returns:
+        The ID of the inserted or updated notification
+    """
+    now = datetime.now(timezone.utc)
+    query = {
+        'user_id': notification['user_id'],
+        'group_key': group_key,
+        'group_window': int(now.timestamp()) // Config.NOTIFICATION_COALESCE_WINDOW,
+        'is_read': False
+    }
+    update = {
+        '$set': {'updated_at': now},
+        '$setOnInsert': dict(
+            {
+                field: value for field, value in notification.items()
+                if field not in query and field not in ('created_at', 'is_read')
+            },
+            created_at=now
+        ),
+        '$inc': {'actor_count': 1},
+        '$addToSet': {'actor_ids': actor['user_id']},
+        '$push': {'actors': {'$each': [actor], '$slice': -Config.NOTIFICATION_LATEST_ACTORS}}
+    }
+    # Only matches (or creates) the group while this actor is not yet in it
+    new_actor_query = dict(query, actor_ids={'$ne': actor['user_id']})
+
+    try:
+        grouped = db.notifications.find_one_and_update(
+            new_actor_query, update, upsert=True, return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        # The open group exists: created by a concurrent event, or it already
+        # counts this actor
+        grouped = db.notifications.find_one_and_update(
+            new_actor_query, update, return_document=ReturnDocument.AFTER
+        )
+        if grouped is None:
+            # A repeat by a counted actor only refreshes updated_at
+            existing = db.notifications.find_one_and_update(
+                query, {'$set': {'updated_at': now}}, projection={'_id': 1}
+            )
+            return existing['_id'] if existing else None
+
+    _publish('notification', format_notification(dict(grouped)), grouped['user_id'])
+    if grouped['actor_count'] == 1:
+        counter = db.notification_counters.find_one_and_update(
+            {'_id': grouped['user_id']},
+            {'$inc': {'unread': 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        _publish_unread_count(grouped['user_id'], counter)
+    return grouped['_id']
+
+def unread_count(db, user_id):
+    """Return a user's unread notification count (one point read)"""
+    counter = db.notification_counters.find_one({'_id': str(user_id)})
+    return max(counter.get('unread', 0), 0) if counter else 0
+
+def mark_read(db, user_id, notification_ids=None):
+    """Mark a user's notifications as read
+
+    Args:
+        db: The database instance
+        user_id: ID string of the user
+        notification_ids: IDs to mark, or None for all unread notifications
+
+    Returns:
+        Number of notifications that changed from unread to read
+
+    Raises:
+        bson.errors.InvalidId: If an ID is malformed
+    """
+    user_id = str(user_id)
+    query = {'user_id': user_id, 'is_read': False}
+    if notification_ids is not None:
+        query['_id'] = {'$in': [ObjectId(notification_id) for notification_id in notification_ids]}
+
+    result = db.notifications.update_many(
+        query,
+        {'$set': {'is_read': True, 'read_at': datetime.now(timezone.utc)}}
+    )
+    if result.modified_count:
+        counter = db.notification_counters.find_one_and_update(
+            {'_id': user_id},
+            {'$inc': {'unread': -result.modified_count}},
+            return_document=ReturnDocument.AFTER
+        )
+        _publish_unread_count(user_id, counter)
+    return result.modified_count
+
+def delete_notifications(db, user_id, session=None):
+    """Remove all of a user's notifications and their counter"""
+    db.notifications.delete_many({'user_id': str(user_id)}, session=session)
+    db.notification_counters.delete_one({'_id': str(user_id)}, session=session)
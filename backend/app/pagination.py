@@ -0,0 +1,104 @@
+"""
+Keyset (cursor) pagination helpers for the CampusConnect API
+
+List endpoints accept an opaque ``cursor`` built from the ``(created_at, _id)``
+of the last item on the previous page. Each page is then a single indexed
+range read of ``limit + 1`` documents, no matter how deep the client scrolls,
+and no total count is needed.
+"""
+
+import base64
+import json
+from datetime import datetime, timezone
+from bson import ObjectId
+
+def encode_cursor(doc):
+    """Build an opaque cursor pointing just past ``doc``
+
+    Args:
+        doc: A raw document with ``created_at`` (datetime) and ``_id`` (ObjectId)
+
+    Returns:
+        URL-safe cursor string
+    """
+    created_at = doc['created_at']
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+    payload = json.dumps({'t': created_at.isoformat(), 'id': str(doc['_id'])})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by ``encode_cursor``
+
+    Args:
+        cursor: The cursor string from the request
+
+    Returns:
+        Tuple of (created_at, ObjectId)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        return datetime.fromisoformat(payload['t']), ObjectId(payload['id'])
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def keyset_filter(cursor, direction=-1):
+    """Build the range condition selecting documents after ``cursor``
+
+    Args:
+        cursor: Cursor string, or None/empty for the first page
+        direction: -1 for newest first, 1 for oldest first
+
+    Returns:
+        A query dict, or an empty dict for the first page
+    """
+    if not cursor:
+        return {}
+
+    created_at, last_id = decode_cursor(cursor)
+    op = '$lt' if direction < 0 else '$gt'
+    return {
+        '$or': [
+            {'created_at': {op: created_at}},
+            {'created_at': created_at, '_id': {op: last_id}}
+        ]
+    }
+
+def paginate_keyset(collection, query, cursor=None, limit=20, direction=-1, projection=None):
+    """Fetch one page of ``collection`` ordered by ``(created_at, _id)``
+
+    Args:
+        collection: The collection to read from
+        query: The base filter for the list
+        cursor: Cursor from the previous page, or None for the first page
+        limit: Page size
+        direction: -1 for newest first, 1 for oldest first
+        projection: Optional projection
+
+    Returns:
+        Tuple of (documents, next_cursor); next_cursor is None on the last page
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    after = keyset_filter(cursor, direction)
+    if after and query:
+        query = {'$and': [query, after]}
+    elif after:
+        query = after
+
+    docs = list(
+        collection.find(query, projection)
+        .sort([('created_at', direction), ('_id', direction)])
+        .limit(limit + 1)
+    )
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1])
+    return docs, next_cursor
@@ -0,0 +1,97 @@
+"""
+"Hot" ranking for the social feed
+
+Each post stores a ``hot_score`` combining engagement and age:
+
+    log10(max(likes + 2 * comments + sentiment bonus, 1)) + age_seconds / FEED_HOT_DECAY_SECONDS
+
+Because age enters as "seconds since a fixed epoch", a post's score never
+has to be recomputed just because time passes: newer posts simply start
+higher, and an older post must have ten times the engagement to rank level
+with a post ``FEED_HOT_DECAY_SECONDS`` newer. Scores only change on
+engagement events, which call ``refresh_hot_score``, so ``sort=hot`` is an
+indexed read of ``(hot_score, _id)``.
+"""
+
+import logging
+import math
+from datetime import datetime, timezone
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+HOT_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+COMMENT_WEIGHT = 2
+# Keyed by lower-cased sentiment; posts store 'Positive'/'Neutral'/'Negative'
+SENTIMENT_BONUS = {'positive': 1, 'negative': -1}
+
+# Fields hot_score is computed from
+HOT_FIELDS = {'like_count': 1, 'comment_count': 1, 'sentiment': 1, 'created_at': 1}
+
+def hot_score(post):
+    """Compute the hot score of a post document"""
+    engagement = (
+        post.get('like_count', 0)
+        + COMMENT_WEIGHT * post.get('comment_count', 0)
+        + SENTIMENT_BONUS.get((post.get('sentiment') or '').lower(), 0)
+    )
+    created_at = post.get('created_at') or HOT_EPOCH
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    age = (created_at - HOT_EPOCH).total_seconds()
+    return round(math.log10(max(engagement, 1)) + age / Config.FEED_HOT_DECAY_SECONDS, 7)
+
+def refresh_hot_score(db, post_id, post=None):
+    """Recompute a post's hot_score after its counters or sentiment changed
+
+    Args:
+        db: The database instance
+        post_id: ID string of the post
+        post: The post's current HOT_FIELDS, if the caller already has them
+
+    Returns:
+        The post's HOT_FIELDS, or None if it was not found or the update failed
+    """
+    try:
+        if post is None:
+            post = db.posts.find_one({'_id': ObjectId(post_id)}, HOT_FIELDS)
+        if post:
+            # Only write if the inputs are unchanged; otherwise a concurrent
+            # engagement event holds a newer snapshot and writes its own score
+            db.posts.update_one(
+                {
+                    '_id': post['_id'],
+                    'like_count': post.get('like_count'),
+                    'comment_count': post.get('comment_count'),
+                    'sentiment': post.get('sentiment')
+                },
+                {'$set': {'hot_score': hot_score(post)}}
+            )
+        return post
+    except Exception as e:
+        # A stale score only affects ordering; reconcile_counters.py repairs it
+        logger.error(f"Error refreshing hot score for post {post_id}: {str(e)}")
+        return None
+
+def recompute_hot_scores(db, batch_size=500):
+    """Recompute hot_score on every post whose stored score is out of date
+
+    Returns:
+        Number of posts updated
+    """
+    updated = 0
+    operations = []
+    for post in db.posts.find({}, dict(HOT_FIELDS, hot_score=1)):
+        score = hot_score(post)
+        if post.get('hot_score') != score:
+            operations.append(UpdateOne({'_id': post['_id']}, {'$set': {'hot_score': score}}))
+        if len(operations) >= batch_size:
+            updated += db.posts.bulk_write(operations, ordered=False).modified_count
+            operations = []
+    if operations:
+        updated += db.posts.bulk_write(operations, ordered=False).modified_count
+    logger.info(f"Recomputed hot scores: {updated} posts updated")
+    return updated
@@ -0,0 +1,110 @@
+"""
+Precomputed read models for the CampusConnect API
+
+Rarely written, frequently read lists (campus news and events) are served
+from a serialized snapshot instead of querying and reformatting the
+collection on every request. A snapshot is rebuilt when its model is
+invalidated by a write, or after ``ttl`` seconds to pick up incidental
+changes such as reader counts.
+
+Invalidation bumps a version number stored in the ``read_models``
+collection, so every worker process notices an admin edit within
+``version_check_interval`` seconds, not only the one that handled it.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+
+from flask import Response, current_app, request
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+class ReadModel:
+    """Versioned, per-process cache of serialized list responses
+
+    Args:
+        name: Unique model name, used as the version document ID
+        build: Callable ``build(db, **params)`` returning the response payload
+        ttl: Maximum age of a snapshot in seconds
+        version_check_interval: Seconds between reads of the shared version
+    """
+
+    def __init__(self, name, build, ttl=60, version_check_interval=5):
+        self.name = name
+        self.build = build
+        self.ttl = ttl
+        self.version_check_interval = version_check_interval
+        self._lock = threading.Lock()
+        self._version = None
+        self._version_checked_at = 0
+        self._snapshots = {}
+
+    def _current_version(self, db):
+        now = time.monotonic()
+        if self._version is None or now - self._version_checked_at > self.version_check_interval:
+            doc = db.read_models.find_one({'_id': self.name}) or {}
+            with self._lock:
+                self._version = doc.get('version', 0)
+                self._version_checked_at = now
+        return self._version
+
+    def invalidate(self, db):
+        """Discard every snapshot; call after each write to the source collection"""
+        try:
+            doc = db.read_models.find_one_and_update(
+                {'_id': self.name},
+                {'$inc': {'version': 1}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            version = doc['version']
+        except Exception as e:
+            logger.error(f"Error bumping {self.name} read model version: {str(e)}")
+            version = None
+        with self._lock:
+            self._version = version
+            self._version_checked_at = time.monotonic() if version is not None else 0
+            self._snapshots.clear()
+
+    def get(self, db, **params):
+        """Return the snapshot for ``params``, rebuilding it if stale
+
+        Returns:
+            dict with ``payload`` (the built data), ``body`` (serialized
+            JSON bytes) and ``etag``
+        """
+        key = tuple(sorted(params.items()))
+        version = self._current_version(db)
+        now = time.monotonic()
+
+        with self._lock:
+            snapshot = self._snapshots.get(key)
+        if snapshot and snapshot['version'] == version and now - snapshot['built_at'] < self.ttl:
+            return snapshot
+
+        payload = self.build(db, **params)
+        body = current_app.json.dumps(payload).encode('utf-8')
+        snapshot = {
+            'version': version,
+            'built_at': now,
+            'payload': payload,
+            'body': body,
+            'etag': hashlib.sha1(body).hexdigest()
+        }
+        with self._lock:
+            self._snapshots[key] = snapshot
+        return snapshot
+
+    def respond(self, snapshot):
+        """Build the response for a snapshot, answering 304 if the client has it"""
+        if request.if_none_match.contains_weak(snapshot['etag']):
+            response = Response(status=304)
+        else:
+            response = Response(snapshot['body'], status=200, mimetype='application/json')
+        response.set_etag(snapshot['etag'])
+        # Authenticated data: clients may keep it but must revalidate each time
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
@@ -5,7 +5,10 @@ from app.db import get_db
 from datetime import datetime, timedelta
 from bson import ObjectId
 import logging
+from app.config import Config
 from app.routes.users import token_required, verification_required
+from app.routes.campus_news import news_read_model
+from app.routes.campus_events import events_read_model
 
 logger = logging.getLogger(__name__)
 
@@ -18,29 +21,15 @@ campus_bp = Blueprint('campus', __name__, url_prefix='/api')
 @campus_bp.route('/campus/news', methods=['GET'])
 @token_required
 def get_news():
-    """Get all campus news"""
+    """Get campus news, served from the same read model as campus_news_bp"""
     try:
         db = get_db()
         
-        # Get news from database
-        news = list(db.campus_news.find().sort('date', -1))
+        limit = request.args.get('limit', type=int)
+        if limit is not None:
+            limit = max(1, min(limit, Config.CAMPUS_LIST_MAX_LIMIT))
         
-        # Format news for response
-        for item in news:
-            item['id'] = str(item['_id'])
-            del item['_id']
-            
-            # Convert date to string if it's a datetime object
-            if isinstance(item.get('date'), datetime):
-                item['date'] = item['date'].isoformat()
-        
-        return jsonify({
-            'status': 'success',
-            'message': 'News retrieved successfully',
-            'data': {
-                'news': news
-            }
-        }), 200
+        return news_read_model.respond(news_read_model.get(db, limit=limit))
         
     except Exception as e:
         logger.error(f"Error in get news: {str(e)}")
@@ -89,6 +78,7 @@ def add_news():
         db = get_db()
         result = db.campus_news.insert_one(new_news)
         logger.info(f"News added with ID: {result.inserted_id}")
+        news_read_model.invalidate(db)
         
         # Get the inserted news item
         news_item = db.campus_news.find_one({'_id': result.inserted_id})
@@ -153,6 +143,8 @@ def update_news(news_id):
                 'message': 'News item not found'
             }), 404
         
+        news_read_model.invalidate(db)
+        
         # Get the updated news item
         news_item = db.campus_news.find_one({'_id': ObjectId(news_id)})
         news_item['id'] = str(news_item['_id'])
@@ -200,6 +192,8 @@ def delete_news(news_id):
                 'message': 'News item not found'
             }), 404
         
+        news_read_model.invalidate(db)
+        
         return jsonify({
             'status': 'success',
             'message': 'News deleted successfully'
@@ -218,41 +212,17 @@ def delete_news(news_id):
 @campus_bp.route('/campus/events', methods=['GET'])
 @token_required
 def get_events():
-    """Get all campus events"""
+    """Get campus events, served from the same read model as campus_events_bp"""
     try:
         db = get_db()
         
-        # Get events from database
-        events = list(db.campus_events.find().sort('date', -1))
+        limit = request.args.get('limit', type=int)
+        if limit is not None:
+            limit = max(1, min(limit, Config.CAMPUS_LIST_MAX_LIMIT))
+        upcoming_only = request.args.get('upcoming_only', 'false').lower() == 'true'
         
-        # Format events for response
-        for event in events:
-            event['id'] = str(event['_id'])
-            del event['_id']
-            
-            # Format date for display
-            if 'date' in event:
-                try:
-                    date_obj = event['date']
-                    if isinstance(date_obj, str):
-                        date_obj = datetime.fromisoformat(date_obj.replace('Z', '+00:00'))
-                    elif isinstance(date_obj, datetime):
-                        # Convert datetime to string
-                        event['date'] = date_obj.isoformat()
-                    
-                    event['day'] = date_obj.day
-                    event['month'] = date_obj.strftime('%b')
-                    event['time'] = date_obj.strftime('%I:%M %p')
-                except Exception as e:
-                    logger.error(f"Error formatting date: {str(e)}")
-        
-        return jsonify({
-            'status': 'success',
-            'message': 'Events retrieved successfully',
-            'data': {
-                'events': events
-            }
-        }), 200
+        snapshot = events_read_model.get(db, limit=limit, upcoming_only=upcoming_only, iso_dates=True)
+        return events_read_model.respond(snapshot)
         
     except Exception as e:
         logger.error(f"Error in get events: {str(e)}")
@@ -326,6 +296,7 @@ def add_event():
         db = get_db()
         result = db.campus_events.insert_one(new_event)
         logger.info(f"Event added with ID: {result.inserted_id}")
+        events_read_model.invalidate(db)
         
         # Get the inserted event
         event = db.campus_events.find_one({'_id': result.inserted_id})
@@ -430,6 +401,8 @@ def update_event(event_id):
                 'message': 'Event not found'
             }), 404
         
+        events_read_model.invalidate(db)
+        
         # Get the updated event
         event = db.campus_events.find_one({'_id': ObjectId(event_id)})
         
@@ -487,6 +460,8 @@ def delete_event(event_id):
                 'message': 'Event not found'
             }), 404
         
+        events_read_model.invalidate(db)
+        
         return jsonify({
             'status': 'success',
             'message': 'Event deleted successfully'
@@ -5,47 +5,84 @@ from app.db import get_db
 from datetime import datetime, timedelta
 from bson import ObjectId
 import logging
+from app.config import Config
+from app.read_models import ReadModel
 from app.routes.users import token_required, verification_required
 
 logger = logging.getLogger(__name__)
 
 campus_events_bp = Blueprint('campus_events', __name__, url_prefix='/api/campus/events')
 
+def format_event(event, iso_dates=False):
+    """Format a campus_events document for the API
+    
+    Args:
+        event: The campus_events document
+        iso_dates: If True, send ``date`` as an ISO 8601 string (as the
+            /api/campus/events route in campus.py always has) instead of
+            leaving it to the JSON encoder
+    """
+    event['id'] = str(event.pop('_id'))
+    
+    # Format date for display
+    if 'date' in event:
+        try:
+            date_obj = event['date']
+            if isinstance(date_obj, str):
+                date_obj = datetime.fromisoformat(date_obj.replace('Z', '+00:00'))
+            elif iso_dates and isinstance(date_obj, datetime):
+                event['date'] = date_obj.isoformat()
+            
+            event['day'] = date_obj.day
+            event['month'] = date_obj.strftime('%b')
+            event['time'] = date_obj.strftime('%I:%M %p')
+        except Exception as e:
+            logger.error(f"Error formatting date: {str(e)}")
+    return event
+
+def build_event_list(db, limit=None, upcoming_only=False, iso_dates=False):
+    """Build the GET /api/campus/events payload"""
+    if upcoming_only:
+        # Event dates are stored as naive IST times (see add_event)
+        now_ist = datetime.utcnow() + timedelta(hours=5, minutes=30)
+        cursor = db.campus_events.find({'date': {'$gte': now_ist}}).sort('date', 1)
+    else:
+        cursor = db.campus_events.find().sort('date', -1)
+    if limit:
+        cursor = cursor.limit(limit)
+    
+    return {
+        'status': 'success',
+        'message': 'Events retrieved successfully',
+        'data': {
+            'events': [format_event(event, iso_dates) for event in cursor]
+        }
+    }
+
+# Shared snapshot of the event lists, invalidated by the admin write handlers.
+# The TTL also drops events that have started from upcoming_only lists.
+events_read_model = ReadModel('campus_events', build_event_list, ttl=Config.CAMPUS_READ_MODEL_TTL)
+
 @campus_events_bp.route('', methods=['GET'])
 @token_required
 def get_events():
-    """Get all campus events"""
+    """Get campus events
+    
+    Query parameters:
+        limit: Maximum number of events to return (default: all)
+        upcoming_only: If 'true', only events that have not started yet,
+            soonest first (default: all events, latest first)
+    """
     try:
         db = get_db()
         
-        # Get events from database
-        events = list(db.campus_events.find().sort('date', -1))
+        limit = request.args.get('limit', type=int)
+        if limit is not None:
+            limit = max(1, min(limit, Config.CAMPUS_LIST_MAX_LIMIT))
+        upcoming_only = request.args.get('upcoming_only', 'false').lower() == 'true'
         
-        # Format events for response
-        for event in events:
-            event['id'] = str(event['_id'])
-            del event['_id']
-            
-            # Format date for display
-            if 'date' in event:
-                try:
-                    date_obj = event['date']
-                    if isinstance(date_obj, str):
-                        date_obj = datetime.fromisoformat(date_obj.replace('Z', '+00:00'))
-                    
-                    event['day'] = date_obj.day
-                    event['month'] = date_obj.strftime('%b')
-                    event['time'] = date_obj.strftime('%I:%M %p')
-                except Exception as e:
-                    logger.error(f"Error formatting date: {str(e)}")
-        
-        return jsonify({
-            'status': 'success',
-            'message': 'Events retrieved successfully',
-            'data': {
-                'events': events
-            }
-        }), 200
+        snapshot = events_read_model.get(db, limit=limit, upcoming_only=upcoming_only)
+        return events_read_model.respond(snapshot)
         
     except Exception as e:
         logger.error(f"Error in get events: {str(e)}")
@@ -147,23 +184,10 @@ def add_event():
         
         db = get_db()
         result = db.campus_events.insert_one(new_event)
+        events_read_model.invalidate(db)
         
         # Get the inserted event
-        event = db.campus_events.find_one({'_id': result.inserted_id})
-        
-        # Format event for response
-        event['id'] = str(event['_id'])
-        del event['_id']
-        
-        # Format date for display
-        if 'date' in event:
-            try:
-                date_obj = event['date']
-                event['day'] = date_obj.day
-                event['month'] = date_obj.strftime('%b')
-                event['time'] = date_obj.strftime('%I:%M %p')
-            except Exception as e:
-                logger.error(f"Error formatting date: {str(e)}")
+        event = format_event(db.campus_events.find_one({'_id': result.inserted_id}))
         
         return jsonify({
             'status': 'success',
@@ -286,22 +310,10 @@ def update_event(event_id):
                 'message': 'Event not found'
             }), 404
         
+        events_read_model.invalidate(db)
+        
         # Get the updated event
-        event = db.campus_events.find_one({'_id': ObjectId(event_id)})
-        
-        # Format event for response
-        event['id'] = str(event['_id'])
-        del event['_id']
-        
-        # Format date for display
-        if 'date' in event:
-            try:
-                date_obj = event['date']
-                event['day'] = date_obj.day
-                event['month'] = date_obj.strftime('%b')
-                event['time'] = date_obj.strftime('%I:%M %p')
-            except Exception as e:
-                logger.error(f"Error formatting date: {str(e)}")
+        event = format_event(db.campus_events.find_one({'_id': ObjectId(event_id)}))
         
         return jsonify({
             'status': 'success',
@@ -348,6 +360,8 @@ def delete_event(event_id):
                 'message': 'Event not found'
             }), 404
         
+        events_read_model.invalidate(db)
+        
         return jsonify({
             'status': 'success',
             'message': 'Event deleted successfully'
@@ -5,51 +5,73 @@ from app.db import get_db
 from datetime import datetime, timedelta
 from bson import ObjectId
 import logging
+from app.config import Config
+from app.read_models import ReadModel
 from app.routes.users import token_required, verification_required
 
 logger = logging.getLogger(__name__)
 
 campus_news_bp = Blueprint('campus_news', __name__, url_prefix='/api/campus/news')
 
+def format_news_item(item):
+    """Format a campus_news document for the API"""
+    item['id'] = str(item.pop('_id'))
+    item.pop('read_by', None)
+    
+    # Convert date to IST (UTC+5:30)
+    if isinstance(item.get('date'), datetime):
+        ist_time = item['date'] + timedelta(hours=5, minutes=30)
+        item['date'] = ist_time.isoformat()
+    return item
+
+def build_news_list(db, limit=None):
+    """Build the GET /api/campus/news payload"""
+    # read_by grows with every reader and is never sent, so leave it in Mongo
+    cursor = db.campus_news.find({}, {'read_by': 0}).sort('date', -1)
+    if limit:
+        cursor = cursor.limit(limit)
+    
+    return {
+        'status': 'success',
+        'message': 'News retrieved successfully',
+        'data': {
+            'news': [format_news_item(item) for item in cursor]
+        }
+    }
+
+# Shared snapshot of the news list, invalidated by the admin write handlers
+news_read_model = ReadModel('campus_news', build_news_list, ttl=Config.CAMPUS_READ_MODEL_TTL)
+
 @campus_news_bp.route('', methods=['GET'])
 @token_required
 def get_news():
-    """Get all campus news"""
+    """Get campus news, newest first
+    
+    Query parameters:
+        limit: Maximum number of items to return (default: all)
+    """
     try:
         db = get_db()
         user_id = str(g.user['_id'])
         
-        # Get news from database
-        news = list(db.campus_news.find().sort('date', -1))
-        
-        # Format news for response
-        for item in news:
-            item['id'] = str(item['_id'])
-            del item['_id']
-            
-            # Convert date to IST (UTC+5:30)
-            if isinstance(item.get('date'), datetime):
-                ist_time = item['date'] + timedelta(hours=5, minutes=30)
-                item['date'] = ist_time.isoformat()
-            
-            # Update reader count if user hasn't read this news item
-            if user_id not in item.get('read_by', []):
-                db.campus_news.update_one(
-                    {'_id': ObjectId(item['id'])},
-                    {
-                        '$inc': {'readers': 1},
-                        '$addToSet': {'read_by': user_id}
-                    }
-                )
-                item['readers'] = item.get('readers', 0) + 1
+        limit = request.args.get('limit', type=int)
+        if limit is not None:
+            limit = max(1, min(limit, Config.CAMPUS_LIST_MAX_LIMIT))
         
-        return jsonify({
-            'status': 'success',
-            'message': 'News retrieved successfully',
-            'data': {
-                'news': news
-            }
-        }), 200
+        snapshot = news_read_model.get(db, limit=limit)
+        
+        # Count this user as a reader of every listed item they have not seen yet
+        news_ids = [ObjectId(item['id']) for item in snapshot['payload']['data']['news']]
+        if news_ids:
+            db.campus_news.update_many(
+                {'_id': {'$in': news_ids}, 'read_by': {'$ne': user_id}},
+                {
+                    '$inc': {'readers': 1},
+                    '$addToSet': {'read_by': user_id}
+                }
+            )
+        
+        return news_read_model.respond(snapshot)
         
     except Exception as e:
         logger.error(f"Error in get news: {str(e)}")
@@ -103,16 +125,10 @@ def add_news():
         
         db = get_db()
         result = db.campus_news.insert_one(new_news)
+        news_read_model.invalidate(db)
         
         # Get the inserted news item
-        news_item = db.campus_news.find_one({'_id': result.inserted_id})
-        news_item['id'] = str(news_item['_id'])
-        del news_item['_id']
-        
-        # Convert date to IST for response
-        if isinstance(news_item.get('date'), datetime):
-            ist_time = news_item['date'] + timedelta(hours=5, minutes=30)
-            news_item['date'] = ist_time.isoformat()
+        news_item = format_news_item(db.campus_news.find_one({'_id': result.inserted_id}))
         
         return jsonify({
             'status': 'success',
@@ -174,15 +190,10 @@ def update_news(news_id):
                 'message': 'News item not found or no changes made'
             }), 404
         
-        # Get the updated news item
-        news_item = db.campus_news.find_one({'_id': ObjectId(news_id)})
-        news_item['id'] = str(news_item['_id'])
-        del news_item['_id']
+        news_read_model.invalidate(db)
         
-        # Convert date to IST for response
-        if isinstance(news_item.get('date'), datetime):
-            ist_time = news_item['date'] + timedelta(hours=5, minutes=30)
-            news_item['date'] = ist_time.isoformat()
+        # Get the updated news item
+        news_item = format_news_item(db.campus_news.find_one({'_id': ObjectId(news_id)}))
         
         return jsonify({
             'status': 'success',
@@ -227,6 +238,8 @@ def delete_news(news_id):
                 'message': 'News item not found'
             }), 404
         
+        news_read_model.invalidate(db)
+        
         return jsonify({
             'status': 'success',
             'message': 'News deleted successfully'
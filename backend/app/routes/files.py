@@ -1,10 +1,11 @@
 # app/routes/files.py
 
 from flask import Blueprint, request, send_file, Response, current_app, jsonify, g
-from app.db import get_db, get_file_from_gridfs, get_binary_image
+from app.db import get_db, get_file_from_gridfs, open_media
 from app.routes.users import token_required, verification_required
+from app.images import pick_width, pick_format, get_rendition
 from bson import ObjectId
-from io import BytesIO
+from werkzeug.exceptions import RequestedRangeNotSatisfiable
 import logging
 import os
 
@@ -12,9 +13,95 @@ logger = logging.getLogger(__name__)
 
 files_bp = Blueprint('files', __name__, url_prefix='/api/files')
 
+# Stored media never changes for a given ObjectId, so browsers and CDNs may
+# keep it for a year without revalidating
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+def media_etag(media_id, variant=None):
+    """Strong ETag for stored media; the ObjectId identifies the exact bytes"""
+    return f"{media_id}-{variant}" if variant else str(media_id)
+
+def not_modified_response(etag, fallback_etag=None, vary_accept=False):
+    """Return a 304 response if the client already holds ``etag``, else None
+
+    Checked before the media is looked up, so revalidations never touch the
+    database.
+
+    Args:
+        etag: The validator of the requested representation
+        fallback_etag: Validator of the response served when that
+            representation is unavailable (the original upload)
+        vary_accept: The representation was negotiated from ``Accept``
+    """
+    matched = next(
+        (candidate for candidate in (etag, fallback_etag)
+         if candidate and request.if_none_match.contains_weak(candidate)),
+        None
+    )
+    if not matched:
+        return None
+    response = Response(status=304)
+    response.set_etag(matched)
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    if vary_accept:
+        response.vary.add('Accept')
+    return response
+
+def cache_immutable(response, etag):
+    """Mark a media response as cacheable forever under ``etag``"""
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+def stream_gridfs_file(gridfs_file, as_attachment=False, download_name=None, mimetype=None):
+    """Build a streaming response for a GridFS file
+
+    The body is read from GridFS in small blocks while it is sent, so the
+    file is never held in memory. ``Content-Length`` is always set, and
+    ``Range`` / ``If-Range`` requests are answered with ``206 Partial
+    Content`` by seeking straight to the requested chunk, which lets clients
+    resume interrupted downloads.
+
+    Args:
+        gridfs_file: A GridOut returned by get_file_from_gridfs or open_media
+        as_attachment: Send as a download instead of inline
+        download_name: Filename for Content-Disposition (defaults to the stored name)
+        mimetype: Content type (defaults to the stored content type)
+
+    Returns:
+        The Flask response
+    """
+    response = send_file(
+        gridfs_file,
+        mimetype=mimetype or gridfs_file.content_type or 'application/octet-stream',
+        as_attachment=as_attachment,
+        download_name=download_name or gridfs_file.filename or str(gridfs_file._id),
+        conditional=False
+    )
+    response.content_length = gridfs_file.length
+    response.headers['Accept-Ranges'] = 'bytes'
+    # Lets If-Range validate resumed downloads
+    response.set_etag(media_etag(gridfs_file._id))
+    if gridfs_file.upload_date:
+        response.last_modified = gridfs_file.upload_date
+    try:
+        return response.make_conditional(
+            request.environ, accept_ranges=True, complete_length=gridfs_file.length
+        )
+    except RequestedRangeNotSatisfiable as e:
+        response.close()
+        return e.get_response()
+
 @files_bp.route('/image/<image_id>', methods=['GET'])
 def get_image(image_id):
-    """Serve an image from binary storage"""
+    """Serve an image from the media store
+    
+    Query parameters:
+        w: Width in pixels or a rendition name (avatar, feed, full); serves a
+           resized rendition instead of the original upload
+        format: webp or jpeg for renditions (default: webp if accepted)
+    """
     try:
         # Convert string ID to ObjectId
         try:
@@ -26,29 +113,52 @@ def get_image(image_id):
                 'message': 'Invalid image ID format'
             }), 400
         
-        # Get image from database
-        image_doc = get_binary_image(image_id)
+        # Resolve the requested rendition, if any
+        width = None
+        if request.args.get('w'):
+            width = pick_width(request.args.get('w'))
+            if width is None:
+                return jsonify({
+                    'status': 'error',
+                    'message': 'Invalid image width'
+                }), 400
+        image_format = pick_format(request.args.get('format'), request.headers.get('Accept'))
+        
+        # Only renditions are negotiated; originals are served as uploaded
+        negotiated = bool(width) and 'format' not in request.args
+        etag = media_etag(image_id, f"w{width}.{image_format}" if width else None)
+        # A rendition request may have been answered with the original
+        cached = not_modified_response(etag, media_etag(image_id) if width else None, negotiated)
+        if cached:
+            return cached
         
-        if not image_doc:
+        # Get image from the media store
+        image = open_media(image_id)
+        
+        if not image:
             logger.error(f"Image not found with ID: {image_id}")
             return jsonify({
                 'status': 'error',
                 'message': 'Image not found'
             }), 404
         
-        # Create file-like object from binary data
-        image_data = BytesIO(image_doc['data'])
-        
-        # Get content type
-        content_type = image_doc.get('content_type', 'image/jpeg')
+        content_type = image.content_type or 'image/jpeg'
+        download_name = image.filename or 'image'
         
-        # Create response
-        response = send_file(
-            image_data,
-            mimetype=content_type,
-            as_attachment=False,
-            download_name=image_doc.get('filename', 'image')
-        )
+        rendition = get_rendition(get_db(), image_id, content_type, image.read, width, image_format) if width else None
+        if rendition:
+            response = stream_gridfs_file(
+                rendition,
+                download_name=f"{os.path.splitext(download_name)[0]}.{image_format}"
+            )
+        else:
+            # Serve the original; it keeps its own validator
+            etag = media_etag(image_id)
+            image.seek(0)
+            response = stream_gridfs_file(image, mimetype=content_type, download_name=download_name)
+        cache_immutable(response, etag)
+        if negotiated:
+            response.vary.add('Accept')
         
         # Add CORS headers
         response.headers['Access-Control-Allow-Origin'] = '*'
@@ -75,6 +185,11 @@ def get_gridfs_file(file_id):
                 'message': 'Invalid file ID format'
             }), 400
         
+        etag = media_etag(file_id)
+        cached = not_modified_response(etag)
+        if cached:
+            return cached
+        
         # Get file from GridFS
         gridfs_file = get_file_from_gridfs(file_id)
         
@@ -85,23 +200,12 @@ def get_gridfs_file(file_id):
                 'message': 'File not found'
             }), 404
         
-        # Create file-like object
-        file_data = BytesIO(gridfs_file.read())
-        
-        # Get content type and filename
-        content_type = gridfs_file.content_type
-        filename = gridfs_file.filename
-        
         # Determine if file should be downloaded or displayed inline
         as_attachment = request.args.get('download', 'false').lower() == 'true'
         
-        # Create response
-        response = send_file(
-            file_data,
-            mimetype=content_type,
-            as_attachment=as_attachment,
-            download_name=filename
-        )
+        # Stream the file from GridFS (supports Range requests)
+        response = stream_gridfs_file(gridfs_file, as_attachment=as_attachment)
+        cache_immutable(response, etag)
         
         # Add CORS headers
         response.headers['Access-Control-Allow-Origin'] = '*'
@@ -4,6 +4,7 @@ from flask import Blueprint, request, jsonify
 from app.db import get_db
 from datetime import datetime
 from bson import ObjectId
+from app.write_buffer import write_buffer
 
 notes_bp = Blueprint('notes', __name__)
 
@@ -41,11 +42,8 @@ def get_note(note_id):
     if not note:
         return jsonify({'error': 'Note not found'}), 404
     
-    # Increment views
-    db.notes.update_one(
-        {"_id": ObjectId(note_id)},
-        {"$inc": {"views": 1}}
-    )
+    # Increment views (written behind in a batch)
+    write_buffer.increment(db, 'notes', note['_id'], 'views')
     
     return jsonify({
         "status": "success",
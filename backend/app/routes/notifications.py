@@ -0,0 +1,129 @@
+# app/routes/notifications.py
+
+from flask import Blueprint, request, jsonify, g
+from bson.errors import InvalidId
+import logging
+from app.db import get_db
+from app.routes.users import token_required, verification_required
+from app.pagination import paginate_keyset
+from app.notifications import format_notification, unread_count, mark_read
+
+logger = logging.getLogger(__name__)
+
+notifications_bp = Blueprint('notifications', __name__, url_prefix='/api/notifications')
+
+MAX_NOTIFICATIONS_LIMIT = 50
+
+@notifications_bp.route('', methods=['GET'])
+@token_required
+@verification_required
+def get_notifications():
+    """Get the current user's notifications, newest first
+
+    Query parameters:
+        cursor: next_cursor from the previous page (omit for the first page)
+        limit: Page size (default: 20, max: 50)
+        unread_only: If 'true', only unread notifications
+    """
+    try:
+        user_id = str(g.user['_id'])
+        cursor = request.args.get('cursor')
+        limit = request.args.get('limit', 20, type=int)
+        limit = max(1, min(limit, MAX_NOTIFICATIONS_LIMIT))
+
+        query = {'user_id': user_id}
+        if request.args.get('unread_only', 'false').lower() == 'true':
+            query['is_read'] = False
+
+        db = get_db()
+        try:
+            notifications, next_cursor = paginate_keyset(db.notifications, query, cursor, limit)
+        except ValueError:
+            return jsonify({
+                'status': 'error',
+                'message': 'Invalid cursor'
+            }), 400
+
+        return jsonify({
+            'status': 'success',
+            'data': {
+                'notifications': [format_notification(n) for n in notifications],
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None,
+                'unread_count': unread_count(db, user_id)
+            }
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Error in get notifications: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': 'An error occurred while retrieving notifications'
+        }), 500
+
+@notifications_bp.route('/unread-count', methods=['GET'])
+@token_required
+def get_unread_count():
+    """Get the current user's unread notification count (for the badge)"""
+    try:
+        return jsonify({
+            'status': 'success',
+            'data': {
+                'unread_count': unread_count(get_db(), g.user['_id'])
+            }
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Error in get unread count: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': 'An error occurred while retrieving unread count'
+        }), 500
+
+@notifications_bp.route('/read', methods=['POST'])
+@token_required
+@verification_required
+def mark_notifications_read():
+    """Mark notifications as read
+
+    Body:
+        ids: List of notification IDs to mark, or
+        all: true to mark every unread notification
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        ids = data.get('ids')
+
+        if data.get('all') is True:
+            ids = None
+        elif not isinstance(ids, list) or not ids:
+            return jsonify({
+                'status': 'error',
+                'message': 'Provide a non-empty ids list or all: true'
+            }), 400
+
+        db = get_db()
+        user_id = str(g.user['_id'])
+        try:
+            marked = mark_read(db, user_id, ids)
+        except (InvalidId, TypeError):
+            return jsonify({
+                'status': 'error',
+                'message': 'Invalid notification ID'
+            }), 400
+
+        return jsonify({
+            'status': 'success',
+            'message': f'{marked} notifications marked as read',
+            'data': {
+                'marked': marked,
+                'unread_count': unread_count(db, user_id)
+            }
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Error in mark notifications read: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': 'An error occurred while marking notifications as read'
+        }), 500
@@ -14,6 +14,10 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from werkzeug.utils import secure_filename
 from app.routes.users import token_required, verification_required, generate_verification_code
+from app.pagination import paginate_keyset
+from app.search import text_filter
+from app.notifications import notify
+from app.typeahead import typeahead
 
 logger = logging.getLogger(__name__)
 
@@ -212,6 +216,14 @@ def get_opportunities():
         sort_order = int(request.args.get('sort_order', -1))  # -1 for descending, 1 for ascending
         limit = int(request.args.get('limit', 20))
         skip = int(request.args.get('skip', 0))
+        # Passing a cursor (empty for the first page) switches to keyset pagination
+        cursor = request.args.get('cursor')
+        
+        if cursor is not None and sort_by != 'created_at':
+            return jsonify({
+                'status': 'error',
+                'message': 'Cursor pagination is only supported when sorting by created_at'
+            }), 400
         
         # Build query
         query = {}
@@ -226,13 +238,8 @@ def get_opportunities():
             query['is_paid'] = is_paid.lower() == 'true'
         
         if search:
-            query['$or'] = [
-                {'title': {'$regex': search, '$options': 'i'}},
-                {'description': {'$regex': search, '$options': 'i'}},
-                {'company': {'$regex': search, '$options': 'i'}},
-                {'location': {'$regex': search, '$options': 'i'}},
-                {'skills_required': {'$regex': search, '$options': 'i'}}
-            ]
+            # Full-text match through the opportunities text index (see app/search.py)
+            query.update(text_filter(search))
         
         # Only show active opportunities
         query['is_active'] = True
@@ -240,7 +247,16 @@ def get_opportunities():
         db = get_db()
         
         # Get opportunities from database
-        opportunities = list(db.opportunities.find(query).sort(sort_by, sort_order).skip(skip).limit(limit))
+        if cursor is not None:
+            try:
+                opportunities, next_cursor = paginate_keyset(db.opportunities, query, cursor, limit, sort_order)
+            except ValueError:
+                return jsonify({
+                    'status': 'error',
+                    'message': 'Invalid cursor'
+                }), 400
+        else:
+            opportunities = list(db.opportunities.find(query).sort(sort_by, sort_order).skip(skip).limit(limit))
         
         # Process opportunities
         for opportunity in opportunities:
@@ -273,6 +289,16 @@ def get_opportunities():
                 'opportunity_id': opportunity['_id']
             })
         
+        if cursor is not None:
+            return jsonify({
+                'status': 'success',
+                'data': {
+                    'opportunities': opportunities,
+                    'next_cursor': next_cursor,
+                    'has_more': next_cursor is not None
+                }
+            }), 200
+        
         # Get total count
         total_count = db.opportunities.count_documents(query)
         
@@ -341,6 +367,7 @@ def create_opportunity():
         
         db = get_db()
         result = db.opportunities.insert_one(new_opportunity)
+        typeahead.record('companies', new_opportunity['company'])
         
         # If poster is not an admin, create a verification request
         if g.user['role'] != 'admin':
@@ -509,6 +536,13 @@ def update_opportunity(opportunity_id):
                 'message': 'No changes were made to the opportunity'
             }), 400
         
+        # Only active opportunities contribute company suggestions
+        if 'company' in update_fields or 'is_active' in update_fields:
+            if opportunity.get('is_active'):
+                typeahead.record('companies', opportunity.get('company'), -1)
+            if update_fields.get('is_active', opportunity.get('is_active')):
+                typeahead.record('companies', update_fields.get('company', opportunity.get('company')))
+        
         return jsonify({
             'status': 'success',
             'message': 'Opportunity updated successfully'
@@ -547,6 +581,8 @@ def delete_opportunity(opportunity_id):
         
         # Delete opportunity
         db.opportunities.delete_one({'_id': ObjectId(opportunity_id)})
+        if opportunity.get('is_active'):
+            typeahead.record('companies', opportunity.get('company'), -1)
         
         # Delete associated applications
         db.applications.delete_many({'opportunity_id': opportunity_id})
@@ -644,7 +680,7 @@ def apply_opportunity(opportunity_id):
             'is_read': False
         }
         
-        db.notifications.insert_one(notification)
+        notify(db, notification)
         
         return jsonify({
             'status': 'success',
@@ -740,7 +776,7 @@ def update_application_status(application_id):
             'is_read': False
         }
         
-        db.notifications.insert_one(notification)
+        notify(db, notification)
         
         return jsonify({
             'status': 'success',
@@ -819,7 +855,7 @@ def verify_opportunity(opportunity_id):
             'is_read': False
         }
         
-        db.notifications.insert_one(notification)
+        notify(db, notification)
         
         return jsonify({
             'status': 'success',
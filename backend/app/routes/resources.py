@@ -1,7 +1,7 @@
 # app/routes/resources.py
 
 from flask import Blueprint, request, jsonify, g, current_app, send_file, make_response
-from app.db import get_db, get_file_from_gridfs, delete_file_from_gridfs
+from app.db import get_db, get_file_from_gridfs, delete_file_from_gridfs, save_stream_to_gridfs, FileTooLargeError
 from datetime import datetime, timezone
 from bson import ObjectId
 import logging
@@ -9,8 +9,13 @@ import os
 import uuid
 import mimetypes
 from werkzeug.utils import secure_filename
-from io import BytesIO
+from app.routes.files import stream_gridfs_file
 from app.routes.users import token_required, verification_required
+from app.pagination import paginate_keyset
+from app.search import text_filter
+from app.notifications import notify
+from app.typeahead import typeahead
+from app.write_buffer import write_buffer
 
 logger = logging.getLogger(__name__)
 
@@ -72,16 +77,6 @@ def upload_resource():
                 'message': f'File type not allowed. Allowed types: {", ".join(current_app.config["ALLOWED_RESOURCE_EXTENSIONS"])}'
             }), 400
             
-        # Check file size
-        file_size = len(file.read())
-        file.seek(0)  # Reset file pointer after reading
-        
-        if file_size > current_app.config['MAX_RESOURCE_SIZE']:
-            return jsonify({
-                'status': 'error',
-                'message': f'File size should be less than {current_app.config["MAX_RESOURCE_SIZE"] // (1024 * 1024)}MB'
-            }), 400
-        
         # Get form data
         title = request.form.get('title')
         description = request.form.get('description', '')
@@ -102,12 +97,21 @@ def upload_resource():
         file_extension = filename.rsplit('.', 1)[1].lower()
         unique_filename = f"{uuid.uuid4().hex}.{file_extension}"
         
-        # Save file to GridFS
-        from app.db import save_file_to_gridfs
-        file_content = file.read()
+        # Stream file to GridFS, checking the size as it arrives
         content_type = file.content_type if hasattr(file, 'content_type') else f'application/{file_extension}'
         
-        file_id = save_file_to_gridfs(file_content, unique_filename, content_type)
+        try:
+            file_id, file_size = save_stream_to_gridfs(
+                file.stream,
+                unique_filename,
+                content_type,
+                max_size=current_app.config['MAX_RESOURCE_SIZE']
+            )
+        except FileTooLargeError:
+            return jsonify({
+                'status': 'error',
+                'message': f'File size should be less than {current_app.config["MAX_RESOURCE_SIZE"] // (1024 * 1024)}MB'
+            }), 400
         
         # Create resource record in database
         db = get_db()
@@ -133,6 +137,8 @@ def upload_resource():
         }
         
         result = db.resources.insert_one(new_resource)
+        typeahead.record('tags', tags)
+        typeahead.record('subjects', subject)
         
         return jsonify({
             'status': 'success',
@@ -165,6 +171,14 @@ def get_resources():
         sort_order = int(request.args.get('sort_order', -1))  # -1 for descending, 1 for ascending
         limit = int(request.args.get('limit', 20))
         skip = int(request.args.get('skip', 0))
+        # Passing a cursor (empty for the first page) switches to keyset pagination
+        cursor = request.args.get('cursor')
+        
+        if cursor is not None and sort_by != 'created_at':
+            return jsonify({
+                'status': 'error',
+                'message': 'Cursor pagination is only supported when sorting by created_at'
+            }), 400
         
         # Build query
         query = {}
@@ -183,16 +197,22 @@ def get_resources():
             query['tags'] = {'$in': tags_list}
         
         if search:
-            query['$or'] = [
-                {'title': {'$regex': search, '$options': 'i'}},
-                {'description': {'$regex': search, '$options': 'i'}},
-                {'tags': {'$regex': search, '$options': 'i'}}
-            ]
+            # Full-text match through the resources text index (see app/search.py)
+            query.update(text_filter(search))
         
         db = get_db()
         
         # Get resources from database
-        resources = list(db.resources.find(query).sort(sort_by, sort_order).skip(skip).limit(limit))
+        if cursor is not None:
+            try:
+                resources, next_cursor = paginate_keyset(db.resources, query, cursor, limit, sort_order)
+            except ValueError:
+                return jsonify({
+                    'status': 'error',
+                    'message': 'Invalid cursor'
+                }), 400
+        else:
+            resources = list(db.resources.find(query).sort(sort_by, sort_order).skip(skip).limit(limit))
         
         # Process resources
         for resource in resources:
@@ -223,6 +243,16 @@ def get_resources():
             if upvote:
                 resource['user_vote'] = upvote['vote_type']
         
+        if cursor is not None:
+            return jsonify({
+                'status': 'success',
+                'data': {
+                    'resources': resources,
+                    'next_cursor': next_cursor,
+                    'has_more': next_cursor is not None
+                }
+            }), 200
+        
         # Get total count
         total_count = db.resources.count_documents(query)
         
@@ -318,11 +348,9 @@ def get_resource_download(resource_id):
                 'message': 'Resource not found'
             }), 404
         
-        # Increment download count
-        db.resources.update_one(
-            {'_id': ObjectId(resource_id)},
-            {'$inc': {'download_count': 1}}
-        )
+        # Increment download count (resumed downloads are not counted again)
+        if request.range is None or request.range.ranges[0][0] == 0:
+            write_buffer.increment(db, 'resources', resource['_id'], 'download_count')
         
         # If it's a POST request, just increment the counter and return success
         if request.method == 'POST':
@@ -334,7 +362,23 @@ def get_resource_download(resource_id):
                 }
             }), 200
         
-        # For GET requests, serve the file
+        # For GET requests, serve the file, streaming it if it lives in GridFS
+        if resource.get('file_id'):
+            gridfs_file = get_file_from_gridfs(resource['file_id'])
+            if not gridfs_file:
+                return jsonify({
+                    'status': 'error',
+                    'message': 'File not found on server'
+                }), 404
+            
+            response = stream_gridfs_file(
+                gridfs_file,
+                as_attachment=True,
+                download_name=resource.get('original_filename')
+            )
+            response.headers['Access-Control-Allow-Origin'] = '*'
+            return response
+        
         file_path = os.path.join(
             current_app.config.get('UPLOAD_FOLDER', 'uploads'),
             'resources',
@@ -477,32 +521,23 @@ def download_resource(resource_id):
                     'message': 'File not found on server'
                 }), 404
             
-            # Increment download count
-            db.resources.update_one(
-                {'_id': ObjectId(resource_id)},
-                {'$inc': {'download_count': 1}}
-            )
+            # Increment download count (resumed downloads are not counted again)
+            if request.range is None or request.range.ranges[0][0] == 0:
+                write_buffer.increment(db, 'resources', resource['_id'], 'download_count')
             
             try:
-                # Create file-like object
-                file_data = BytesIO(gridfs_file.read())
-                logger.info(f"Successfully read file data from GridFS, size: {len(file_data.getvalue())} bytes")
-                
-                # Reset position to beginning of file for reading
-                file_data.seek(0)
-                
                 # Get content type and filename
                 content_type = gridfs_file.content_type or 'application/octet-stream'
                 download_name = resource.get('original_filename', gridfs_file.filename)
                 
-                logger.info(f"Sending file: {download_name}, content-type: {content_type}")
+                logger.info(f"Sending file: {download_name}, content-type: {content_type}, size: {gridfs_file.length} bytes")
                 
-                # Create response with file download
-                response = send_file(
-                    file_data, 
-                    mimetype=content_type,
-                    as_attachment=True, 
-                    download_name=download_name
+                # Stream the file from GridFS (supports Range requests)
+                response = stream_gridfs_file(
+                    gridfs_file,
+                    as_attachment=True,
+                    download_name=download_name,
+                    mimetype=content_type
                 )
                 
                 # Add CORS headers
@@ -544,10 +579,7 @@ def download_resource(resource_id):
             
             try:
                 # Increment download count
-                db.resources.update_one(
-                    {'_id': ObjectId(resource_id)},
-                    {'$inc': {'download_count': 1}}
-                )
+                write_buffer.increment(db, 'resources', resource['_id'], 'download_count')
                 
                 # Determine content type based on file extension
                 file_extension = os.path.splitext(file_path)[1].lower()[1:]
@@ -688,7 +720,7 @@ def vote_resource(resource_id):
                 'is_read': False
             }
             
-            db.notifications.insert_one(notification)
+            notify(db, notification)
         
         return jsonify({
             'status': 'success',
@@ -745,6 +777,8 @@ def delete_resource(resource_id):
         
         # Delete resource from database
         db.resources.delete_one({'_id': ObjectId(resource_id)})
+        typeahead.record('tags', resource.get('tags'), -1)
+        typeahead.record('subjects', resource.get('subject'), -1)
         
         # Delete associated votes
         db.resource_votes.delete_many({'resource_id': resource_id})
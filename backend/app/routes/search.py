@@ -0,0 +1,105 @@
+# app/routes/search.py
+
+from flask import Blueprint, request, jsonify, g
+import logging
+from app.db import get_db
+from app.routes.users import token_required, verification_required
+from app.search import SEARCH_ENTITIES, normalize_query, search
+from app.typeahead import typeahead
+
+logger = logging.getLogger(__name__)
+
+search_bp = Blueprint('search', __name__, url_prefix='/api/search')
+
+MAX_SEARCH_LIMIT = 50
+MAX_SUGGEST_LIMIT = 20
+
+@search_bp.route('', methods=['GET'])
+@token_required
+@verification_required
+def search_all():
+    """Search posts, resources, opportunities, study groups and users
+
+    Query parameters:
+        q: The search text (required)
+        types: Comma-separated entity types to search (default: all)
+        limit: Maximum results per type (default: 10, max: 50)
+    """
+    try:
+        text = normalize_query(request.args.get('q'))
+        if not text:
+            return jsonify({
+                'status': 'error',
+                'message': 'Search query (q) is required'
+            }), 400
+
+        types = request.args.get('types')
+        if types:
+            entity_types = [t.strip() for t in types.split(',') if t.strip()]
+            unknown = [t for t in entity_types if t not in SEARCH_ENTITIES]
+            if unknown:
+                return jsonify({
+                    'status': 'error',
+                    'message': f'Unknown search types: {", ".join(unknown)}. Allowed types: {", ".join(SEARCH_ENTITIES)}'
+                }), 400
+        else:
+            entity_types = None
+
+        limit = request.args.get('limit', 10, type=int)
+        limit = max(1, min(limit, MAX_SEARCH_LIMIT))
+
+        db = get_db()
+        data = search(db, text, str(g.user['_id']), entity_types=entity_types, limit=limit)
+        data['query'] = text
+
+        return jsonify({
+            'status': 'success',
+            'data': data
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Error in search: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': 'An error occurred while searching'
+        }), 500
+
+@search_bp.route('/suggest', methods=['GET'])
+@token_required
+@verification_required
+def suggest():
+    """Autocomplete suggestions from the in-memory typeahead indexes
+
+    Query parameters:
+        kind: One of usernames, names, tags, subjects, companies
+        q: The prefix typed so far
+        limit: Maximum suggestions (default: 8, max: 20)
+    """
+    try:
+        kind = request.args.get('kind')
+        if kind not in typeahead.KINDS:
+            return jsonify({
+                'status': 'error',
+                'message': f'Invalid kind. Must be one of: {", ".join(typeahead.KINDS)}'
+            }), 400
+
+        prefix = request.args.get('q', '')
+        limit = request.args.get('limit', 8, type=int)
+        limit = max(1, min(limit, MAX_SUGGEST_LIMIT))
+
+        suggestions = typeahead.suggest(get_db(), kind, prefix, limit)
+
+        return jsonify({
+            'status': 'success',
+            'data': {
+                'kind': kind,
+                'suggestions': suggestions
+            }
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Error in suggest: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': 'An error occurred while fetching suggestions'
+        }), 500
@@ -1,13 +1,22 @@
 # app/routes/social_feed.py
 
 from flask import Blueprint, request, jsonify, g, current_app
-from app.db import get_db
+from app.db import get_db, FileTooLargeError
 from datetime import datetime, timedelta, timezone
 from bson import ObjectId
 import logging
 import json
 import requests
 from app.routes.users import token_required, verification_required
+from app.feed import hydrate_posts, hydrate_comments
+from app.pagination import paginate_keyset
+from app.search import text_filter
+from app.notifications import notify, notify_grouped
+from app.ranking import hot_score, refresh_hot_score, HOT_FIELDS
+from app.timeline import timeline_enabled, timeline_filter, publish_post, unpublish_post, load_posts
+from app.enrichment import sentiment_enricher, PENDING_SENTIMENT
+from app.stream import publish, publish_new_post, post_stats_event
+from app.likes import set_like, apply_like_delta
 from werkzeug.utils import secure_filename
 import os
 import uuid
@@ -36,6 +45,7 @@ def clear_all_posts():
         
         # Delete all posts
         posts_result = db.posts.delete_many({})
+        db.timeline.delete_many({})
         
         # Delete all comments
         comments_result = db.comments.delete_many({})
@@ -76,8 +86,24 @@ def get_posts():
         search = request.args.get('search')
         limit = int(request.args.get('limit', 20))
         skip = int(request.args.get('skip', 0))
+        # Passing a cursor (empty for the first page) switches to keyset pagination
+        cursor = request.args.get('cursor')
+        # 'recent' (default) or 'hot' (engagement-ranked, see app/ranking.py)
+        sort = request.args.get('sort', 'recent')
         
-        logger.info(f"Query parameters: category={category}, author_id={author_id}, search={search}, limit={limit}, skip={skip}")
+        logger.info(f"Query parameters: category={category}, author_id={author_id}, search={search}, limit={limit}, skip={skip}, cursor={cursor}, sort={sort}")
+        
+        if sort not in ('recent', 'hot'):
+            return jsonify({
+                'status': 'error',
+                'message': 'Invalid sort. Must be one of: recent, hot'
+            }), 400
+        
+        if cursor is not None and sort != 'recent':
+            return jsonify({
+                'status': 'error',
+                'message': 'Cursor pagination is only supported when sorting by recent'
+            }), 400
         
         # Build query
         query = {}
@@ -104,17 +130,8 @@ def get_posts():
             }
         
         if search:
-            query['$and'] = [
-                {'$or': [
-                    {'moderation_status': 'approved'},
-                    {'author_id': str(g.user['_id'])}
-                ]},
-                {'$or': [
-                    {'title': {'$regex': search, '$options': 'i'}},
-                    {'content': {'$regex': search, '$options': 'i'}},
-                    {'tags': {'$regex': search, '$options': 'i'}}
-                ]}
-            ]
+            # Full-text match through the posts text index (see app/search.py)
+            query.update(text_filter(search))
         
         logger.info(f"Final MongoDB query: {query}")
         
@@ -133,78 +150,59 @@ def get_posts():
         if sentiment_filter and sentiment_filter.lower() not in ['all', '']:
             # Use case-insensitive regex for sentiment matching
             query['sentiment'] = {'$regex': f'^{sentiment_filter}$', '$options': 'i'}
+        
+        # The unfiltered home feed reads the materialized timeline when enabled
+        use_timeline = timeline_enabled() and sort == 'recent' and not (
+            (category and category != 'all') or author_id or search or 'sentiment' in query
+        )
+        if use_timeline:
+            source, source_query = db.timeline, timeline_filter(g.user)
+        else:
+            source, source_query = db.posts, query
             
         try:
             # Get posts from database
-            logger.info("Fetching posts from database")
-            posts = list(db.posts.find(query).sort('created_at', -1).skip(skip).limit(limit))
+            logger.info(f"Fetching posts from {'timeline' if use_timeline else 'database'}")
+            if cursor is not None:
+                try:
+                    posts, next_cursor = paginate_keyset(source, source_query, cursor, limit)
+                except ValueError:
+                    return jsonify({
+                        'status': 'error',
+                        'message': 'Invalid cursor'
+                    }), 400
+            elif sort == 'hot':
+                posts = list(source.find(source_query).sort([('hot_score', -1), ('_id', -1)]).skip(skip).limit(limit))
+            else:
+                posts = list(source.find(source_query).sort('created_at', -1).skip(skip).limit(limit))
+            if use_timeline:
+                posts = load_posts(db, posts)
             logger.info(f"Found {len(posts)} posts matching query")
             
-            # Get author details for each post
+            # Format posts, then resolve authors, counts and like flags for
+            # the whole page in a constant number of queries
             for post in posts:
                 post['_id'] = str(post['_id'])
                 
                 # Format timestamps
                 post['created_at'] = format_timestamp(post['created_at'])
                 post['updated_at'] = format_timestamp(post.get('updated_at'))
-                
-                # Get author details
-                try:
-                    author = db.users.find_one(
-                        {'_id': ObjectId(post['author_id'])},
-                        {'password_hash': 0, 'verification': 0, 'notifications': 0}
-                    )
-                    
-                    if author:
-                        post['author'] = {
-                            'id': str(author['_id']),
-                            'username': author['username'],
-                            'name': author['name'],
-                            'profile_picture': author['profile_picture']
-                        }
-                    else:
-                        logger.warning(f"Author not found for post {post['_id']}")
-                        post['author'] = {
-                            'id': post['author_id'],
-                            'username': 'Unknown',
-                            'name': 'Unknown User',
-                            'profile_picture': None
-                        }
-                except Exception as author_error:
-                    logger.error(f"Error getting author details: {str(author_error)}")
-                    post['author'] = {
-                        'id': post['author_id'],
-                        'username': 'Unknown',
-                        'name': 'Unknown User',
-                        'profile_picture': None
+            
+            hydrate_posts(db, posts, str(g.user['_id']))
+            
+            # Keyset pages skip the full count entirely
+            if cursor is not None:
+                return jsonify({
+                    'status': 'success',
+                    'data': {
+                        'posts': posts,
+                        'next_cursor': next_cursor,
+                        'has_more': next_cursor is not None
                     }
-                
-                # Get comment count
-                try:
-                    post['comment_count'] = db.comments.count_documents({'post_id': str(post['_id'])})
-                except Exception as comment_error:
-                    logger.error(f"Error counting comments: {str(comment_error)}")
-                    post['comment_count'] = 0
-                
-                # Get like count
-                try:
-                    post['like_count'] = db.post_likes.count_documents({'post_id': str(post['_id'])})
-                except Exception as like_error:
-                    logger.warning(f"Error counting likes: {str(like_error)}")
-                    post['like_count'] = 0
-                
-                # Check if current user has liked the post
-                try:
-                    post['is_liked'] = db.post_likes.count_documents({
-                        'post_id': str(post['_id']),
-                        'user_id': str(g.user['_id'])
-                    }) > 0
-                except Exception as like_error:
-                    logger.warning(f"Error checking if post is liked: {str(like_error)}")
-                    post['is_liked'] = False
+                }), 200
             
             # Get total count
-            total_count = db.posts.count_documents(query)
+            total_count = source.count_documents(source_query)
             logger.info(f"Total count: {total_count}")
             
             return jsonify({
@@ -265,21 +263,20 @@ def create_post():
                         'message': f'Image type not allowed. Allowed types: {", ".join(current_app.config["ALLOWED_IMAGE_EXTENSIONS"])}'
                     }), 400
                 
-                # Validate image file size
-                file_size = len(image_file.read())
-                logger.info(f"Image file size: {file_size} bytes")
-                image_file.seek(0)  # Reset file pointer after reading
-                
-                if file_size > current_app.config['MAX_IMAGE_SIZE']:
-                    logger.error(f"Image file too large: {file_size} bytes")
+                # Save the image using the helper function from users.py (size limit enforced while streaming)
+                from app.routes.users import save_uploaded_image
+                try:
+                    image_data = save_uploaded_image(
+                        image_file,
+                        folder='post_images',
+                        max_size=current_app.config['MAX_IMAGE_SIZE']
+                    )
+                except FileTooLargeError:
+                    logger.error("Image file too large")
                     return jsonify({
                         'status': 'error',
                         'message': f'Image file size should be less than {current_app.config["MAX_IMAGE_SIZE"] // (1024 * 1024)}MB'
                     }), 400
-                
-                # Save the image using the helper function from users.py
-                from app.routes.users import save_uploaded_image
-                image_data = save_uploaded_image(image_file, folder='post_images')
                 if image_data:
                     # Add more metadata for the frontend to properly handle the file
                     media_item = {
@@ -313,21 +310,20 @@ def create_post():
                         'message': f'Document type not allowed. Allowed types: {", ".join(current_app.config["ALLOWED_DOCUMENT_EXTENSIONS"])}'
                     }), 400
                 
-                # Validate attachment file size
-                file_size = len(attachment_file.read())
-                logger.info(f"Attachment file size: {file_size} bytes")
-                attachment_file.seek(0)  # Reset file pointer after reading
-                
-                if file_size > current_app.config['MAX_DOCUMENT_SIZE']:
-                    logger.error(f"Attachment file too large: {file_size} bytes")
+                # Save the attachment (size limit enforced while streaming)
+                from app.routes.users import save_uploaded_image
+                try:
+                    attachment_data = save_uploaded_image(
+                        attachment_file,
+                        folder='post_attachments',
+                        max_size=current_app.config['MAX_DOCUMENT_SIZE']
+                    )
+                except FileTooLargeError:
+                    logger.error("Attachment file too large")
                     return jsonify({
                         'status': 'error',
                         'message': f'Document file size should be less than {current_app.config["MAX_DOCUMENT_SIZE"] // (1024 * 1024)}MB'
                     }), 400
-                
-                # Save the attachment
-                from app.routes.users import save_uploaded_image
-                attachment_data = save_uploaded_image(attachment_file, folder='post_attachments')
                 if attachment_data:
                     # Add more metadata for the frontend to properly handle the file
                     media_item = {
@@ -400,27 +396,20 @@ def create_post():
             'moderation_feedback': None
         }
         
-        # Add sentiment analysis
-        try:
-            sentiment_result = analyze_post_sentiment(content)
-            new_post.update({
-                'sentiment': sentiment_result['sentiment'],
-                'sentiment_score': sentiment_result['score'],
-                'emotional_intensity': sentiment_result['emotionalIntensity'],
-                'detected_emotions': sentiment_result['detectedEmotions']
-            })
-        except Exception as e:
-            logger.error(f"Error analyzing sentiment during creation: {str(e)}")
-            # Set default sentiment values if analysis fails
-            new_post.update({
-                'sentiment': 'Neutral',
-                'sentiment_score': 50,
-                'emotional_intensity': 5,
-                'detected_emotions': [{'name': 'Calmness', 'percentage': 50}]
-            })
+        # Sentiment is filled in by the background enricher
+        new_post.update({
+            'sentiment': PENDING_SENTIMENT,
+            'sentiment_score': None,
+            'emotional_intensity': None,
+            'detected_emotions': []
+        })
+        new_post['hot_score'] = hot_score(new_post)
         
         logger.info("Inserting new post into database")
         result = db.posts.insert_one(new_post)
+        sentiment_enricher.submit(db, str(result.inserted_id), content)
+        publish_post(db, new_post, author=g.user)
+        publish_new_post(new_post)
         
         # Get the complete post object to return
         created_post = db.posts.find_one({'_id': result.inserted_id})
@@ -507,62 +496,16 @@ def get_post(post_id):
         # Get comments
         comments = list(db.comments.find({'post_id': post_id}).sort('created_at', 1))
         
-        # Process comments
         for comment in comments:
             comment['_id'] = str(comment['_id'])
             comment['created_at'] = format_timestamp(comment['created_at'])
-            
-            # Get comment author details
-            if not comment.get('is_anonymous', False):
-                comment_author = db.users.find_one(
-                    {'_id': ObjectId(comment['author_id'])},
-                    {'password_hash': 0, 'verification': 0, 'notifications': 0}
-                )
-                
-                if comment_author:
-                    comment['author'] = {
-                        'id': str(comment_author['_id']),
-                        'username': comment_author['username'],
-                        'name': comment_author['name'],
-                        'profile_picture': comment_author['profile_picture']
-                    }
-            else:
-                comment['author'] = {
-                    'id': None,
-                    'username': 'Anonymous',
-                    'name': 'Anonymous User',
-                    'profile_picture': None
-                }
-            
-            # Get like count for comment
-            try:
-                comment['like_count'] = db.post_likes.count_documents({
-                    'comment_id': str(comment['_id']),
-                    'type': 'comment'
-                })
-            except Exception as like_error:
-                logger.warning(f"Error counting comment likes: {str(like_error)}")
-                comment['like_count'] = 0
-            
-            # Check if current user has liked the comment
-            try:
-                comment['is_liked'] = db.post_likes.count_documents({
-                    'comment_id': str(comment['_id']),
-                    'user_id': str(g.user['_id']),
-                    'type': 'comment'
-                }) > 0
-            except Exception as like_error:
-                logger.warning(f"Error checking if comment is liked: {str(like_error)}")
-                comment['is_liked'] = False
-        
-        # Get like count for post
-        try:
-            post['like_count'] = db.post_likes.count_documents({
-                'post_id': post_id
-            })
-        except Exception as like_error:
-            logger.warning(f"Error counting post likes: {str(like_error)}")
-            post['like_count'] = 0
+        
+        # Resolve authors, like counts and like flags in bulk
+        hydrate_comments(db, comments, str(g.user['_id']))
+        
+        # Like and comment counts are maintained on the post itself
+        post['like_count'] = post.get('like_count', 0)
+        post['comment_count'] = post.get('comment_count', 0)
         
         # Check if current user has liked the post
         try:
@@ -629,17 +572,15 @@ def update_post(post_id):
             if 'image' in request.files:
                 image_file = request.files['image']
                 if image_file.filename != '':
-                    # Validate image file size (10MB limit)
-                    if len(image_file.read()) > 10 * 1024 * 1024:
+                    # Save the image using the helper function from users.py (10MB limit, enforced while streaming)
+                    from app.routes.users import save_uploaded_image
+                    try:
+                        image_data = save_uploaded_image(image_file, folder='post_images', max_size=10 * 1024 * 1024)
+                    except FileTooLargeError:
                         return jsonify({
                             'status': 'error',
                             'message': 'Image file size should be less than 10MB'
                         }), 400
-                    image_file.seek(0)  # Reset file pointer after reading
-                    
-                    # Save the image using the helper function from users.py
-                    from app.routes.users import save_uploaded_image
-                    image_data = save_uploaded_image(image_file, folder='post_images')
                     if image_data:
                         # Add more metadata for the frontend to properly handle the file
                         media_item = {
@@ -659,17 +600,15 @@ def update_post(post_id):
             if 'attachment' in request.files:
                 attachment_file = request.files['attachment']
                 if attachment_file.filename != '':
-                    # Validate attachment file size (25MB limit)
-                    if len(attachment_file.read()) > 25 * 1024 * 1024:
+                    # Save the attachment (25MB limit, enforced while streaming)
+                    from app.routes.users import save_uploaded_image
+                    try:
+                        attachment_data = save_uploaded_image(attachment_file, folder='post_attachments', max_size=25 * 1024 * 1024)
+                    except FileTooLargeError:
                         return jsonify({
                             'status': 'error',
                             'message': 'Attachment file size should be less than 25MB'
                         }), 400
-                    attachment_file.seek(0)  # Reset file pointer after reading
-                    
-                    # Save the attachment
-                    from app.routes.users import save_uploaded_image
-                    attachment_data = save_uploaded_image(attachment_file, folder='post_attachments')
                     if attachment_data:
                         # Add more metadata for the frontend to properly handle the file
                         media_item = {
@@ -714,25 +653,10 @@ def update_post(post_id):
                 # Keep existing media_urls if not being updated
                 update_fields['media_items'] = post.get('media_items', [])
 
-        # Update sentiment if content has changed
-        if 'content' in update_fields and update_fields['content'] != post.get('content'):
-            try:
-                sentiment_result = analyze_post_sentiment(update_fields['content'])
-                update_fields.update({
-                    'sentiment': sentiment_result['sentiment'],
-                    'sentiment_score': sentiment_result['score'],
-                    'emotional_intensity': sentiment_result['emotionalIntensity'],
-                    'detected_emotions': sentiment_result['detectedEmotions']
-                })
-            except Exception as e:
-                logger.error(f"Error analyzing sentiment during update: {str(e)}")
-                # Keep existing sentiment values if analysis fails
-                update_fields.update({
-                    'sentiment': post.get('sentiment', 'Neutral'),
-                    'sentiment_score': post.get('sentiment_score', 50),
-                    'emotional_intensity': post.get('emotional_intensity', 5),
-                    'detected_emotions': post.get('detected_emotions', [{'name': 'Calmness', 'percentage': 50}])
-                })
+        # Re-analyze sentiment in the background if content has changed
+        content_changed = 'content' in update_fields and update_fields['content'] != post.get('content')
+        if content_changed:
+            update_fields['sentiment'] = PENDING_SENTIMENT
         
         # Update post - preserve created_at by only updating specified fields
         result = db.posts.update_one(
@@ -746,6 +670,9 @@ def update_post(post_id):
                 'message': 'No changes were made to the post'
             }), 400
         
+        if content_changed:
+            sentiment_enricher.submit(db, post_id, update_fields['content'])
+        
         # Get the updated post
         updated_post = db.posts.find_one({'_id': ObjectId(post_id)})
         updated_post['_id'] = str(updated_post['_id'])
@@ -813,6 +740,7 @@ def delete_post(post_id):
                 'status': 'error',
                 'message': 'Failed to delete post'
             }), 500
+        unpublish_post(db, post_id)
         
         # Delete all comments associated with this post
         comments_deleted = db.comments.delete_many({'post_id': post_id})
@@ -856,45 +784,9 @@ def get_post_comments(post_id):
         for comment in comments:
             comment['_id'] = str(comment['_id'])
             comment['created_at'] = format_timestamp(comment['created_at'])
-            
-            # Get like count for the comment
-            comment['like_count'] = db.comment_likes.count_documents({'comment_id': str(comment['_id'])})
-            
-            # Check if current user has liked the comment
-            comment['is_liked'] = db.comment_likes.count_documents({
-                'comment_id': str(comment['_id']),
-                'user_id': str(g.user['_id'])
-            }) > 0
-            
-            # Get author details
-            try:
-                author = db.users.find_one(
-                    {'_id': ObjectId(comment['author_id'])},
-                    {'password_hash': 0, 'verification': 0, 'notifications': 0}
-                )
-                
-                if author:
-                    comment['author'] = {
-                        'id': str(author['_id']),
-                        'username': author['username'],
-                        'name': author['name'],
-                        'profile_picture': author['profile_picture']
-                    }
-                else:
-                    comment['author'] = {
-                        'id': comment['author_id'],
-                        'username': 'Unknown',
-                        'name': 'Unknown User',
-                        'profile_picture': None
-                    }
-            except Exception as author_error:
-                logger.error(f"Error getting author details for comment {comment['_id']}: {str(author_error)}")
-                comment['author'] = {
-                    'id': comment['author_id'],
-                    'username': 'Unknown',
-                    'name': 'Unknown User',
-                    'profile_picture': None
-                }
+        
+        # Resolve authors, like counts and like flags in bulk
+        hydrate_comments(db, comments, str(g.user['_id']))
         
         return jsonify({
             'status': 'success',
@@ -956,17 +848,15 @@ def create_comment(post_id):
         if has_files:
             image_file = request.files['image']
             if image_file.filename != '':
-                # Validate image file size (5MB limit)
-                if len(image_file.read()) > 5 * 1024 * 1024:
+                # Save the image using the helper function (5MB limit, enforced while streaming)
+                from app.routes.users import save_uploaded_image
+                try:
+                    image_data = save_uploaded_image(image_file, folder='comment_images', max_size=5 * 1024 * 1024)
+                except FileTooLargeError:
                     return jsonify({
                         'status': 'error',
                         'message': 'Image file size should be less than 5MB'
                     }), 400
-                image_file.seek(0)  # Reset file pointer after reading
-                
-                # Save the image using the helper function
-                from app.routes.users import save_uploaded_image
-                image_data = save_uploaded_image(image_file, folder='comment_images')
                 if image_data:
                     media_url = image_data['file_url']
                     logger.info(f"Saved comment image: {media_url}")
@@ -984,11 +874,19 @@ def create_comment(post_id):
             'moderation_status': 'approved',  # Auto-approve comments
             'moderation_feedback': None,
             'media_url': media_url,  # Add the image URL if present
-            'link': link  # Add the link if present
+            'link': link,  # Add the link if present
+            'like_count': 0
         }
         
         result = db.comments.insert_one(new_comment)
         
+        # Keep the post's denormalized comment counter in step
+        db.posts.update_one(
+            {'_id': ObjectId(post_id)},
+            {'$inc': {'comment_count': 1}}
+        )
+        engagement_changed(db, post_id)
+        
         # Get the complete comment object to return
         created_comment = db.comments.find_one({'_id': result.inserted_id})
         created_comment['_id'] = str(created_comment['_id'])
@@ -1020,7 +918,7 @@ def create_comment(post_id):
                 'is_read': False
             }
             
-            db.notifications.insert_one(notification)
+            notify(db, notification)
         
         return jsonify({
             'status': 'success',
@@ -1045,66 +943,58 @@ def create_comment(post_id):
 @token_required
 @verification_required
 def like_post(post_id):
-    """Like or unlike a post"""
+    """Like or unlike a post
+
+    Toggles by default. Send {"liked": true|false} to set the state instead,
+    which makes retries idempotent.
+    """
     try:
         db = get_db()
+        post_oid = ObjectId(post_id)
+        user_id = str(g.user['_id'])
         
-        # Check if post exists
-        post = db.posts.find_one({'_id': ObjectId(post_id)})
+        data = request.get_json(silent=True) or {}
+        requested = data.get('liked') if isinstance(data.get('liked'), bool) else None
+        
+        liked, delta = set_like(db.post_likes, 'post_id', post_id, user_id, requested)
+        post = apply_like_delta(
+            db.posts, post_oid, delta,
+            projection=dict(HOT_FIELDS, author_id=1, title=1)
+        )
         
         if not post:
+            if delta > 0:
+                db.post_likes.delete_one({'post_id': post_id, 'user_id': user_id})
             return jsonify({
                 'status': 'error',
                 'message': 'Post not found'
             }), 404
         
-        # Check if user has already liked the post
-        existing_like = db.post_likes.find_one({
-            'post_id': post_id,
-            'user_id': str(g.user['_id'])
-        })
+        if delta:
+            engagement_changed(db, post_id, post)
         
-        if existing_like:
-            # Unlike the post
-            db.post_likes.delete_one({'_id': existing_like['_id']})
-            
-            return jsonify({
-                'status': 'success',
-                'message': 'Post unliked successfully',
-                'data': {
-                    'liked': False
-                }
-            }), 200
-        else:
-            # Like the post
-            new_like = {
-                'post_id': post_id,
-                'user_id': str(g.user['_id']),
-                'created_at': datetime.now(timezone.utc)
+        # Add notification for post author, grouped with other recent likes
+        if delta > 0 and post['author_id'] != user_id:
+            notification = {
+                'user_id': post['author_id'],
+                'type': 'like',
+                'content': f"Someone liked your post: '{post['title']}'",
+                'summary': f"liked your post: '{post['title']}'",
+                'reference_id': post_id,
+                'created_at': datetime.now(timezone.utc),
+                'is_read': False
             }
             
-            db.post_likes.insert_one(new_like)
-            
-            # Add notification for post author
-            if post['author_id'] != str(g.user['_id']):
-                notification = {
-                    'user_id': post['author_id'],
-                    'type': 'like',
-                    'content': f"Someone liked your post: '{post['title']}'",
-                    'reference_id': post_id,
-                    'created_at': datetime.now(timezone.utc),
-                    'is_read': False
-                }
-                
-                db.notifications.insert_one(notification)
-            
-            return jsonify({
-                'status': 'success',
-                'message': 'Post liked successfully',
-                'data': {
-                    'liked': True
-                }
-            }), 200
+            notify_grouped(db, notification, f"like:post:{post_id}", like_actor(g.user))
+        
+        return jsonify({
+            'status': 'success',
+            'message': 'Post liked successfully' if liked else 'Post unliked successfully',
+            'data': {
+                'liked': liked,
+                'like_count': post.get('like_count', 0)
+            }
+        }), 200
         
     except Exception as e:
         logger.error(f"Error in like post: {str(e)}")
@@ -1151,17 +1041,15 @@ def update_comment(comment_id):
             
             image_file = request.files['image']
             if image_file.filename != '':
-                # Validate image file size (5MB limit)
-                if len(image_file.read()) > 5 * 1024 * 1024:
+                # Save the image using the helper function (5MB limit, enforced while streaming)
+                from app.routes.users import save_uploaded_image
+                try:
+                    image_data = save_uploaded_image(image_file, folder='comment_images', max_size=5 * 1024 * 1024)
+                except FileTooLargeError:
                     return jsonify({
                         'status': 'error',
                         'message': 'Image file size should be less than 5MB'
                     }), 400
-                image_file.seek(0)  # Reset file pointer after reading
-                
-                # Save the image using the helper function
-                from app.routes.users import save_uploaded_image
-                image_data = save_uploaded_image(image_file, folder='comment_images')
                 if image_data:
                     media_url = image_data['file_url']
                     logger.info(f"Saved comment image: {media_url}")
@@ -1227,9 +1115,7 @@ def update_comment(comment_id):
             }
         
         # Get like count and status
-        updated_comment['like_count'] = db.comment_likes.count_documents({
-            'comment_id': comment_id
-        })
+        updated_comment['like_count'] = updated_comment.get('like_count', 0)
         
         updated_comment['is_liked'] = db.comment_likes.count_documents({
             'comment_id': comment_id,
@@ -1284,17 +1170,15 @@ def delete_comment(comment_id):
             }), 500
         
         # Delete any likes associated with the comment
-        db.post_likes.delete_many({
-            'comment_id': comment_id,
-            'type': 'comment'
-        })
+        db.comment_likes.delete_many({'comment_id': comment_id})
         
         # Update the comment count on the post
         if post_id:
             db.posts.update_one(
-                {'_id': ObjectId(post_id)},
+                {'_id': ObjectId(post_id), 'comment_count': {'$gt': 0}},
                 {'$inc': {'comment_count': -1}}
             )
+            engagement_changed(db, post_id)
         
         return jsonify({
             'status': 'success',
@@ -1316,69 +1200,68 @@ def delete_comment(comment_id):
 @token_required
 @verification_required
 def like_comment(comment_id):
-    """Toggle like status for a comment"""
+    """Toggle like status for a comment
+
+    Send {"liked": true|false} to set the state instead of toggling.
+    """
     try:
         db = get_db()
+        comment_oid = ObjectId(comment_id)
+        user_id = str(g.user['_id'])
         
-        # Check if comment exists
-        comment = db.comments.find_one({'_id': ObjectId(comment_id)})
-        if not comment:
+        data = request.get_json(silent=True) or {}
+        requested = data.get('liked') if isinstance(data.get('liked'), bool) else None
+        
+        liked, delta = set_like(db.comment_likes, 'comment_id', comment_id, user_id, requested)
+        # The updated comment, with its stored like_count, comes back from the counter update
+        updated_comment = apply_like_delta(db.comments, comment_oid, delta)
+        
+        if not updated_comment:
+            if delta > 0:
+                db.comment_likes.delete_one({'comment_id': comment_id, 'user_id': user_id})
             return jsonify({
                 'status': 'error',
                 'message': 'Comment not found'
             }), 404
-            
-        user_id = str(g.user['_id'])
         
-        # Check if user has already liked the comment
-        existing_like = db.comment_likes.find_one({
-            'comment_id': comment_id,
-            'user_id': user_id
-        })
+        like_action = 'liked' if liked else 'unliked'
         
-        if existing_like:
-            # Unlike: Remove the like
-            db.comment_likes.delete_one({
-                'comment_id': comment_id,
-                'user_id': user_id
-            })
-            like_action = 'unliked'
-        else:
-            # Like: Add new like
-            db.comment_likes.insert_one({
-                'comment_id': comment_id,
-                'user_id': user_id,
-                'created_at': datetime.now(timezone.utc)
-            })
-            like_action = 'liked'
+        # Add notification for comment author, grouped with other recent likes
+        if delta > 0 and updated_comment['author_id'] != user_id:
+            notification = {
+                'user_id': updated_comment['author_id'],
+                'type': 'comment_like',
+                'content': "Someone liked your comment",
+                'summary': "liked your comment",
+                'reference_id': comment_id,
+                'post_id': updated_comment.get('post_id'),
+                'created_at': datetime.now(timezone.utc),
+                'is_read': False
+            }
             
-        # Get updated like count
-        like_count = db.comment_likes.count_documents({'comment_id': comment_id})
+            notify_grouped(db, notification, f"like:comment:{comment_id}", like_actor(g.user))
         
-        # Get updated comment with like status
-        updated_comment = db.comments.find_one({'_id': ObjectId(comment_id)})
-        if updated_comment:
-            updated_comment['_id'] = str(updated_comment['_id'])
-            updated_comment['created_at'] = format_timestamp(updated_comment['created_at'])
-            updated_comment['like_count'] = like_count
-            updated_comment['is_liked'] = not existing_like  # Toggle the like status
-            
-            # Get author details
-            author = db.users.find_one(
-                {'_id': ObjectId(updated_comment['author_id'])},
-                {'password_hash': 0, 'verification': 0, 'notifications': 0}
-            )
-            if author:
-                updated_comment['author'] = {
-                    'id': str(author['_id']),
-                    'username': author['username'],
-                    'name': author['name'],
-                    'profile_picture': author['profile_picture']
-                }
-            
-            # Add media_url and link if they exist
-            updated_comment['media_url'] = updated_comment.get('media_url')
-            updated_comment['link'] = updated_comment.get('link')
+        updated_comment['_id'] = str(updated_comment['_id'])
+        updated_comment['created_at'] = format_timestamp(updated_comment['created_at'])
+        updated_comment['like_count'] = updated_comment.get('like_count', 0)
+        updated_comment['is_liked'] = liked
+        
+        # Get author details
+        author = db.users.find_one(
+            {'_id': ObjectId(updated_comment['author_id'])},
+            {'password_hash': 0, 'verification': 0, 'notifications': 0}
+        )
+        if author:
+            updated_comment['author'] = {
+                'id': str(author['_id']),
+                'username': author['username'],
+                'name': author['name'],
+                'profile_picture': author['profile_picture']
+            }
+        
+        # Add media_url and link if they exist
+        updated_comment['media_url'] = updated_comment.get('media_url')
+        updated_comment['link'] = updated_comment.get('link')
         
         return jsonify({
             'status': 'success',
@@ -1434,25 +1317,10 @@ def update_post_text(post_id):
             'updated_at': datetime.now(timezone.utc)
         }
         
-        # Update sentiment if content has changed
-        if content != post.get('content'):
-            try:
-                sentiment_result = analyze_post_sentiment(content)
-                update_fields.update({
-                    'sentiment': sentiment_result['sentiment'],
-                    'sentiment_score': sentiment_result['score'],
-                    'emotional_intensity': sentiment_result['emotionalIntensity'],
-                    'detected_emotions': sentiment_result['detectedEmotions']
-                })
-            except Exception as e:
-                logger.error(f"Error analyzing sentiment during text update: {str(e)}")
-                # Keep existing sentiment values if analysis fails
-                update_fields.update({
-                    'sentiment': post.get('sentiment', 'Neutral'),
-                    'sentiment_score': post.get('sentiment_score', 50),
-                    'emotional_intensity': post.get('emotional_intensity', 5),
-                    'detected_emotions': post.get('detected_emotions', [{'name': 'Calmness', 'percentage': 50}])
-                })
+        # Re-analyze sentiment in the background if content has changed
+        content_changed = content != post.get('content')
+        if content_changed:
+            update_fields['sentiment'] = PENDING_SENTIMENT
         
         # Update post
         result = db.posts.update_one(
@@ -1466,6 +1334,9 @@ def update_post_text(post_id):
                 'message': 'No changes were made to the post'
             }), 400
         
+        if content_changed:
+            sentiment_enricher.submit(db, post_id, content)
+        
         # Get the updated post
         updated_post = db.posts.find_one({'_id': ObjectId(post_id)})
         updated_post['_id'] = str(updated_post['_id'])
@@ -1539,17 +1410,15 @@ def update_post_media(post_id):
         if 'image' in request.files:
             image_file = request.files['image']
             if image_file.filename != '':
-                # Validate image file size (10MB limit)
-                if len(image_file.read()) > 10 * 1024 * 1024:
+                # Save the image using the helper function from users.py (10MB limit, enforced while streaming)
+                from app.routes.users import save_uploaded_image
+                try:
+                    image_data = save_uploaded_image(image_file, folder='post_images', max_size=10 * 1024 * 1024)
+                except FileTooLargeError:
                     return jsonify({
                         'status': 'error',
                         'message': 'Image file size should be less than 10MB'
                     }), 400
-                image_file.seek(0)  # Reset file pointer after reading
-                
-                # Save the image using the helper function from users.py
-                from app.routes.users import save_uploaded_image
-                image_data = save_uploaded_image(image_file, folder='post_images')
                 if image_data:
                     # Add more metadata for the frontend to properly handle the file
                     media_item = {
@@ -1566,17 +1435,15 @@ def update_post_media(post_id):
         if 'attachment' in request.files:
             attachment_file = request.files['attachment']
             if attachment_file.filename != '':
-                # Validate attachment file size (25MB limit)
-                if len(attachment_file.read()) > 25 * 1024 * 1024:
+                # Save the attachment (25MB limit, enforced while streaming)
+                from app.routes.users import save_uploaded_image
+                try:
+                    attachment_data = save_uploaded_image(attachment_file, folder='post_attachments', max_size=25 * 1024 * 1024)
+                except FileTooLargeError:
                     return jsonify({
                         'status': 'error',
                         'message': 'Attachment file size should be less than 25MB'
                     }), 400
-                attachment_file.seek(0)  # Reset file pointer after reading
-                
-                # Save the attachment
-                from app.routes.users import save_uploaded_image
-                attachment_data = save_uploaded_image(attachment_file, folder='post_attachments')
                 if attachment_data:
                     # Add more metadata for the frontend to properly handle the file
                     media_item = {
@@ -1791,9 +1658,7 @@ def update_comment_text(comment_id):
             }
         
         # Get like count and status
-        updated_comment['like_count'] = db.comment_likes.count_documents({
-            'comment_id': comment_id
-        })
+        updated_comment['like_count'] = updated_comment.get('like_count', 0)
         
         updated_comment['is_liked'] = db.comment_likes.count_documents({
             'comment_id': comment_id,
@@ -1850,17 +1715,15 @@ def update_comment_media(comment_id):
         media_url = None
         image_file = request.files['image']
         if image_file.filename != '':
-            # Validate image file size (5MB limit)
-            if len(image_file.read()) > 5 * 1024 * 1024:
+            # Save the image using the helper function (5MB limit, enforced while streaming)
+            from app.routes.users import save_uploaded_image
+            try:
+                image_data = save_uploaded_image(image_file, folder='comment_images', max_size=5 * 1024 * 1024)
+            except FileTooLargeError:
                 return jsonify({
                     'status': 'error',
                     'message': 'Image file size should be less than 5MB'
                 }), 400
-            image_file.seek(0)  # Reset file pointer after reading
-            
-            # Save the image using the helper function
-            from app.routes.users import save_uploaded_image
-            image_data = save_uploaded_image(image_file, folder='comment_images')
             if image_data:
                 media_url = image_data['file_url']
                 logger.info(f"Saved comment image: {media_url}")
@@ -1904,9 +1767,7 @@ def update_comment_media(comment_id):
             }
         
         # Get like count and status
-        updated_comment['like_count'] = db.comment_likes.count_documents({
-            'comment_id': comment_id
-        })
+        updated_comment['like_count'] = updated_comment.get('like_count', 0)
         
         updated_comment['is_liked'] = db.comment_likes.count_documents({
             'comment_id': comment_id,
@@ -1994,9 +1855,7 @@ def update_comment_link(comment_id):
             }
         
         # Get like count and status
-        updated_comment['like_count'] = db.comment_likes.count_documents({
-            'comment_id': comment_id
-        })
+        updated_comment['like_count'] = updated_comment.get('like_count', 0)
         
         updated_comment['is_liked'] = db.comment_likes.count
         result = db.comments.update_one(
@@ -2031,9 +1890,7 @@ def update_comment_link(comment_id):
             }
         
         # Get like count and status
-        updated_comment['like_count'] = db.comment_likes.count_documents({
-            'comment_id': comment_id
-        })
+        updated_comment['like_count'] = updated_comment.get('like_count', 0)
         
         updated_comment['is_liked'] = db.comment_likes.count_documents({
             'comment_id': comment_id,
@@ -2055,192 +1912,6 @@ def update_comment_link(comment_id):
             'message': 'An error occurred while removing comment media'
         }), 500
 
-# Helper function to analyze sentiment of post content
-def analyze_post_sentiment(text):
-    """Analyze the sentiment of post content using Hugging Face API"""
-    try:
-        # Check if text is empty or too short
-        if not text or len(text.strip()) < 3:
-            logger.warning("Text too short for sentiment analysis, returning Neutral")
-            return {
-                'score': 50,
-                'sentiment': 'Neutral',
-                'emotionalIntensity': 3,
-                'detectedEmotions': [{'name': 'Calmness', 'percentage': 50}]
-            }
-            
-        # First, try using the Hugging Face Inference API (faster and more reliable)
-        import os
-        import requests
-        from dotenv import load_dotenv
-        
-        # Load environment variables if not already loaded
-        load_dotenv()
-        
-        # Get API key from environment variables
-        api_key = os.getenv('AI_API_KEY')
-        
-        if api_key:
-            logger.info("Using Hugging Face Inference API for sentiment analysis")
-            
-            # API endpoint for the model
-            API_URL = "https://api-inference.huggingface.co/models/cardiffnlp/twitter-roberta-base-sentiment"
-            
-            # Set up headers with the API key
-            headers = {"Authorization": f"Bearer {api_key}"}
-            
-            # Prepare the payload
-            payload = {"inputs": text}
-            
-            # Make the API request
-            response = requests.post(API_URL, headers=headers, json=payload)
-            
-            # Check if the request was successful
-            if response.status_code == 200:
-                result = response.json()
-                
-                # The API returns a list of dictionaries with label and score
-                # Find the label with the highest score
-                if isinstance(result, list) and len(result) > 0 and isinstance(result[0], list):
-                    # Get the item with highest score
-                    best_match = max(result[0], key=lambda x: x['score'])
-                    raw_sentiment = best_match['label']
-                    confidence = best_match['score']
-                    
-                    logger.info(f"API returned sentiment: {raw_sentiment} with confidence: {confidence}")
-                else:
-                    raise ValueError(f"Unexpected API response format: {result}")
-            else:
-                # If API call fails, fall back to local model
-                logger.warning(f"API call failed with status {response.status_code}: {response.text}")
-                raise ValueError("API call failed, falling back to local model")
-        else:
-            # No API key, use local model
-            logger.warning("No API key found, using local model")
-            raise ValueError("No API key, falling back to local model")
-                
-    except Exception as api_error:
-        # Fall back to local model if API call fails
-        logger.warning(f"API approach failed, falling back to local model: {str(api_error)}")
-        
-        try:
-            # Import the necessary libraries for local processing
-            from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
-            import torch
-            
-            # Use direct text classification with explicit labels
-            logger.info("Using local model for sentiment analysis")
-            
-            # Initialize the pipeline with specific parameters
-            sentiment_pipeline = pipeline(
-                "text-classification", 
-                model="cardiffnlp/twitter-roberta-base-sentiment",
-                return_all_scores=True  # Get scores for all labels
-            )
-            
-            # Process the text
-            result = sentiment_pipeline(text)
-            
-            # Find the label with the highest score
-            if result and isinstance(result[0], list):
-                best_match = max(result[0], key=lambda x: x['score'])
-                raw_sentiment = best_match['label']
-                confidence = best_match['score']
-            else:
-                # Fallback if result format is unexpected
-                logger.warning(f"Unexpected pipeline result format: {result}")
-                # Try to extract the highest scoring label
-                if result and isinstance(result[0], dict) and 'label' in result[0]:
-                    raw_sentiment = result[0]['label']
-                    confidence = result[0]['score']
-                else:
-                    raise ValueError(f"Could not extract sentiment from result: {result}")
-            
-            logger.info(f"Local model returned sentiment: {raw_sentiment} with confidence: {confidence}")
-            
-        except Exception as local_model_error:
-            logger.error(f"Local model failed: {str(local_model_error)}")
-            
-            # As a last resort, use a simple rule-based approach
-            logger.warning("Falling back to rule-based sentiment analysis")
-            
-            # Simple word lists for basic sentiment analysis
-            positive_words = ['good', 'great', 'excellent', 'amazing', 'wonderful', 'happy', 'joy', 'love', 'like', 'best']
-            negative_words = ['bad', 'terrible', 'awful', 'horrible', 'sad', 'angry', 'hate', 'dislike', 'worst']
-            
-            text_lower = text.lower()
-            pos_count = sum(1 for word in positive_words if word in text_lower)
-            neg_count = sum(1 for word in negative_words if word in text_lower)
-            
-            # Determine sentiment based on word counts
-            if pos_count > neg_count:
-                raw_sentiment = "POSITIVE"
-                confidence = min(0.9, 0.5 + (pos_count - neg_count) * 0.1)
-            elif neg_count > pos_count:
-                raw_sentiment = "NEGATIVE"
-                confidence = min(0.9, 0.5 + (neg_count - pos_count) * 0.1)
-            else:
-                # If counts are equal or both zero, check for specific phrases
-                if any(phrase in text_lower for phrase in ['thank you', 'thanks', 'appreciate']):
-                    raw_sentiment = "POSITIVE"
-                    confidence = 0.7
-                elif any(phrase in text_lower for phrase in ['sorry', 'apologize', 'regret']):
-                    raw_sentiment = "NEGATIVE"
-                    confidence = 0.7
-                else:
-                    raw_sentiment = "NEUTRAL"
-                    confidence = 0.6
-            
-            logger.info(f"Rule-based analysis returned: {raw_sentiment} with confidence: {confidence}")
-    
-    # Map the model's output to our application's format
-    # The model returns labels like: LABEL_0, LABEL_1, LABEL_2 or NEGATIVE, NEUTRAL, POSITIVE
-    sentiment_mapping = {
-        "LABEL_0": "Negative",
-        "LABEL_1": "Neutral", 
-        "LABEL_2": "Positive",
-        "NEGATIVE": "Negative",
-        "NEUTRAL": "Neutral", 
-        "POSITIVE": "Positive"
-    }
-    
-    # Default to the raw sentiment if it's already in the right format
-    sentiment = sentiment_mapping.get(raw_sentiment, raw_sentiment)
-    
-    # Make sure we have a valid sentiment category
-    if sentiment not in ["Positive", "Neutral", "Negative"]:
-        logger.warning(f"Unknown sentiment '{sentiment}', defaulting to Neutral")
-        sentiment = "Neutral"
-    
-    # Convert confidence to percentage score
-    score_percentage = round(confidence * 100)
-    
-    # Determine emotional intensity (1-10 scale) based on confidence
-    emotional_intensity = max(1, min(10, round(confidence * 10)))
-    
-    # Generate detected emotions based on the sentiment
-    detected_emotions = []
-    
-    if sentiment == "Positive":
-        detected_emotions.append({"name": "Happiness", "percentage": score_percentage})
-        if score_percentage > 80:
-            detected_emotions.append({"name": "Joy", "percentage": score_percentage - 10})
-    elif sentiment == "Negative":
-        detected_emotions.append({"name": "Sadness", "percentage": score_percentage})
-        if score_percentage > 75:
-            detected_emotions.append({"name": "Anger", "percentage": score_percentage - 15})
-    else:  # Neutral
-        detected_emotions.append({"name": "Calmness", "percentage": score_percentage})
-    
-    logger.info(f"Final sentiment analysis for text: '{text[:30]}...' - Result: {sentiment} (Score: {score_percentage}%)")
-    
-    return {
-        'score': score_percentage,
-        'sentiment': sentiment,
-        'emotionalIntensity': emotional_intensity,
-        'detectedEmotions': detected_emotions
-    }
-
 def format_timestamp(dt):
     """Helper function to format timestamps consistently"""
     if not dt:
@@ -2252,3 +1923,17 @@ def format_timestamp(dt):
     else:
         dt = dt.replace(tzinfo=timezone.utc)
     return dt.replace(microsecond=0).isoformat()
+
+def engagement_changed(db, post_id, post=None):
+    """Refresh a post's hot score and push its new counts to live clients"""
+    post = refresh_hot_score(db, post_id, post)
+    if post:
+        publish('post_stats', post_stats_event(post))
+
+def like_actor(user):
+    """Actor entry stored on grouped like notifications"""
+    return {
+        'user_id': str(user['_id']),
+        'username': user.get('username'),
+        'name': user.get('name')
+    }
@@ -0,0 +1,153 @@
+# app/routes/stream.py
+
+from flask import Blueprint, Response, request, jsonify, current_app, g
+from bson.errors import InvalidId
+from datetime import datetime, timedelta
+import jwt
+import logging
+import queue
+import time
+from app.db import get_db
+from app.config import Config
+from app.routes.users import load_current_user, token_required
+from app.stream import broker, relay, format_sse
+
+logger = logging.getLogger(__name__)
+
+stream_bp = Blueprint('stream', __name__, url_prefix='/api/stream')
+
+# Tells EventSource how long to wait before reconnecting (milliseconds)
+RECONNECT_DELAY_MS = 3000
+
+# ``purpose`` claim of stream tickets; token_required rejects them
+STREAM_TICKET_PURPOSE = 'stream'
+
+def issue_stream_ticket(user_id):
+    """Return a short-lived JWT that can only open /api/stream"""
+    return jwt.encode(
+        {
+            'user_id': str(user_id),
+            'purpose': STREAM_TICKET_PURPOSE,
+            'exp': datetime.utcnow() + timedelta(seconds=Config.STREAM_TICKET_TTL)
+        },
+        current_app.config.get('SECRET_KEY'),
+        algorithm='HS256'
+    )
+
+def authenticate_stream():
+    """Resolve the user of a stream request
+
+    EventSource cannot send headers, so instead of the session token (which
+    would end up in access logs as part of the URL) it passes a stream
+    ticket as ``?ticket=``. Returns the user document or None.
+    """
+    auth_header = request.headers.get('Authorization', '')
+    if auth_header.startswith('Bearer '):
+        token, purpose = auth_header.split(' ')[1], None
+    else:
+        token, purpose = request.args.get('ticket'), STREAM_TICKET_PURPOSE
+
+    if not token:
+        return None
+    try:
+        payload = jwt.decode(token, current_app.config.get('SECRET_KEY'), algorithms=['HS256'])
+        if payload.get('purpose') != purpose:
+            return None
+        return load_current_user(payload['user_id'])
+    except (jwt.InvalidTokenError, InvalidId, KeyError, TypeError):
+        return None
+
+@stream_bp.route('/ticket', methods=['POST'])
+@token_required
+def create_stream_ticket():
+    """Issue a ticket for opening the event stream
+
+    The ticket is valid for STREAM_TICKET_TTL seconds and only for
+    /api/stream, so it is harmless once it has been logged. Request a new
+    one for every connection, including reconnects after the server closes
+    the stream.
+    """
+    ticket = issue_stream_ticket(g.user['_id'])
+    return jsonify({
+        'status': 'success',
+        'data': {
+            'ticket': ticket,
+            'expires_in': Config.STREAM_TICKET_TTL,
+            'stream_url': f"{Config.STREAM_BASE_URL}/api/stream?ticket={ticket}"
+        }
+    }), 200
+
+def event_stream(subscription):
+    """Yield SSE frames for a subscription until STREAM_MAX_SECONDS elapse"""
+    deadline = time.monotonic() + Config.STREAM_MAX_SECONDS
+    try:
+        yield f"retry: {RECONNECT_DELAY_MS}\n\n"
+        yield format_sse('ready', {'source': relay.source})
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            if subscription.overflowed:
+                # The client fell behind; drop what is queued and have it refetch
+                subscription.overflowed = False
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                yield format_sse('resync', {})
+                continue
+
+            try:
+                event_type, data = subscription.queue.get(timeout=min(Config.STREAM_HEARTBEAT, remaining))
+            except queue.Empty:
+                yield ": keepalive\n\n"
+                continue
+            yield format_sse(event_type, data)
+    finally:
+        broker.unsubscribe(subscription)
+
+@stream_bp.route('', methods=['GET'])
+def stream_events():
+    """Server-Sent Events stream of live updates for the current user
+
+    Events: post, post_stats, notification, unread_count, plus resync when
+    events were dropped and the client should refetch. The connection is
+    closed after STREAM_MAX_SECONDS; the client then reconnects with a new
+    ticket.
+
+    Query parameters:
+        ticket: Stream ticket from POST /api/stream/ticket, for clients that
+            cannot set the Authorization header
+    """
+    try:
+        user = authenticate_stream()
+        if not user:
+            return jsonify({
+                'status': 'error',
+                'message': 'Invalid or missing authentication token'
+            }), 401
+
+        relay.start(get_db())
+        
+        # Every open stream holds a worker thread (or greenlet)
+        subscription = broker.subscribe(user['_id'], Config.STREAM_MAX_CONNECTIONS)
+        if subscription is None:
+            response = jsonify({
+                'status': 'error',
+                'message': 'Too many live connections, try again shortly'
+            })
+            response.headers['Retry-After'] = str(RECONNECT_DELAY_MS // 1000)
+            return response, 503
+
+        response = Response(event_stream(subscription), mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        # Stop nginx-style proxies from buffering the stream
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+
+    except Exception as e:
+        logger.error(f"Error in stream events: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': 'An error occurred while opening the event stream'
+        }), 500
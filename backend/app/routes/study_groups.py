@@ -4,6 +4,10 @@ from datetime import datetime
 from bson import ObjectId
 import logging
 from app.routes.users import token_required, verification_required
+from app.pagination import paginate_keyset
+from app.search import text_filter
+from app.notifications import notify
+from app.typeahead import typeahead
 
 logger = logging.getLogger(__name__)
 
@@ -44,6 +48,7 @@ def create_study_group():
         
         db = get_db()
         result = db.study_groups.insert_one(new_group)
+        typeahead.record('subjects', new_group['subject'])
         
         # Add creator as a member
         member = {
@@ -81,6 +86,8 @@ def get_study_groups():
         search = request.args.get('search')
         limit = int(request.args.get('limit', 20))
         skip = int(request.args.get('skip', 0))
+        # Passing a cursor (empty for the first page) switches to keyset pagination
+        cursor = request.args.get('cursor')
         
         # Build query
         query = {}
@@ -89,16 +96,22 @@ def get_study_groups():
             query['subject'] = subject
         
         if search:
-            query['$or'] = [
-                {'name': {'$regex': search, '$options': 'i'}},
-                {'description': {'$regex': search, '$options': 'i'}},
-                {'subject': {'$regex': search, '$options': 'i'}}
-            ]
+            # Full-text match through the study_groups text index (see app/search.py)
+            query.update(text_filter(search))
         
         db = get_db()
         
         # Get study groups from database
-        study_groups = list(db.study_groups.find(query).sort('created_at', -1).skip(skip).limit(limit))
+        if cursor is not None:
+            try:
+                study_groups, next_cursor = paginate_keyset(db.study_groups, query, cursor, limit)
+            except ValueError:
+                return jsonify({
+                    'status': 'error',
+                    'message': 'Invalid cursor'
+                }), 400
+        else:
+            study_groups = list(db.study_groups.find(query).sort('created_at', -1).skip(skip).limit(limit))
         
         # Process study groups
         for group in study_groups:
@@ -128,6 +141,16 @@ def get_study_groups():
                 'user_id': str(g.user['_id'])
             }) > 0
         
+        if cursor is not None:
+            return jsonify({
+                'status': 'success',
+                'data': {
+                    'study_groups': study_groups,
+                    'next_cursor': next_cursor,
+                    'has_more': next_cursor is not None
+                }
+            }), 200
+        
         # Get total count
         total_count = db.study_groups.count_documents(query)
         
@@ -310,7 +333,7 @@ def join_study_group(group_id):
             'is_read': False
         }
         
-        db.notifications.insert_one(notification)
+        notify(db, notification)
         
         return jsonify({
             'status': 'success',
@@ -378,6 +401,7 @@ def leave_study_group(group_id):
                 else:
                     # No other members, delete the group
                     db.study_groups.delete_one({'_id': ObjectId(group_id)})
+                    typeahead.record('subjects', group.get('subject'), -1)
                     db.group_members.delete_many({'group_id': group_id})
                     db.group_discussions.delete_many({'group_id': group_id})
                     
@@ -403,7 +427,7 @@ def leave_study_group(group_id):
                 'is_read': False
             }
             
-            db.notifications.insert_one(notification)
+            notify(db, notification)
         
         return jsonify({
             'status': 'success',
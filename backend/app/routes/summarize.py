@@ -2,42 +2,21 @@
 
 from flask import Blueprint, request, jsonify, current_app
 from flask_cors import cross_origin  # Add this import
-import os
-import google.generativeai as genai
 import logging
 from app.routes.users import token_required
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
+from app.ai_clients import get_gemini_model, gemini_generate, CircuitOpenError
 
 logger = logging.getLogger(__name__)
 
 summarize_bp = Blueprint('summarize', __name__, url_prefix='/api/summarize')
 
 def initialize_gemini():
-    """Initialize the Gemini API with the API key from environment variables"""
-    try:
-        # Get API key from environment variables
-        api_key = os.getenv('GEMINI_API_KEY')
-        if not api_key:
-            logger.error("GEMINI_API_KEY not found in environment variables")
-            return None
-        
-        # Configure the Gemini API
-        genai.configure(api_key=api_key)
-        
-        try:
-            # Use the exact model name from the working curl request
-            model = genai.GenerativeModel('gemini-2.0-flash')
-            return model
-        except Exception as model_error:
-            logger.error(f"Failed to create Gemini model instance: {str(model_error)}")
-            return None
-            
-    except Exception as e:
-        logger.error(f"Error initializing Gemini API: {str(e)}")
-        return None
+    """Return the shared Gemini model, configured once per process"""
+    return get_gemini_model()
+
+# Build the Gemini client when the blueprint is registered rather than on the
+# first request
+summarize_bp.record_once(lambda state: initialize_gemini())
 
 @summarize_bp.route('/text', methods=['POST', 'OPTIONS'])
 @cross_origin()
@@ -72,7 +51,7 @@ def summarize_text():
             }]
             
             # Generate the summary using the matching format
-            response = model.generate_content(
+            response = gemini_generate(
                 contents,
                 generation_config={
                     "temperature": 0.7,
@@ -97,6 +76,13 @@ def summarize_text():
                 }
             }), 200
             
+        except CircuitOpenError as circuit_error:
+            logger.warning(f"Summarization skipped: {str(circuit_error)}")
+            return jsonify({
+                'status': 'error',
+                'message': 'Summarization service is temporarily unavailable. Please try again later.'
+            }), 503
+            
         except Exception as model_error:
             logger.error(f"Model error: {str(model_error)}")
             return jsonify({
@@ -1,7 +1,14 @@
 # app/routes/users.py
 
 from flask import Blueprint, request, jsonify, current_app, g, url_for
-from app.db import get_db
+from app.db import get_db, save_stream_to_gridfs, FileTooLargeError
+from app.cache import TTLCache
+from app.config import Config
+from app.search import text_filter
+from app.typeahead import typeahead
+from app.notifications import delete_notifications
+from app.counters import remove_user_engagement
+from app.ranking import refresh_hot_score
 from datetime import datetime, timedelta
 from bson import ObjectId
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -20,6 +27,30 @@ logger = logging.getLogger(__name__)
 
 users_bp = Blueprint('users', __name__, url_prefix='/api/users')
 
+# Per-process cache of the user documents loaded by token_required, keyed by
+# user_id string. Large fields no handler reads from g.user are projected out.
+USER_CACHE_PROJECTION = {'verification': 0, 'notifications': 0}
+user_cache = TTLCache(maxsize=Config.USER_CACHE_SIZE, ttl=Config.USER_CACHE_TTL)
+
+def load_current_user(user_id):
+    """Get the projected user document for an authenticated request
+
+    Served from user_cache when possible so authenticated requests skip the
+    users lookup. Returns a shallow copy so handlers can't mutate the cache.
+    """
+    user = user_cache.get(user_id)
+    if user is None:
+        db = get_db()
+        user = db.users.find_one({'_id': ObjectId(user_id)}, USER_CACHE_PROJECTION)
+        if not user:
+            return None
+        user_cache.set(user_id, user)
+    return dict(user)
+
+def invalidate_user_cache(user_id):
+    """Drop a user from user_cache after their document changes"""
+    user_cache.invalidate(str(user_id))
+
 # Helper function to validate college email domain
 def is_valid_college_email(email, allowed_domains=None):
     """Validate if the email belongs to an allowed college domain"""
@@ -62,9 +93,12 @@ def token_required(f):
             secret_key = current_app.config.get('SECRET_KEY')
             payload = jwt.decode(token, secret_key, algorithms=['HS256'])
             
-            # Get user from database
-            db = get_db()
-            current_user = db.users.find_one({'_id': ObjectId(payload['user_id'])})
+            # Single-purpose tokens (e.g. stream tickets) are not session tokens
+            if payload.get('purpose'):
+                raise jwt.InvalidTokenError('Token is not a session token')
+            
+            # Get user from the cache, falling back to the database
+            current_user = load_current_user(payload['user_id'])
             
             if not current_user:
                 return jsonify({
@@ -103,6 +137,9 @@ def verification_required(f):
                 {'_id': g.user['_id']},
                 {'$set': {'is_verified': True}}
             )
+            invalidate_user_cache(g.user['_id'])
+            typeahead.sync_user(db, g.user['_id'])
+            g.user['is_verified'] = True
             logger.info(f"Auto-verified user in decorator: {g.user['email']}")
             
             # In production, you would want to uncomment the code below
@@ -326,6 +363,8 @@ def verify_email():
                 }
             }
         )
+        invalidate_user_cache(user['_id'])
+        typeahead.sync_user(db, user['_id'])
         
         # Generate JWT token
         secret_key = current_app.config.get('SECRET_KEY')
@@ -487,8 +526,15 @@ def get_profile():
         }), 500
 
 # Helper function to save uploaded images
-def save_uploaded_image(file, folder='profile_images'):
-    """Save an uploaded image to MongoDB and return the file ID and URL"""
+def save_uploaded_image(file, folder='profile_images', max_size=None):
+    """Save an uploaded image to MongoDB and return the file ID and URL
+    
+    The upload is streamed into GridFS chunk by chunk, never held in memory
+    as a whole.
+    
+    Raises:
+        FileTooLargeError: If the upload is larger than ``max_size`` bytes
+    """
     try:
         logger.info(f"Attempting to save uploaded image: {file.filename}")
         
@@ -496,10 +542,6 @@ def save_uploaded_image(file, folder='profile_images'):
         filename = secure_filename(file.filename)
         unique_filename = f"{uuid.uuid4().hex}_{filename}"
         
-        # Get file content
-        file_content = file.read()
-        file_size = len(file_content)
-        
         # Check content type
         content_type = file.content_type if hasattr(file, 'content_type') else 'application/octet-stream'
         
@@ -512,12 +554,11 @@ def save_uploaded_image(file, folder='profile_images'):
         # Get host URL for constructing full URLs
         host_url = request.host_url.rstrip('/')
         
-        # Determine the storage method based on file type and folder
+        # Stream the upload into the media store
+        file_id, file_size = save_stream_to_gridfs(file.stream, unique_filename, content_type, max_size)
+        
+        # Determine the serving endpoint based on file type and folder
         if folder == 'post_attachments' or folder == 'resources' or not is_image:
-            # Use GridFS for documents (large files)
-            from app.db import save_file_to_gridfs
-            file_id = save_file_to_gridfs(file_content, unique_filename, content_type)
-            
             # Generate URL with full host
             relative_url = f"/api/files/gridfs/{file_id}"
             file_url = f"{host_url}{relative_url}"
@@ -535,14 +576,11 @@ def save_uploaded_image(file, folder='profile_images'):
                 'storage_type': 'gridfs'
             }
         else:
-            # Use binary storage for images
-            from app.db import save_binary_image
-            file_id = save_binary_image(file_content, unique_filename, content_type)
-            
+            # Images go through the image endpoint (renditions, caching)
             # Generate URL with full host
             relative_url = f"/api/files/image/{file_id}"
             file_url = f"{host_url}{relative_url}"
-            logger.info(f"Saved image to binary storage with ID: {file_id}, URL: {file_url}")
+            logger.info(f"Saved image to media store with ID: {file_id}, URL: {file_url}")
             
             return {
                 'file_id': str(file_id),
@@ -553,8 +591,10 @@ def save_uploaded_image(file, folder='profile_images'):
                 'file_size': file_size,
                 'file_ext': file_ext,
                 'is_image': True,
-                'storage_type': 'binary'
+                'storage_type': 'gridfs'
             }
+    except FileTooLargeError:
+        raise
     except Exception as e:
         logger.error(f"Error saving uploaded file: {str(e)}")
         import traceback
@@ -588,6 +628,8 @@ def update_profile():
             {'_id': g.user['_id']},
             {'$set': update_fields}
         )
+        invalidate_user_cache(g.user['_id'])
+        typeahead.sync_user(db, g.user['_id'])
         
         if result.modified_count == 0:
             return jsonify({
@@ -692,6 +734,8 @@ def upload_profile_image(user_id):
                 'last_active': datetime.utcnow()
             }}
         )
+        invalidate_user_cache(user_id)
+        typeahead.sync_user(db, user_id)
         
         logger.info(f"Database update result: {result.modified_count} documents modified")
         if result.modified_count == 0:
@@ -794,6 +838,7 @@ def upload_background_image(user_id):
                 'last_active': datetime.utcnow()
             }}
         )
+        invalidate_user_cache(user_id)
         
         logger.info(f"Database update result: {result.modified_count} documents modified")
         if result.modified_count == 0:
@@ -866,6 +911,7 @@ def change_password():
                 }
             }
         )
+        invalidate_user_cache(g.user['_id'])
         
         return jsonify({
             'status': 'success',
@@ -886,6 +932,7 @@ def get_users():
     """Get list of users (with optional filtering)"""
     try:
         # Get query parameters
+        search = request.args.get('search')
         name = request.args.get('name')
         department = request.args.get('department')
         year = request.args.get('year')
@@ -895,6 +942,10 @@ def get_users():
         # Build query
         query = {}
         
+        if search:
+            # Full-text match through the users text index (see app/search.py)
+            query.update(text_filter(search))
+        
         if name:
             query['name'] = {'$regex': name, '$options': 'i'}
         
@@ -999,12 +1050,11 @@ def delete_account():
             with session.start_transaction():
                 # Delete user's posts
                 db.posts.delete_many({'author_id': str(user_id)}, session=session)
+                db.timeline.delete_many({'author_id': str(user_id)}, session=session)
                 
-                # Delete user's comments
-                db.comments.delete_many({'author_id': str(user_id)}, session=session)
-                
-                # Delete user's likes
-                db.post_likes.delete_many({'user_id': str(user_id)}, session=session)
+                # Delete user's comments and likes, keeping the counters on
+                # other users' posts and comments in step
+                engaged_post_ids = remove_user_engagement(db, user_id, session=session)
                 
                 # Delete user's resources
                 # Delete all resources uploaded by the user (string or ObjectId match)
@@ -1032,7 +1082,7 @@ def delete_account():
                 db.resources.delete_many({'uploader_id': ''}, session=session)
                 
                 # Delete user's notifications
-                db.notifications.delete_many({'user_id': str(user_id)}, session=session)
+                delete_notifications(db, user_id, session=session)
 
                 # Delete user's opportunities
                 opportunities = list(db.opportunities.find({'poster_id': str(user_id)}, session=session))
@@ -1052,6 +1102,11 @@ def delete_account():
                         'message': 'Failed to delete account'
                     }), 500
         
+        invalidate_user_cache(user_id)
+        typeahead.sync_user(db, user_id)
+        for post_id in engaged_post_ids:
+            refresh_hot_score(db, post_id)
+        
         logger.info(f"User account deleted: {g.user['email']}")
         
         return jsonify({
@@ -1255,6 +1310,7 @@ def reset_password():
                 }
             }
         )
+        invalidate_user_cache(user['_id'])
         
         logger.info(f"Password reset successful for user: {email}")
         
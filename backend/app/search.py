@@ -0,0 +1,141 @@
+"""
+Full-text search for the CampusConnect API
+
+Posts, resources, opportunities, study groups and users each have one
+weighted MongoDB text index (declared in ``REQUIRED_INDEXES`` in app/db.py).
+Both ``/api/search`` and the ``search`` parameter of the list endpoints go
+through ``text_filter`` so every search is an index lookup instead of a
+case-insensitive ``$regex`` scan over several fields.
+
+Text search matches whole (stemmed) words, ranked by ``textScore``; prefix
+matching for search-as-you-type is a separate concern.
+"""
+
+import logging
+from datetime import timezone
+
+logger = logging.getLogger(__name__)
+
+# Searchable entity types: collection, visibility filter and result fields.
+# ``visible`` takes the requesting user's ID string and returns the filter
+# restricting results to what that user may see.
+SEARCH_ENTITIES = {
+    'posts': {
+        'collection': 'posts',
+        'visible': lambda user_id: {'$or': [
+            {'moderation_status': 'approved'},
+            {'author_id': user_id}
+        ]},
+        'title': 'title',
+        'snippet': 'content',
+    },
+    'resources': {
+        'collection': 'resources',
+        'visible': lambda user_id: {},
+        'title': 'title',
+        'snippet': 'description',
+    },
+    'opportunities': {
+        'collection': 'opportunities',
+        'visible': lambda user_id: {'is_active': True},
+        'title': 'title',
+        'snippet': 'description',
+    },
+    'study_groups': {
+        'collection': 'study_groups',
+        'visible': lambda user_id: {},
+        'title': 'name',
+        'snippet': 'description',
+    },
+    'users': {
+        'collection': 'users',
+        'visible': lambda user_id: {'is_verified': True},
+        'title': 'name',
+        'snippet': 'department',
+    },
+}
+
+SNIPPET_LENGTH = 160
+MAX_QUERY_LENGTH = 200
+
+def normalize_query(text):
+    """Trim and bound a user-supplied search string; returns '' if empty"""
+    if not text:
+        return ''
+    return ' '.join(text.split())[:MAX_QUERY_LENGTH]
+
+def text_filter(text):
+    """Query fragment matching ``text`` against the collection's text index
+
+    Merge the result into a list endpoint's query with ``query.update(...)``.
+    """
+    return {'$text': {'$search': normalize_query(text)}}
+
+def _snippet(value):
+    if isinstance(value, list):
+        value = ', '.join(str(item) for item in value)
+    value = ' '.join(str(value or '').split())
+    if len(value) > SNIPPET_LENGTH:
+        value = value[:SNIPPET_LENGTH].rsplit(' ', 1)[0] + '...'
+    return value
+
+def _format_hit(entity_type, spec, doc):
+    created_at = doc.get('created_at')
+    if created_at is not None and hasattr(created_at, 'isoformat'):
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        created_at = created_at.isoformat()
+    return {
+        'type': entity_type,
+        'id': str(doc['_id']),
+        'title': doc.get(spec['title']) or '',
+        'snippet': _snippet(doc.get(spec['snippet'])),
+        'score': round(doc.get('score', 0), 4),
+        'created_at': created_at
+    }
+
+def search(db, text, user_id, entity_types=None, limit=10):
+    """Search across entity types, ranked by relevance
+
+    Args:
+        db: The database instance
+        text: The search string
+        user_id: ID string of the requesting user, for visibility rules
+        entity_types: Keys of SEARCH_ENTITIES to search (default: all)
+        limit: Maximum results per entity type
+
+    Returns:
+        dict with ``results`` (all hits, best first) and ``counts`` (hits
+        returned per type)
+    """
+    text = normalize_query(text)
+    entity_types = entity_types or list(SEARCH_ENTITIES)
+    results = []
+    counts = {}
+
+    for entity_type in entity_types:
+        spec = SEARCH_ENTITIES[entity_type]
+        query = {'$text': {'$search': text}}
+        query.update(spec['visible'](user_id))
+        projection = {
+            'score': {'$meta': 'textScore'},
+            spec['title']: 1,
+            spec['snippet']: 1,
+            'created_at': 1
+        }
+        try:
+            docs = list(
+                db[spec['collection']].find(query, projection)
+                .sort([('score', {'$meta': 'textScore'})])
+                .limit(limit)
+            )
+        except Exception as e:
+            # A missing text index fails only this type, not the whole search
+            logger.error(f"Error searching {entity_type}: {str(e)}")
+            docs = []
+
+        counts[entity_type] = len(docs)
+        results.extend(_format_hit(entity_type, spec, doc) for doc in docs)
+
+    results.sort(key=lambda hit: hit['score'], reverse=True)
+    return {'results': results, 'counts': counts}
@@ -0,0 +1,391 @@
+"""
+Sentiment analysis for the CampusConnect API
+
+Posts are scored with the cardiffnlp/twitter-roberta-base-sentiment model,
+either through the Hugging Face Inference API or a local transformers
+pipeline. The local pipeline is loaded once per process and kept resident by
+``SentimentEngine``, which also micro-batches concurrent requests into a
+single forward pass. Results are memoized by a hash of the normalized text
+in ``sentiment_cache`` so repeated or unchanged content is never re-analyzed.
+"""
+
+import copy
+import hashlib
+import logging
+import queue
+import re
+import threading
+import time
+import unicodedata
+from concurrent.futures import Future
+from datetime import datetime
+
+from app.ai_clients import huggingface_inference
+from app.cache import TTLCache
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "cardiffnlp/twitter-roberta-base-sentiment"
+
+# Seconds to wait before retrying a model load that failed
+MODEL_RETRY_SECONDS = 300
+
+NEUTRAL_RESULT = {
+    'score': 50,
+    'sentiment': 'Neutral',
+    'emotionalIntensity': 3,
+    'detectedEmotions': [{'name': 'Calmness', 'percentage': 50}]
+}
+
+def _best_label(result):
+    """Pick the (label, score) with the highest score from a pipeline result"""
+    if isinstance(result, list):
+        best_match = max(result, key=lambda x: x['score'])
+        return best_match['label'], best_match['score']
+    if isinstance(result, dict) and 'label' in result:
+        return result['label'], result['score']
+    raise ValueError(f"Could not extract sentiment from result: {result}")
+
+class SentimentEngine:
+    """Process-wide local sentiment model with request micro-batching
+
+    The transformers pipeline is created on first use and reused for the life
+    of the process. ``classify`` queues a text and blocks until a background
+    worker has run it, together with any other texts queued within
+    ``max_wait`` seconds (up to ``batch_size``), through the model.
+    """
+
+    def __init__(self, model_name=MODEL_NAME, batch_size=16, max_wait=0.01):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self._pipeline = None
+        self._load_lock = threading.Lock()
+        self._load_failed_at = None
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+    def _get_pipeline(self):
+        """Load the pipeline once; later calls return the resident instance"""
+        if self._pipeline is not None:
+            return self._pipeline
+
+        with self._load_lock:
+            if self._pipeline is None:
+                if self._load_failed_at and time.monotonic() - self._load_failed_at < MODEL_RETRY_SECONDS:
+                    raise RuntimeError("Local sentiment model unavailable")
+                try:
+                    from transformers import pipeline
+                    logger.info(f"Loading local sentiment model: {self.model_name}")
+                    self._pipeline = pipeline(
+                        "text-classification",
+                        model=self.model_name,
+                        return_all_scores=True  # Get scores for all labels
+                    )
+                    self._load_failed_at = None
+                except Exception:
+                    self._load_failed_at = time.monotonic()
+                    raise
+        return self._pipeline
+
+    def classify_batch(self, texts):
+        """Run ``texts`` through the model in one call
+
+        Returns:
+            List of (raw_label, confidence) tuples in input order
+        """
+        if not texts:
+            return []
+        results = self._get_pipeline()(list(texts), truncation=True)
+        return [_best_label(result) for result in results]
+
+    def classify(self, text, timeout=None):
+        """Classify a single text, batched with concurrent callers
+
+        Returns:
+            Tuple of (raw_label, confidence)
+        """
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((text, future))
+        return future.result(timeout)
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name='sentiment-batcher', daemon=True
+                )
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                labels = self.classify_batch([text for text, _ in batch])
+                for (_, future), label in zip(batch, labels):
+                    future.set_result(label)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+
+# Shared engine for the whole process
+sentiment_engine = SentimentEngine(
+    batch_size=Config.SENTIMENT_BATCH_SIZE,
+    max_wait=Config.SENTIMENT_BATCH_WAIT_MS / 1000.0
+)
+
+def content_hash(text):
+    """Hash of the normalized text, used as the sentiment cache key
+
+    Unicode is NFC-normalized and runs of whitespace are collapsed, so edits
+    that only touch spacing map to the same key. The model name is part of
+    the hash so switching models never serves old results.
+    """
+    normalized = re.sub(r'\s+', ' ', unicodedata.normalize('NFC', text)).strip()
+    return hashlib.sha256(f"{MODEL_NAME}\n{normalized}".encode('utf-8')).hexdigest()
+
+class SentimentCache:
+    """Sentiment results keyed by ``content_hash``
+
+    Lookups hit an in-process LRU first and then, if ``persist`` is set and
+    the database is initialized, the ``sentiment_cache`` collection, which
+    shares results across workers and restarts.
+    """
+
+    def __init__(self, maxsize=4096, ttl=86400, persist=True):
+        self.persist = persist
+        self._memory = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def _collection(self):
+        if not self.persist:
+            return None
+        from app.db import mongo
+        if mongo.db is None:
+            return None
+        return mongo.db.sentiment_cache
+
+    def get(self, key):
+        """Return a copy of the cached result for ``key``, or None"""
+        result = self._memory.get(key)
+        if result is None:
+            collection = self._collection()
+            if collection is not None:
+                try:
+                    doc = collection.find_one({'_id': key}, {'result': 1})
+                except Exception as e:
+                    logger.warning(f"Error reading sentiment cache: {str(e)}")
+                    doc = None
+                if doc:
+                    result = doc['result']
+                    self._memory.set(key, result)
+        return copy.deepcopy(result) if result is not None else None
+
+    def set(self, key, result):
+        """Store ``result`` under ``key`` in memory and, if enabled, in Mongo"""
+        self._memory.set(key, copy.deepcopy(result))
+        collection = self._collection()
+        if collection is not None:
+            try:
+                collection.update_one(
+                    {'_id': key},
+                    {'$set': {'result': result, 'model': MODEL_NAME, 'created_at': datetime.utcnow()}},
+                    upsert=True
+                )
+            except Exception as e:
+                logger.warning(f"Error writing sentiment cache: {str(e)}")
+
+# Shared result cache for the whole process
+sentiment_cache = SentimentCache(
+    maxsize=Config.SENTIMENT_CACHE_SIZE,
+    ttl=Config.SENTIMENT_CACHE_TTL,
+    persist=Config.SENTIMENT_CACHE_PERSIST
+)
+
+def _classify_with_api(text):
+    """Classify text with the Hugging Face Inference API
+
+    Raises:
+        Exception: If no API key is configured, the API is being skipped
+            after repeated failures, or the call fails or times out
+    """
+    result = huggingface_inference(MODEL_NAME, {"inputs": text})
+
+    # The API returns a list of lists of {label, score}
+    if isinstance(result, list) and len(result) > 0 and isinstance(result[0], list):
+        raw_sentiment, confidence = _best_label(result[0])
+        logger.info(f"API returned sentiment: {raw_sentiment} with confidence: {confidence}")
+        return raw_sentiment, confidence
+
+    raise ValueError(f"Unexpected API response format: {result}")
+
+def _classify_with_rules(text):
+    """Simple keyword-based sentiment used when no model is available"""
+    logger.warning("Falling back to rule-based sentiment analysis")
+
+    # Simple word lists for basic sentiment analysis
+    positive_words = ['good', 'great', 'excellent', 'amazing', 'wonderful', 'happy', 'joy', 'love', 'like', 'best']
+    negative_words = ['bad', 'terrible', 'awful', 'horrible', 'sad', 'angry', 'hate', 'dislike', 'worst']
+
+    text_lower = text.lower()
+    pos_count = sum(1 for word in positive_words if word in text_lower)
+    neg_count = sum(1 for word in negative_words if word in text_lower)
+
+    # Determine sentiment based on word counts
+    if pos_count > neg_count:
+        raw_sentiment = "POSITIVE"
+        confidence = min(0.9, 0.5 + (pos_count - neg_count) * 0.1)
+    elif neg_count > pos_count:
+        raw_sentiment = "NEGATIVE"
+        confidence = min(0.9, 0.5 + (neg_count - pos_count) * 0.1)
+    else:
+        # If counts are equal or both zero, check for specific phrases
+        if any(phrase in text_lower for phrase in ['thank you', 'thanks', 'appreciate']):
+            raw_sentiment = "POSITIVE"
+            confidence = 0.7
+        elif any(phrase in text_lower for phrase in ['sorry', 'apologize', 'regret']):
+            raw_sentiment = "NEGATIVE"
+            confidence = 0.7
+        else:
+            raw_sentiment = "NEUTRAL"
+            confidence = 0.6
+
+    logger.info(f"Rule-based analysis returned: {raw_sentiment} with confidence: {confidence}")
+    return raw_sentiment, confidence
+
+def format_sentiment(raw_sentiment, confidence, text=''):
+    """Map a raw model label and confidence to the post sentiment fields"""
+    # The model returns labels like: LABEL_0, LABEL_1, LABEL_2 or NEGATIVE, NEUTRAL, POSITIVE
+    sentiment_mapping = {
+        "LABEL_0": "Negative",
+        "LABEL_1": "Neutral",
+        "LABEL_2": "Positive",
+        "NEGATIVE": "Negative",
+        "NEUTRAL": "Neutral",
+        "POSITIVE": "Positive"
+    }
+
+    # Default to the raw sentiment if it's already in the right format
+    sentiment = sentiment_mapping.get(raw_sentiment, raw_sentiment)
+
+    # Make sure we have a valid sentiment category
+    if sentiment not in ["Positive", "Neutral", "Negative"]:
+        logger.warning(f"Unknown sentiment '{sentiment}', defaulting to Neutral")
+        sentiment = "Neutral"
+
+    # Convert confidence to percentage score
+    score_percentage = round(confidence * 100)
+
+    # Determine emotional intensity (1-10 scale) based on confidence
+    emotional_intensity = max(1, min(10, round(confidence * 10)))
+
+    # Generate detected emotions based on the sentiment
+    detected_emotions = []
+
+    if sentiment == "Positive":
+        detected_emotions.append({"name": "Happiness", "percentage": score_percentage})
+        if score_percentage > 80:
+            detected_emotions.append({"name": "Joy", "percentage": score_percentage - 10})
+    elif sentiment == "Negative":
+        detected_emotions.append({"name": "Sadness", "percentage": score_percentage})
+        if score_percentage > 75:
+            detected_emotions.append({"name": "Anger", "percentage": score_percentage - 15})
+    else:  # Neutral
+        detected_emotions.append({"name": "Calmness", "percentage": score_percentage})
+
+    logger.info(f"Final sentiment analysis for text: '{text[:30]}...' - Result: {sentiment} (Score: {score_percentage}%)")
+
+    return {
+        'score': score_percentage,
+        'sentiment': sentiment,
+        'emotionalIntensity': emotional_intensity,
+        'detectedEmotions': detected_emotions
+    }
+
+def _is_too_short(text):
+    return not text or len(text.strip()) < 3
+
+def analyze_post_sentiment(text):
+    """Analyze the sentiment of post content
+
+    Returns a memoized result if the same normalized text was analyzed
+    before. Otherwise tries the Hugging Face Inference API first, then the
+    resident local model, then a rule-based fallback. Rule-based results are
+    not cached so the model gets another chance once it is available.
+    """
+    # Check if text is empty or too short
+    if _is_too_short(text):
+        logger.warning("Text too short for sentiment analysis, returning Neutral")
+        return dict(NEUTRAL_RESULT)
+
+    key = content_hash(text)
+    cached = sentiment_cache.get(key)
+    if cached is not None:
+        return cached
+
+    try:
+        raw_sentiment, confidence = _classify_with_api(text)
+    except Exception as api_error:
+        # Fall back to local model if API call fails
+        logger.warning(f"API approach failed, falling back to local model: {str(api_error)}")
+        try:
+            raw_sentiment, confidence = sentiment_engine.classify(text)
+            logger.info(f"Local model returned sentiment: {raw_sentiment} with confidence: {confidence}")
+        except Exception as local_model_error:
+            logger.error(f"Local model failed: {str(local_model_error)}")
+            raw_sentiment, confidence = _classify_with_rules(text)
+            return format_sentiment(raw_sentiment, confidence, text)
+
+    result = format_sentiment(raw_sentiment, confidence, text)
+    sentiment_cache.set(key, result)
+    return result
+
+def analyze_many(texts):
+    """Analyze a list of texts, running them through the local model as one batch
+
+    Texts with a cached result are not re-analyzed. Falls back to
+    ``analyze_post_sentiment`` per text if the local model is unavailable.
+
+    Returns:
+        List of sentiment results in input order
+    """
+    results = [None] * len(texts)
+    keys = {}
+    pending = []
+    for index, text in enumerate(texts):
+        if _is_too_short(text):
+            results[index] = dict(NEUTRAL_RESULT)
+            continue
+        keys[index] = content_hash(text)
+        results[index] = sentiment_cache.get(keys[index])
+        if results[index] is None:
+            pending.append(index)
+
+    if not pending:
+        return results
+
+    try:
+        labels = sentiment_engine.classify_batch([texts[index] for index in pending])
+        for index, (raw_sentiment, confidence) in zip(pending, labels):
+            results[index] = format_sentiment(raw_sentiment, confidence, texts[index])
+            sentiment_cache.set(keys[index], results[index])
+    except Exception as local_model_error:
+        logger.warning(f"Batch sentiment analysis failed, analyzing individually: {str(local_model_error)}")
+        for index in pending:
+            results[index] = analyze_post_sentiment(texts[index])
+
+    return results
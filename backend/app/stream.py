@@ -0,0 +1,212 @@
+"""
+Live updates for the CampusConnect API (``/api/stream``)
+
+Clients hold a Server-Sent Events connection instead of re-polling the feed.
+Events are delivered through an in-process ``EventBroker``:
+
+* ``post``: a new post (broadcast if approved, else to its author only)
+* ``post_stats``: a post's like/comment counts changed (broadcast)
+* ``notification``: a new notification (to its recipient)
+* ``unread_count``: the recipient's unread badge changed
+
+Where the events come from depends on the deployment. With a replica set,
+``ChangeStreamRelay`` tails MongoDB change streams, so every worker process
+sees writes made by every other process. On a standalone server change
+streams are unavailable and write handlers ``publish`` directly, which only
+reaches clients connected to the same process.
+
+Every open stream is a long-lived request. The API's threaded workers can
+only afford a few (STREAM_MAX_CONNECTIONS per worker), so in production the
+stream is served by its own gevent process (``create_stream_app``, started
+by start_stream.sh), where a connection costs a greenlet instead of a
+thread. That process only sees other processes' writes through change
+streams, so it needs a replica set.
+"""
+
+import json
+import logging
+import queue
+import threading
+import time
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+def post_event(post):
+    """Payload of a ``post`` event"""
+    return {
+        'post_id': str(post['_id']),
+        'author_id': post.get('author_id'),
+        'category': post.get('category'),
+        'created_at': post['created_at'].isoformat() if post.get('created_at') else None
+    }
+
+def post_stats_event(post):
+    """Payload of a ``post_stats`` event"""
+    return {
+        'post_id': str(post['_id']),
+        'like_count': post.get('like_count', 0),
+        'comment_count': post.get('comment_count', 0)
+    }
+
+def format_sse(event_type, data):
+    """Encode one event in the text/event-stream format"""
+    return f"event: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+
+class Subscription:
+    """One connected client's bounded event queue"""
+
+    def __init__(self, user_id, maxsize):
+        self.user_id = user_id
+        self.queue = queue.Queue(maxsize=maxsize)
+        # Set when events were dropped because the client fell behind
+        self.overflowed = False
+
+class EventBroker:
+    """Fan events out to the subscriptions of this process"""
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._subscriptions)
+
+    def subscribe(self, user_id, max_connections=None):
+        """Register a client, or return None if ``max_connections`` are open
+
+        The limit is checked and the subscription added under one lock, so
+        concurrent connects cannot overshoot it.
+        """
+        subscription = Subscription(str(user_id), self.queue_size)
+        with self._lock:
+            if max_connections is not None and len(self._subscriptions) >= max_connections:
+                return None
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def dispatch(self, event_type, data, user_id=None):
+        """Queue an event for one user, or for everyone if ``user_id`` is None"""
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            if user_id is not None and subscription.user_id != str(user_id):
+                continue
+            try:
+                subscription.queue.put_nowait((event_type, data))
+            except queue.Full:
+                subscription.overflowed = True
+
+broker = EventBroker(queue_size=Config.STREAM_QUEUE_SIZE)
+
+class ChangeStreamRelay:
+    """Tail MongoDB change streams and dispatch them to ``broker``"""
+
+    PIPELINE = [{'$match': {
+        'ns.coll': {'$in': ['posts', 'notifications', 'notification_counters']},
+        'operationType': {'$in': ['insert', 'update', 'replace']}
+    }}]
+
+    def __init__(self):
+        self.source = None
+        self._lock = threading.Lock()
+
+    def start(self, db):
+        """Choose the event source on first use; returns 'change_stream' or 'local'"""
+        if self.source is not None:
+            return self.source
+        with self._lock:
+            if self.source is not None:
+                return self.source
+            if Config.STREAM_SOURCE == 'local':
+                self.source = 'local'
+                return self.source
+            try:
+                stream = db.watch(self.PIPELINE, full_document='updateLookup')
+            except (OperationFailure, PyMongoError) as e:
+                if Config.STREAM_SOURCE == 'change_stream':
+                    raise
+                logger.info(f"Change streams unavailable ({str(e)}), using in-process events")
+                self.source = 'local'
+                return self.source
+            threading.Thread(target=self._run, args=(db, stream), name='change-stream-relay', daemon=True).start()
+            self.source = 'change_stream'
+            return self.source
+
+    def _run(self, db, stream):
+        resume_token = None
+        while True:
+            try:
+                if stream is None:
+                    stream = db.watch(self.PIPELINE, full_document='updateLookup', resume_after=resume_token)
+                with stream:
+                    for change in stream:
+                        resume_token = stream.resume_token
+                        try:
+                            self._relay(change)
+                        except Exception as e:
+                            logger.error(f"Error relaying change event: {str(e)}")
+            except OperationFailure as e:
+                # The resume point may have aged out of the oplog; start fresh
+                logger.warning(f"Change stream failed, restarting: {str(e)}")
+                resume_token = None
+                time.sleep(1)
+            except PyMongoError as e:
+                logger.warning(f"Change stream interrupted, resuming: {str(e)}")
+                time.sleep(1)
+            stream = None
+
+    def _relay(self, change):
+        collection = change['ns']['coll']
+        doc = change.get('fullDocument')
+        if not doc:
+            return
+
+        if collection == 'posts':
+            if change['operationType'] == 'insert':
+                dispatch_new_post(doc)
+            else:
+                updated = change.get('updateDescription', {}).get('updatedFields', {})
+                if 'like_count' in updated or 'comment_count' in updated:
+                    broker.dispatch('post_stats', post_stats_event(doc))
+        elif collection == 'notifications':
+            updated = change.get('updateDescription', {}).get('updatedFields', {})
+            # Inserts, and grouped notifications gaining an actor (not reads)
+            if change['operationType'] != 'insert' and 'actor_count' not in updated:
+                return
+            from app.notifications import format_notification
+            broker.dispatch('notification', format_notification(dict(doc)), user_id=doc['user_id'])
+        elif collection == 'notification_counters':
+            broker.dispatch('unread_count', {'unread_count': max(doc.get('unread', 0), 0)}, user_id=doc['_id'])
+
+relay = ChangeStreamRelay()
+
+def dispatch_new_post(post):
+    if post.get('moderation_status') == 'approved':
+        broker.dispatch('post', post_event(post))
+    else:
+        broker.dispatch('post', post_event(post), user_id=post.get('author_id'))
+
+def publish(event_type, payload, user_id=None):
+    """Deliver an event from a write handler
+
+    A no-op when the change stream relay is running, since it will deliver
+    the same write to every process.
+    """
+    if relay.source == 'change_stream' or not len(broker):
+        return
+    broker.dispatch(event_type, payload, user_id=user_id)
+
+def publish_new_post(post):
+    """Deliver a ``post`` event for a newly inserted post"""
+    if relay.source == 'change_stream' or not len(broker):
+        return
+    dispatch_new_post(post)
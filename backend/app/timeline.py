@@ -0,0 +1,129 @@
+"""
+Materialized home-feed timelines
+
+With ``FEED_TIMELINE_MODE`` set to ``all``, ``college`` or ``department``,
+every post is written to the ``timeline`` collection as a small entry
+``{_id: post_id, bucket, created_at, author_id}`` when it is created or
+changes moderation status:
+
+* approved posts go to their author's cohort bucket (``all``, or e.g.
+  ``college:<name>``), shared by every reader in that cohort;
+* other posts go to ``user:<author_id>`` so only the author sees them.
+
+The unfiltered home feed is then one indexed range read over the reader's
+two buckets, followed by a lookup of that page's posts by ``_id``, however
+many posts exist in total. Filtered feeds (category, author, search,
+sentiment) still query ``posts`` directly.
+
+With the default mode ``off`` nothing is written. After switching modes,
+or after bulk edits outside the API (e.g. approve_posts.py), run
+``python rebuild_timeline.py``.
+"""
+
+import logging
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+TIMELINE_MODES = ('off', 'all', 'college', 'department')
+
+def timeline_enabled():
+    return Config.FEED_TIMELINE_MODE in TIMELINE_MODES[1:]
+
+def cohort_bucket(user, mode=None):
+    """The shared bucket a user's approved posts go to and are read from"""
+    mode = mode or Config.FEED_TIMELINE_MODE
+    if mode == 'all':
+        return 'all'
+    value = ' '.join(str((user or {}).get(mode) or '').lower().split())
+    return f"{mode}:{value}"
+
+def own_bucket(user_id):
+    """The bucket holding a user's posts that are visible only to them"""
+    return f"user:{user_id}"
+
+def timeline_filter(user):
+    """Query selecting the entries of ``user``'s home feed"""
+    return {'bucket': {'$in': [cohort_bucket(user), own_bucket(str(user['_id']))]}}
+
+def _entry(post, author, mode):
+    if post.get('moderation_status') == 'approved':
+        bucket = cohort_bucket(author, mode)
+    else:
+        bucket = own_bucket(post['author_id'])
+    return {
+        'bucket': bucket,
+        'created_at': post['created_at'],
+        'author_id': post['author_id']
+    }
+
+def publish_post(db, post, author=None):
+    """Write or move a post's timeline entry
+
+    Call after inserting a post or changing its moderation status.
+
+    Args:
+        db: The database instance
+        post: The post document, including ``_id``
+        author: The author's user document, if already loaded
+    """
+    if not timeline_enabled():
+        return
+    try:
+        if author is None and Config.FEED_TIMELINE_MODE != 'all':
+            author = db.users.find_one({'_id': ObjectId(post['author_id'])}, {'college': 1, 'department': 1})
+        db.timeline.update_one(
+            {'_id': post['_id']},
+            {'$set': _entry(post, author, Config.FEED_TIMELINE_MODE)},
+            upsert=True
+        )
+    except Exception as e:
+        # The post itself is saved; rebuild_timeline.py repairs the entry
+        logger.error(f"Error publishing post {post.get('_id')} to timeline: {str(e)}")
+
+def unpublish_post(db, post_id):
+    """Remove a deleted post's timeline entry"""
+    db.timeline.delete_one({'_id': ObjectId(post_id)})
+
+def load_posts(db, entries):
+    """Fetch the posts for a page of timeline entries, keeping their order"""
+    ids = [entry['_id'] for entry in entries]
+    posts = {post['_id']: post for post in db.posts.find({'_id': {'$in': ids}})}
+    return [posts[post_id] for post_id in ids if post_id in posts]
+
+def rebuild_timeline(db, mode=None, batch_size=500):
+    """Recreate every timeline entry from the posts collection
+
+    Returns:
+        Number of entries written
+    """
+    mode = mode or Config.FEED_TIMELINE_MODE
+    db.timeline.delete_many({})
+    if mode not in TIMELINE_MODES[1:]:
+        return 0
+
+    authors = {}
+    written = 0
+    batch = []
+    for post in db.posts.find({}, {'author_id': 1, 'created_at': 1, 'moderation_status': 1}):
+        author_id = post.get('author_id')
+        if not author_id or not post.get('created_at'):
+            continue
+        if mode != 'all' and author_id not in authors:
+            authors[author_id] = db.users.find_one({'_id': ObjectId(author_id)}, {'college': 1, 'department': 1})
+        batch.append(UpdateOne(
+            {'_id': post['_id']},
+            {'$set': _entry(post, authors.get(author_id), mode)},
+            upsert=True
+        ))
+        if len(batch) >= batch_size:
+            written += db.timeline.bulk_write(batch, ordered=False).upserted_count
+            batch = []
+    if batch:
+        written += db.timeline.bulk_write(batch, ordered=False).upserted_count
+
+    logger.info(f"Rebuilt timeline ({mode}): {written} entries")
+    return written
@@ -0,0 +1,263 @@
+"""
+Typeahead suggestions for the CampusConnect API
+
+Autocomplete for usernames, names, resource tags, subjects and companies is
+served from in-memory prefix indexes instead of ``$regex`` queries. Each
+index is a sorted list of ``(key, item_id)`` pairs, so a lookup is a binary
+search plus a short scan and never touches MongoDB.
+
+The indexes are built from the database on first use and rebuilt in the
+background every ``refresh_interval`` seconds. Between rebuilds the write
+handlers in this process update them incrementally; the periodic rebuild
+picks up writes handled by other worker processes.
+"""
+
+import bisect
+import logging
+import threading
+import time
+from bson import ObjectId
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+def normalize(text):
+    """Lowercase and collapse whitespace; the form all keys are stored in"""
+    return ' '.join(str(text or '').lower().split())
+
+def word_keys(text):
+    """Keys for ``text`` and for every word in it, so 'smi' finds 'John Smith'"""
+    words = normalize(text).split(' ')
+    return [' '.join(words[i:]) for i in range(len(words)) if words[i]]
+
+class PrefixIndex:
+    """Sorted-key prefix index over items reachable through one or more keys
+
+    Items carry a reference ``count`` (e.g. how many resources use a tag);
+    ``remove`` decrements it and the item disappears at zero.
+    """
+
+    def __init__(self):
+        self._keys = []
+        self._items = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def load(self, entries):
+        """Replace the contents with ``(item_id, value, keys, count)`` entries"""
+        items = {}
+        for item_id, value, keys, count in entries:
+            if item_id in items:
+                items[item_id]['count'] += count
+            else:
+                items[item_id] = {'value': value, 'count': count, 'keys': sorted(set(k for k in keys if k))}
+        pairs = sorted((key, item_id) for item_id, item in items.items() for key in item['keys'])
+        with self._lock:
+            self._items = items
+            self._keys = pairs
+
+    def add(self, item_id, value, keys, count=1):
+        """Add ``count`` references to an item, creating it if needed"""
+        with self._lock:
+            item = self._items.get(item_id)
+            if item is not None:
+                item['count'] += count
+                return
+            keys = sorted(set(k for k in keys if k))
+            self._items[item_id] = {'value': value, 'count': count, 'keys': keys}
+            for key in keys:
+                bisect.insort(self._keys, (key, item_id))
+
+    def remove(self, item_id, count=None):
+        """Drop ``count`` references to an item (default: all of them)"""
+        with self._lock:
+            item = self._items.get(item_id)
+            if item is None:
+                return
+            item['count'] = 0 if count is None else item['count'] - count
+            if item['count'] > 0:
+                return
+            del self._items[item_id]
+            for key in item['keys']:
+                i = bisect.bisect_left(self._keys, (key, item_id))
+                if i < len(self._keys) and self._keys[i] == (key, item_id):
+                    del self._keys[i]
+
+    def replace(self, item_id, value, keys):
+        """Set an item's value and keys, dropping whatever it had before"""
+        self.remove(item_id)
+        self.add(item_id, value, keys)
+
+    def suggest(self, prefix, limit=10, scan=500):
+        """Return up to ``limit`` ``(value, count)`` pairs whose keys start with ``prefix``
+
+        Exact matches come first, then the most referenced items. At most
+        ``scan`` keys are examined, which bounds the cost of one-letter prefixes.
+        """
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+
+        matches = {}
+        with self._lock:
+            i = bisect.bisect_left(self._keys, (prefix,))
+            end = min(len(self._keys), i + scan)
+            while i < end:
+                key, item_id = self._keys[i]
+                if not key.startswith(prefix):
+                    break
+                exact = key == prefix
+                if item_id not in matches or exact:
+                    item = self._items[item_id]
+                    matches[item_id] = (exact, item['count'], key, item['value'])
+                i += 1
+
+        ranked = sorted(matches.values(), key=lambda m: (not m[0], -m[1], m[2]))
+        return [(value, count) for _, count, _, value in ranked[:limit]]
+
+def _user_value(user):
+    return {
+        'id': str(user['_id']),
+        'username': user.get('username'),
+        'name': user.get('name'),
+        'profile_picture': user.get('profile_picture')
+    }
+
+def _grouped(collection, field, match=None, unwind=False):
+    """Yield ``(value, count)`` for the distinct values of ``field``"""
+    pipeline = [{'$match': match or {}}]
+    if unwind:
+        pipeline.append({'$unwind': f'${field}'})
+    pipeline.append({'$group': {'_id': f'${field}', 'count': {'$sum': 1}}})
+    for row in collection.aggregate(pipeline):
+        if isinstance(row['_id'], str) and row['_id'].strip():
+            yield row['_id'].strip(), row['count']
+
+class Typeahead:
+    """The set of prefix indexes behind ``/api/search/suggest``"""
+
+    # Kinds whose suggestions are users rather than plain values
+    USER_KINDS = ('usernames', 'names')
+    VALUE_KINDS = ('tags', 'subjects', 'companies')
+    KINDS = USER_KINDS + VALUE_KINDS
+
+    def __init__(self, refresh_interval=600):
+        self.refresh_interval = refresh_interval
+        self._indexes = {kind: PrefixIndex() for kind in self.KINDS}
+        self._built_at = None
+        self._rebuilding = False
+        self._lock = threading.Lock()
+
+    def suggest(self, db, kind, prefix, limit=10):
+        """Suggestions of ``kind`` starting with ``prefix``
+
+        Returns:
+            A list of user dicts for user kinds, else a list of
+            ``{'value', 'count'}`` dicts
+        """
+        self._ensure_fresh(db)
+        matches = self._indexes[kind].suggest(prefix, limit)
+        if kind in self.USER_KINDS:
+            return [value for value, _ in matches]
+        return [{'value': value, 'count': count} for value, count in matches]
+
+    def _ensure_fresh(self, db):
+        if self._built_at is None:
+            # First use in this process: build synchronously, once
+            with self._lock:
+                if self._built_at is None:
+                    self.rebuild(db)
+            return
+
+        if time.monotonic() - self._built_at > self.refresh_interval:
+            with self._lock:
+                if self._rebuilding:
+                    return
+                self._rebuilding = True
+            threading.Thread(target=self._rebuild_in_background, args=(db,), daemon=True).start()
+
+    def _rebuild_in_background(self, db):
+        try:
+            self.rebuild(db)
+        finally:
+            self._rebuilding = False
+
+    def rebuild(self, db):
+        """Rebuild every index from the database"""
+        started = time.monotonic()
+        try:
+            users = list(db.users.find(
+                {'is_verified': True},
+                {'username': 1, 'name': 1, 'profile_picture': 1}
+            ))
+            self._indexes['usernames'].load(
+                (str(u['_id']), _user_value(u), [normalize(u.get('username'))], 1) for u in users
+            )
+            self._indexes['names'].load(
+                (str(u['_id']), _user_value(u), word_keys(u.get('name')), 1) for u in users
+            )
+
+            self._indexes['tags'].load(
+                (normalize(tag), tag, [normalize(tag)], count)
+                for tag, count in _grouped(db.resources, 'tags', unwind=True)
+            )
+            subjects = list(_grouped(db.resources, 'subject')) + list(_grouped(db.study_groups, 'subject'))
+            self._indexes['subjects'].load(
+                (normalize(subject), subject, word_keys(subject), count) for subject, count in subjects
+            )
+            self._indexes['companies'].load(
+                (normalize(company), company, word_keys(company), count)
+                for company, count in _grouped(db.opportunities, 'company', {'is_active': True})
+            )
+        except Exception as e:
+            logger.error(f"Error rebuilding typeahead indexes: {str(e)}")
+        # Even a failed build waits for the next interval instead of retrying per request
+        self._built_at = time.monotonic()
+        logger.info(f"Typeahead indexes rebuilt in {(self._built_at - started) * 1000:.0f}ms")
+
+    # Incremental updates from write handlers. Before the first build there
+    # is nothing to update; the build will read the change from the database.
+
+    def sync_user(self, db, user_id):
+        """Re-index a user after their document changed or was deleted"""
+        if self._built_at is None:
+            return
+        try:
+            user = db.users.find_one(
+                {'_id': ObjectId(user_id)},
+                {'username': 1, 'name': 1, 'profile_picture': 1, 'is_verified': 1}
+            )
+        except Exception as e:
+            logger.warning(f"Could not re-index user {user_id}: {str(e)}")
+            return
+        item_id = str(user_id)
+        if not user or not user.get('is_verified'):
+            self._indexes['usernames'].remove(item_id)
+            self._indexes['names'].remove(item_id)
+            return
+        value = _user_value(user)
+        self._indexes['usernames'].replace(item_id, value, [normalize(user.get('username'))])
+        self._indexes['names'].replace(item_id, value, word_keys(user.get('name')))
+
+    def record(self, kind, values, delta=1):
+        """Count ``values`` of a value kind as added (delta > 0) or removed (delta < 0)"""
+        if self._built_at is None:
+            return
+        index = self._indexes[kind]
+        if isinstance(values, str) or values is None:
+            values = [values]
+        for value in values:
+            if not isinstance(value, str) or not value.strip():
+                continue
+            value = value.strip()
+            if delta > 0:
+                keys = [normalize(value)] if kind == 'tags' else word_keys(value)
+                index.add(normalize(value), value, keys, delta)
+            else:
+                index.remove(normalize(value), -delta)
+
+# Shared indexes for the whole process
+typeahead = Typeahead(refresh_interval=Config.TYPEAHEAD_REFRESH_INTERVAL)
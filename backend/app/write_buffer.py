@@ -0,0 +1,116 @@
+"""
+Write-behind buffer for view/download counters
+
+Counters such as note views and resource downloads do not need to be on disk
+before the response is sent. ``write_buffer.increment`` queues them in
+memory, and a background thread sends them as one unordered ``bulk_write``
+per collection when WRITE_BUFFER_MAX_BATCH documents have pending increments
+or every WRITE_BUFFER_FLUSH_INTERVAL seconds, whichever comes first.
+Increments of the same document are merged, so a burst of downloads of one
+resource costs a single ``$inc``.
+
+Only commutative increments belong here. Each worker process has its own
+buffer, so anything another request must observe (rows that can be read,
+marked or deleted) has to be written synchronously.
+
+Pending writes are flushed when the process exits. Writes still queued when
+a worker is killed outright are lost, which is the trade-off for keeping
+them off the request path; set WRITE_BUFFER_ENABLED=False to write through.
+"""
+
+import atexit
+import logging
+import threading
+from pymongo import UpdateOne
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+class WriteBuffer:
+    """Batch counter increments into periodic bulk writes
+
+    Args:
+        max_batch: Documents with pending increments that trigger an immediate flush
+        flush_interval: Maximum seconds an increment waits to be written
+        enabled: If False, every call writes through immediately
+    """
+
+    def __init__(self, max_batch=100, flush_interval=1.0, enabled=True):
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.enabled = enabled
+        self._db = None
+        # (collection, _id) -> {field: amount}
+        self._increments = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        return len(self._increments)
+
+    def increment(self, db, collection, document_id, field, amount=1):
+        """Queue ``$inc: {field: amount}`` on one document"""
+        if not self.enabled:
+            db[collection].update_one({'_id': document_id}, {'$inc': {field: amount}})
+            return
+        with self._lock:
+            self._db = db
+            fields = self._increments.setdefault((collection, document_id), {})
+            fields[field] = fields.get(field, 0) + amount
+        self._queued()
+
+    def _queued(self):
+        self._ensure_thread()
+        if len(self) >= self.max_batch:
+            self._wakeup.set()
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='write-buffer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        """Write everything pending now
+
+        Returns:
+            Number of operations sent
+        """
+        with self._flush_lock:
+            with self._lock:
+                increments, self._increments = self._increments, {}
+            if self._db is None or not increments:
+                return 0
+
+            operations = {}
+            for (collection, document_id), fields in increments.items():
+                operations.setdefault(collection, []).append(UpdateOne({'_id': document_id}, {'$inc': fields}))
+
+            sent = 0
+            for collection, batch in operations.items():
+                try:
+                    self._db[collection].bulk_write(batch, ordered=False)
+                    sent += len(batch)
+                except Exception as e:
+                    # Buffered writes are best-effort by design
+                    logger.error(f"Error flushing {len(batch)} buffered writes to {collection}: {str(e)}")
+            return sent
+
+# Shared buffer for the whole process
+write_buffer = WriteBuffer(
+    max_batch=Config.WRITE_BUFFER_MAX_BATCH,
+    flush_interval=Config.WRITE_BUFFER_FLUSH_INTERVAL,
+    enabled=Config.WRITE_BUFFER_ENABLED
+)
+atexit.register(write_buffer.flush)
@@ -0,0 +1,36 @@
+"""
+Make like rows unique per (post/comment, user).
+
+Removes duplicate likes left by the old check-then-insert handlers, swaps the
+plain (target, user_id) indexes for the unique ones in REQUIRED_INDEXES and
+repairs the like counters. Run once from the backend directory after
+upgrading (safe to re-run):
+    python dedupe_likes.py
+"""
+
+from app import create_app
+from app.db import get_db, ensure_indexes
+from app.likes import dedupe_likes
+from app.counters import reconcile_all
+
+app = create_app()
+
+with app.app_context():
+    db = get_db()
+    removed = dedupe_likes(db)
+
+    for collection_name, target_field in (('post_likes', 'post_id'), ('comment_likes', 'comment_id')):
+        for name, info in db[collection_name].index_information().items():
+            if [field for field, _ in info['key']] == [target_field, 'user_id'] and not info.get('unique'):
+                db[collection_name].drop_index(name)
+                print(f"Dropped non-unique index {collection_name}.{name}")
+
+    report = ensure_indexes(db)
+    result = reconcile_all(db)
+
+print(
+    f"Removed {removed['post_likes']} duplicate post likes and "
+    f"{removed['comment_likes']} duplicate comment likes; "
+    f"{len(report['missing'])} indexes still missing; "
+    f"repaired {result['posts']} posts and {result['comments']} comments"
+)
@@ -0,0 +1,17 @@
+"""
+Move images stored inline in the binary_images collection into GridFS.
+
+Image URLs (/api/files/image/<id>) are unchanged. Run from the backend
+directory; safe to interrupt and re-run:
+    python migrate_binary_images.py
+"""
+
+from app import create_app
+from app.db import get_db, migrate_binary_images
+
+app = create_app()
+
+with app.app_context():
+    migrated = migrate_binary_images(get_db())
+
+print(f"Migrated {migrated} images to GridFS")
@@ -0,0 +1,18 @@
+"""
+Rebuild the materialized home-feed timeline from the posts collection.
+
+Needed after changing FEED_TIMELINE_MODE or editing posts outside the API.
+Run from the backend directory:
+    python rebuild_timeline.py
+"""
+
+from app import create_app
+from app.db import get_db
+from app.timeline import rebuild_timeline
+
+app = create_app()
+
+with app.app_context():
+    written = rebuild_timeline(get_db())
+
+print(f"Wrote {written} timeline entries")
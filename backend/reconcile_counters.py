@@ -0,0 +1,23 @@
+"""
+Repair drift in the denormalized like/comment counters on posts and comments.
+
+The counters are backfilled once automatically when the app first starts
+(see app/migrations.py); this script repairs later drift. Run from the
+backend directory (safe to run repeatedly, e.g. from cron):
+    python reconcile_counters.py
+"""
+
+from app import create_app
+from app.db import get_db
+from app.counters import reconcile_all
+
+app = create_app()
+
+with app.app_context():
+    result = reconcile_all(get_db())
+
+print(
+    f"Repaired {result['posts']} posts, {result['comments']} comments and "
+    f"{result['notification_counters']} unread counters, "
+    f"refreshed {result['hot_scores']} hot scores"
+)
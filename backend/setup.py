@@ -79,7 +79,8 @@ def setup_database():
             'users',
             'posts',
             'comments',
-            'likes',
+            'post_likes',
+            'comment_likes',
             'resources',
             'resource_votes',
             'opportunities',
@@ -93,19 +94,11 @@ def setup_database():
                 db.create_collection(collection_name)
                 logger.info(f"Created collection: {collection_name}")
         
-        # Create indexes
-        db.users.create_index('email', unique=True)
-        db.users.create_index('username', unique=True)
-        db.posts.create_index('author_id')
-        db.posts.create_index('created_at')
-        db.comments.create_index('post_id')
-        db.likes.create_index([('post_id', 1), ('user_id', 1)], unique=True)
-        db.resources.create_index('uploader_id')
-        db.resources.create_index('created_at')
-        db.opportunities.create_index('poster_id')
-        db.opportunities.create_index('created_at')
-        db.applications.create_index([('opportunity_id', 1), ('applicant_id', 1)], unique=True)
-        db.notifications.create_index('user_id')
+        # Create indexes (same declarative set the app ensures at startup)
+        sys.path.append(os.getcwd())
+        from app.db import ensure_indexes
+        report = ensure_indexes(db)
+        logger.info(f"Index report: {report}")
         
         logger.info("Database setup complete.")
         
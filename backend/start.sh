@@ -3,7 +3,8 @@
 
 # Run the application with Gunicorn
 # - workers: number of worker processes
-# - threads: number of threads per worker
+# - threads: number of threads per worker (each open /api/stream holds one;
+#   production streams are served by start_stream.sh instead)
 # - timeout: worker timeout in seconds
 # - bind: IP:PORT to bind to
-exec gunicorn --workers=2 --threads=2 --timeout=60 --bind=0.0.0.0:$PORT "run:create_app()"
+exec gunicorn --workers=2 --threads=8 --timeout=60 --bind=0.0.0.0:$PORT "run:create_app()"
@@ -0,0 +1,15 @@
+#!/bin/bash
+# This file tells Render how to run the live-update stream service (/api/stream)
+
+# Each open stream is a long-lived request, so this service runs on gevent:
+# a connection costs a greenlet, not a thread.
+# - worker-class: gevent (cooperative, patched I/O)
+# - worker-connections: open connections per worker; STREAM_MAX_CONNECTIONS
+#   stays below it so clients get a 503 with Retry-After instead of hanging
+# - timeout: worker timeout in seconds
+# - bind: IP:PORT to bind to
+# Events from the API's processes arrive over MongoDB change streams, so
+# STREAM_SOURCE=change_stream (a replica set) is required.
+export STREAM_SOURCE=${STREAM_SOURCE:-change_stream}
+export STREAM_MAX_CONNECTIONS=${STREAM_MAX_CONNECTIONS:-900}
+exec gunicorn --worker-class=gevent --workers=1 --worker-connections=1000 --timeout=60 --bind=0.0.0.0:$PORT "app:create_stream_app()"